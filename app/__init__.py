@@ -1,7 +1,11 @@
 import os
 from flask import Flask, session, g, abort, request
 from app.extensions import db, migrate, csrf
-from app.models import Tenant
+from app.tenant_cache import tenant_cache
+from app.scheduler import session_closer, recurrence_extender, sqlite_maintenance
+from app.engine import init_engine, engine_options
+from app.stats import stats_cache
+from app.profiling import request_profiler
 
 def create_app():
     app = Flask(__name__)
@@ -10,23 +14,81 @@ def create_app():
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-gizli-anahtar')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///pilates.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Bağlantı havuzu (worker başına); bekleme DB_POOL_WAIT_LOG_MS'i aşarsa loglanır
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', '1') == '1'
+    app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    app.config['DB_POOL_WAIT_LOG_MS'] = int(os.getenv('DB_POOL_WAIT_LOG_MS', 100))
+    # Bir isteğin sorguları için toplam süre sınırı (0 ise sınır yok); aşılırsa sorgu iptal edilir
+    app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    app.config['TENANT_CACHE_SIZE'] = int(os.getenv('TENANT_CACHE_SIZE', 256))
+    app.config['TENANT_CACHE_TTL'] = int(os.getenv('TENANT_CACHE_TTL', 300))
+    app.config['TENANT_CACHE_NEGATIVE_TTL'] = int(os.getenv('TENANT_CACHE_NEGATIVE_TTL', 30))
+    app.config['TENANT_CACHE_NEGATIVE_SIZE'] = int(os.getenv('TENANT_CACHE_NEGATIVE_SIZE', 64))
+    app.config['ADMIN_STATS_TTL'] = int(os.getenv('ADMIN_STATS_TTL', 30))
+    # Geçmiş seansları kapatan arka plan işi. Her worker'da thread açılır ama çalışmalar
+    # veritabanı kirasıyla (job_leases) tek sürece indirilir. Ayrı süreç tercih edilirse
+    # 0 yapılıp `flask close-sessions --watch` çalıştırılır.
+    app.config['SESSION_CLOSER_ENABLED'] = os.getenv('SESSION_CLOSER_ENABLED', '1') == '1'
+    app.config['SESSION_CLOSER_INTERVAL'] = int(os.getenv('SESSION_CLOSER_INTERVAL', 60))
+    # Tekrarlama kuralları: kaç gün ilerisi önceden seans olarak açılır, ufuk ne sıklıkla
+    # uzatılır ve takvimde en fazla kaç gün ilerisine kadar tekrar gösterilir/kayıt açılabilir
+    app.config['RECURRENCE_HORIZON_DAYS'] = int(os.getenv('RECURRENCE_HORIZON_DAYS', 56))
+    app.config['RECURRENCE_EXTENDER_ENABLED'] = os.getenv('RECURRENCE_EXTENDER_ENABLED', '1') == '1'
+    app.config['RECURRENCE_EXTEND_INTERVAL'] = int(os.getenv('RECURRENCE_EXTEND_INTERVAL', 3600))
+    app.config['RECURRENCE_MAX_LOOKAHEAD_DAYS'] = int(os.getenv('RECURRENCE_MAX_LOOKAHEAD_DAYS', 365))
+    # SQLite ayar profili: her bağlantıda uygulanan PRAGMA'lar (eşzamanlı worker'larda
+    # "database is locked" ve fsync beklemelerini azaltır)
+    app.config['SQLITE_PRAGMAS_ENABLED'] = os.getenv('SQLITE_PRAGMAS_ENABLED', '1') == '1'
+    app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    app.config['SQLITE_CACHE_SIZE_KB'] = int(os.getenv('SQLITE_CACHE_SIZE_KB', 65536))
+    app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    app.config['SQLITE_TEMP_STORE'] = os.getenv('SQLITE_TEMP_STORE', 'MEMORY')
+    app.config['SQLITE_FOREIGN_KEYS'] = os.getenv('SQLITE_FOREIGN_KEYS', '1') == '1'
+    # WAL checkpoint + PRAGMA optimize bakım işi (sadece SQLite'ta)
+    app.config['SQLITE_MAINTENANCE_ENABLED'] = (
+        os.getenv('SQLITE_MAINTENANCE_ENABLED', '1') == '1'
+        and app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite')
+    )
+    app.config['SQLITE_MAINTENANCE_INTERVAL'] = int(os.getenv('SQLITE_MAINTENANCE_INTERVAL', 600))
+    app.config['SQLITE_CHECKPOINT_MODE'] = os.getenv('SQLITE_CHECKPOINT_MODE', 'TRUNCATE')
+    # İstek başına sorgu sayısı/SQL süresi ölçümü (Server-Timing başlığı + log satırı)
+    app.config['REQUEST_PROFILING_ENABLED'] = os.getenv('REQUEST_PROFILING_ENABLED', '0') == '1'
 
     # Eklentileri başlat
     db.init_app(app)
+    init_engine(app)
     migrate.init_app(app, db)
     csrf.init_app(app)
+    tenant_cache.configure(
+        max_size=app.config['TENANT_CACHE_SIZE'],
+        ttl=app.config['TENANT_CACHE_TTL'],
+        negative_ttl=app.config['TENANT_CACHE_NEGATIVE_TTL'],
+        negative_max_size=app.config['TENANT_CACHE_NEGATIVE_SIZE'],
+    )
+    session_closer.init_app(app)
+    recurrence_extender.init_app(app)
+    sqlite_maintenance.init_app(app)
+    stats_cache.ttl = app.config['ADMIN_STATS_TTL']
+    request_profiler.init_app(app)
+
+    from app.commands import register_commands
+    register_commands(app)
 
     # Context Processor ve Hook'lar
-    from app.utils import close_past_sessions_logic
-    
     # URL'den stüdyoyu bul (URL DEDEKTİFİ)
     @app.url_value_preprocessor
     def pull_tenant_from_url(endpoint, values):
         g.tenant = None
         if values and 'tenant_prefix' in values:
             prefix = values.pop('tenant_prefix')
-            # Stüdyoyu veritabanında ara
-            tenant = Tenant.query.filter_by(domain_prefix=prefix).first()
+            # Stüdyoyu önce önbellekte, yoksa veritabanında ara
+            tenant = tenant_cache.get(prefix)
             if not tenant:
                 abort(404, description="Böyle bir stüdyo bulunamadı.")
             g.tenant = tenant
@@ -41,8 +103,13 @@ def create_app():
     @app.before_request
     def before_request_hooks():
         g.member_name = session.get('member_name')
-        if g.tenant:
-            close_past_sessions_logic()
+        # Arka plan işleri açıksa thread'ler ilk istekte başlar (kira ile tek süreçte çalışır)
+        if app.config['SESSION_CLOSER_ENABLED']:
+            session_closer.ensure_started()
+        if app.config['RECURRENCE_EXTENDER_ENABLED']:
+            recurrence_extender.ensure_started()
+        if app.config['SQLITE_MAINTENANCE_ENABLED']:
+            sqlite_maintenance.ensure_started()
 
     # Blueprint'leri Çağır
     from app.routes.auth_routes import auth_bp
@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from sqlalchemy import select, update, insert, delete, func, bindparam, literal
+
+from app.extensions import db
+from app.models import Attendance, Reservation, Session
+
+
+def attendance_deltas(*criteria, sign=1):
+    """
+    Verilen filtreye uyan rezervasyonları (üye, gün) bazında sayar.
+    {(tenant_id, member_id, date): adet} döndürür.
+    """
+    rows = db.session.execute(
+        select(Reservation.tenant_id, Reservation.member_id, Session.date, func.count(Reservation.id))
+        .join(Session, Session.id == Reservation.session_id)
+        .where(Reservation.member_id.isnot(None), *criteria)
+        .group_by(Reservation.tenant_id, Reservation.member_id, Session.date)
+    ).all()
+    return {(t, m, d): sign * n for t, m, d, n in rows}
+
+
+def apply_attendance_deltas(deltas, status='attended'):
+    """Özet tabloya artış/azalışları uygular (upsert); sıfıra düşen satırları siler."""
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    table = Attendance.__table__
+    params = [
+        {'t': t, 'm': m, 'd': d, 's': status, 'n': n}
+        for (t, m, d), n in deltas.items()
+    ]
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        stmt = upsert(table).values(
+            tenant_id=bindparam('t'), member_id=bindparam('m'), date=bindparam('d'),
+            status=bindparam('s'), count=bindparam('n'),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['tenant_id', 'member_id', 'date', 'status'],
+            set_={'count': table.c.count + stmt.excluded.count},
+        )
+        db.session.execute(stmt, params)
+    else:
+        for p in params:
+            res = db.session.execute(
+                update(table)
+                .where(table.c.tenant_id == p['t'], table.c.member_id == p['m'],
+                       table.c.date == p['d'], table.c.status == p['s'])
+                .values(count=table.c.count + p['n'])
+            )
+            if not res.rowcount:
+                db.session.execute(insert(table).values(
+                    tenant_id=p['t'], member_id=p['m'], date=p['d'], status=p['s'], count=p['n']))
+    db.session.execute(delete(table).where(table.c.count <= 0))
+
+
+def rebuild_attendance(tenant_id=None):
+    """Özet tabloyu rezervasyonlardan baştan hesaplar. Yazılan satır sayısını döndürür."""
+    table = Attendance.__table__
+    wipe = delete(table)
+    source = (
+        select(
+            Reservation.tenant_id, Reservation.member_id, Session.date,
+            func.count(Reservation.id),
+        )
+        .join(Session, Session.id == Reservation.session_id)
+        .where(Reservation.status == 'attended', Reservation.member_id.isnot(None))
+        .group_by(Reservation.tenant_id, Reservation.member_id, Session.date)
+    )
+    if tenant_id is not None:
+        wipe = wipe.where(table.c.tenant_id == tenant_id)
+        source = source.where(Reservation.tenant_id == tenant_id)
+    db.session.execute(wipe)
+    source = source.add_columns(literal('attended'))
+    res = db.session.execute(
+        insert(table).from_select(['tenant_id', 'member_id', 'date', 'count', 'status'], source)
+    )
+    db.session.commit()
+    return res.rowcount
+
+
+def daily_attendance(tenant_id, member_id, start, end):
+    """[start, end) aralığında gün bazında katılım sayıları: {date: adet}."""
+    totals = defaultdict(int)
+    for d, n in db.session.execute(
+        select(Attendance.date, Attendance.count).where(
+            Attendance.tenant_id == tenant_id,
+            Attendance.member_id == member_id,
+            Attendance.status == 'attended',
+            Attendance.date >= start,
+            Attendance.date < end,
+        )
+    ):
+        totals[d] += n
+    return totals
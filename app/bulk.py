@@ -0,0 +1,60 @@
+"""
+Büyük veri yüklemeleri (demo verisi, benchmark veri setleri) için Core toplu
+INSERT yardımcıları. Satırlar üreticiden parça parça okunur; tamamı bellekte
+tutulmaz. Commit etmezler.
+"""
+from sqlalchemy import insert
+
+from app.extensions import db
+
+CHUNK_SIZE = 20_000
+
+
+def chunks(rows, size=CHUNK_SIZE):
+    """Satır üreticisini `size`'lık listeler halinde verir."""
+    buf = []
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= size:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
+
+
+def bulk_insert(table, rows, chunk_size=CHUNK_SIZE):
+    """Sözlük satırlarını chunk_size'lık parçalar halinde executemany ile yazar."""
+    total = 0
+    for chunk in chunks(rows, chunk_size):
+        db.session.execute(insert(table), chunk)
+        total += len(chunk)
+    return total
+
+
+def db_value(column, value):
+    """Değeri sürücüye gidecek biçime çevirir (örn. SQLite'ta tarih -> metin)."""
+    dialect = db.session.connection().dialect
+    process = column.type.dialect_impl(dialect).bind_processor(dialect)
+    return process(value) if process else value
+
+
+def driver_insert(table, columns, rows, chunk_size=CHUNK_SIZE):
+    """
+    Büyük tablolar için hızlı yol: INSERT bir kez derlenir ve satırlar düz
+    tuple olarak doğrudan sürücünün executemany'sine verilir (SQLAlchemy'nin
+    satır başı parametre işleme maliyeti olmadan). Değerler sürücünün
+    anlayacağı tiplerde olmalıdır (bkz. db_value).
+    """
+    conn = db.session.connection()
+    compiled = insert(table).compile(dialect=conn.dialect, column_keys=columns)
+    sql = str(compiled)
+    if not compiled.positional:
+        rows = (dict(zip(columns, row)) for row in rows)
+    elif list(compiled.positiontup) != columns:
+        order = [columns.index(name) for name in compiled.positiontup]
+        rows = (tuple(row[i] for i in order) for row in rows)
+    total = 0
+    for chunk in chunks(rows, chunk_size):
+        conn.exec_driver_sql(sql, chunk)
+        total += len(chunk)
+    return total
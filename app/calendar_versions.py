@@ -0,0 +1,160 @@
+from datetime import date, timedelta
+
+from sqlalchemy import event, select, update, insert, inspect
+from sqlalchemy.orm import Session as OrmSession
+
+from app.extensions import db
+from app.models import (CalendarVersion, RecurrenceVersion, Session, Reservation, Member,
+                        RecurrenceRule, RecurrenceMember, RecurrenceException)
+from app.stats import stats_cache
+
+
+def week_start_of(d: date) -> date:
+    return d - timedelta(days=d.weekday())
+
+
+def current_version(tenant_id: int, week_start: date) -> int:
+    """Tek bir birincil anahtar okumasıyla stüdyo-haftanın sürümünü döndürür."""
+    return db.session.execute(
+        select(CalendarVersion.version).where(
+            CalendarVersion.tenant_id == tenant_id,
+            CalendarVersion.week_start == week_start,
+        )
+    ).scalar() or 0
+
+
+def rules_version(tenant_id: int) -> int:
+    """Tek bir birincil anahtar okumasıyla stüdyonun kural sürümünü döndürür."""
+    return db.session.execute(
+        select(RecurrenceVersion.version).where(RecurrenceVersion.tenant_id == tenant_id)
+    ).scalar() or 0
+
+
+def _increment(connection, table, key_columns, keys):
+    """Anahtar satırlarının `version` değerini bir artırır (yoksa 1 ile oluşturur)."""
+    keys = [dict(zip(key_columns, key)) for key in set(keys)]
+    if not keys:
+        return
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        stmt = upsert(table).values([{**key, 'version': 1} for key in keys])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={'version': table.c.version + 1},
+        )
+        connection.execute(stmt)
+        return
+    for key in keys:
+        res = connection.execute(
+            update(table)
+            .where(*(table.c[name] == value for name, value in key.items()))
+            .values(version=table.c.version + 1)
+        )
+        if not res.rowcount:
+            connection.execute(insert(table).values(**key, version=1))
+
+
+def bump_weeks(connection, keys):
+    """(tenant_id, week_start) çiftlerinin sürümünü bir artırır (yoksa oluşturur)."""
+    _increment(connection, CalendarVersion.__table__, ['tenant_id', 'week_start'], keys)
+
+
+def bump_rules(connection, tenant_ids):
+    """Stüdyoların kural sürümünü bir artırır; planlı tekrarları gösteren ETag'ler eskir."""
+    _increment(connection, RecurrenceVersion.__table__, ['tenant_id'], [(t,) for t in tenant_ids])
+
+
+def bump_range(tenant_id: int, start: date, end: date):
+    """[start, end] tarihlerini kapsayan tüm haftaları geçersiz kılar."""
+    week = week_start_of(start)
+    keys = []
+    while week <= end:
+        keys.append((tenant_id, week))
+        week += timedelta(days=7)
+    _stale_stats(db.session, {tenant_id})
+    bump_weeks(db.session.connection(), keys)
+
+
+def _stale_stats(session, tenant_ids):
+    """Panel sayaçları eskiyen stüdyoları not eder; önbellek commit'ten sonra temizlenir
+    (commit öncesi temizlense eşzamanlı bir okuma eski veriyi yeniden önbelleğe alabilir)."""
+    session.info.setdefault('stale_stats', set()).update(tenant_ids)
+
+
+def _changed_weeks(session):
+    keys = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Session):
+            sess = obj
+        elif isinstance(obj, Reservation):
+            sess = obj.session or (session.get(Session, obj.session_id) if obj.session_id else None)
+        else:
+            continue
+        if sess is None or sess.tenant_id is None or sess.date is None:
+            continue
+        keys.add((sess.tenant_id, week_start_of(sess.date)))
+        # Tarihi değişen seansın eski haftası da geçersiz olmalı
+        history = inspect(sess).attrs.date.history
+        for old in history.deleted or ():
+            keys.add((sess.tenant_id, week_start_of(old)))
+    return keys
+
+
+def _changed_rule_tenants(session):
+    tenant_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, RecurrenceRule):
+            rule = obj
+        elif isinstance(obj, (RecurrenceMember, RecurrenceException)):
+            rule = obj.rule or (session.get(RecurrenceRule, obj.rule_id) if obj.rule_id else None)
+        elif isinstance(obj, Member) and obj in session.deleted:
+            # Silinen üyenin sabit üyelikleri veritabanında (ON DELETE CASCADE) düşer
+            tenant_ids.add(obj.tenant_id)
+            continue
+        else:
+            continue
+        if rule is not None and rule.tenant_id is not None:
+            tenant_ids.add(rule.tenant_id)
+    return tenant_ids
+
+
+@event.listens_for(OrmSession, 'before_flush')
+def _collect_calendar_changes(session, flush_context, instances):
+    keys = _changed_weeks(session)
+    if keys:
+        session.info.setdefault('calendar_weeks', set()).update(keys)
+    tenant_ids = _changed_rule_tenants(session)
+    if tenant_ids:
+        session.info.setdefault('rule_tenants', set()).update(tenant_ids)
+
+
+@event.listens_for(OrmSession, 'after_flush')
+def _bump_calendar_versions(session, flush_context):
+    keys = session.info.pop('calendar_weeks', None)
+    if keys:
+        _stale_stats(session, {t for t, _ in keys})
+        bump_weeks(session.connection(), keys)
+    tenant_ids = session.info.pop('rule_tenants', None)
+    if tenant_ids:
+        bump_rules(session.connection(), tenant_ids)
+
+
+@event.listens_for(OrmSession, 'after_commit')
+def _invalidate_stats(session):
+    tenant_ids = session.info.pop('stale_stats', None)
+    if tenant_ids:
+        stats_cache.invalidate(*tenant_ids)
+
+
+@event.listens_for(OrmSession, 'after_rollback')
+def _discard_stale_stats(session):
+    # Geri alınan değişiklik sayaçları eskitmez
+    session.info.pop('stale_stats', None)
@@ -0,0 +1,64 @@
+import json
+
+import click
+
+from app.scheduler import session_closer, recurrence_extender, sqlite_maintenance
+from app.attendance import rebuild_attendance
+from app.utils import backfill_reservation_member_ids
+
+
+def register_commands(app):
+
+    @app.cli.command('close-sessions')
+    @click.option('--watch', is_flag=True, help='Ayrı bir süreç olarak sürekli çalış.')
+    @click.option('--interval', type=int, default=None, help='Çalışmalar arası saniye.')
+    @click.option('--full', is_flag=True, help='Stüdyo sınırlarını yok sayıp tüm geçmişi tara.')
+    def close_sessions(watch, interval, full):
+        """Geçmiş seansları hemen kapatır. --watch ile periyodik çalışır; üretimde
+        seans kapatmanın tek çalıştırıcısı bu süreçtir (SESSION_CLOSER_ENABLED=0)."""
+        if interval:
+            session_closer.interval = interval
+        if watch:
+            click.echo(f"Seans kapatıcı {session_closer.interval} sn aralıkla çalışıyor...")
+            session_closer.run_forever()
+            return
+        click.echo(json.dumps(session_closer.run_once(full=full)))
+
+    @app.cli.command('backfill-member-ids')
+    @click.option('--batch-size', type=int, default=1000)
+    def backfill_member_ids(batch_size):
+        """Eski rezervasyonların member_id alanını isimden eşleştirerek doldurur."""
+        processed, unmatched = backfill_reservation_member_ids(batch_size)
+        click.echo(f"{processed} rezervasyon işlendi, {unmatched} kayıt eşleşmedi.")
+
+    @app.cli.command('rebuild-attendance')
+    @click.option('--tenant-id', type=int, default=None, help='Sadece bu stüdyo için.')
+    def rebuild_attendance_cmd(tenant_id):
+        """Katılım özet tablosunu rezervasyonlardan baştan hesaplar."""
+        click.echo(f"{rebuild_attendance(tenant_id)} özet satırı yazıldı.")
+
+    @app.cli.command('extend-recurrences')
+    @click.option('--watch', is_flag=True, help='Ayrı bir süreç olarak sürekli çalış.')
+    @click.option('--interval', type=int, default=None, help='Çalışmalar arası saniye.')
+    def extend_recurrences(watch, interval):
+        """Tekrarlama kurallarının ufkunu ileri taşır (--watch ile periyodik çalışır)."""
+        if interval:
+            recurrence_extender.interval = interval
+        if watch:
+            click.echo(f"Seri ufku {recurrence_extender.interval} sn aralıkla uzatılıyor...")
+            recurrence_extender.run_forever()
+            return
+        click.echo(json.dumps(recurrence_extender.run_once()))
+
+    @app.cli.command('sqlite-maintenance')
+    @click.option('--watch', is_flag=True, help='Ayrı bir süreç olarak sürekli çalış.')
+    @click.option('--interval', type=int, default=None, help='Çalışmalar arası saniye.')
+    def sqlite_maintenance_cmd(watch, interval):
+        """SQLite WAL checkpoint ve PRAGMA optimize çalıştırır (--watch ile periyodik)."""
+        if interval:
+            sqlite_maintenance.interval = interval
+        if watch:
+            click.echo(f"SQLite bakımı {sqlite_maintenance.interval} sn aralıkla çalışıyor...")
+            sqlite_maintenance.run_forever()
+            return
+        click.echo(json.dumps(sqlite_maintenance.run_once()))
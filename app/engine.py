@@ -0,0 +1,179 @@
+import logging
+import time
+
+from flask import g, has_request_context, jsonify, request, request_started
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# SQLite ilerleme kontrolü kaç VM adımında bir yapılır
+SQLITE_PROGRESS_STEPS = 10_000
+
+
+class StatementTimeout(Exception):
+    """İsteğin veritabanı süresi (DB_STATEMENT_TIMEOUT_MS) doldu; sorgu iptal edildi."""
+
+
+class TimedQueuePool(QueuePool):
+    """Havuzdan bağlantı alırken beklenen süreyi ölçen QueuePool; uzun beklemeleri
+    loglar (havuz boyutunu worker sayısına göre ayarlamak için). Eşik her
+    uygulama için timed_pool_class() ile üretilen alt sınıfta tutulur."""
+
+    wait_log_ms = 100
+
+    def connect(self):
+        started = time.perf_counter()
+        connection = super().connect()
+        waited_ms = (time.perf_counter() - started) * 1000
+        if waited_ms >= self.wait_log_ms:
+            logger.warning("pool_wait waited_ms=%.1f size=%d checked_out=%d overflow=%d",
+                           waited_ms, self.size(), self.checkedout(), self.overflow())
+        return connection
+
+
+def timed_pool_class(wait_log_ms):
+    """Bekleme eşiği verilen TimedQueuePool alt sınıfı; başka uygulamaların havuzlarını
+    etkilemez ve havuz yeniden kurulduğunda (recreate) da korunur."""
+    return type('TimedQueuePool', (TimedQueuePool,), {'wait_log_ms': wait_log_ms})
+
+
+def _in_memory(uri):
+    return uri.startswith('sqlite') and (uri in ('sqlite://', 'sqlite:///') or ':memory:' in uri)
+
+
+def engine_options(config):
+    """Config'ten SQLALCHEMY_ENGINE_OPTIONS üretir (SQLite ve sunucu veritabanları için)."""
+    options = {
+        # Kopmuş bağlantılar kullanılmadan önce fark edilsin
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    }
+    # Bellek içi SQLite tek bağlantılı özel havuz kullanır; boyut ayarı ona uymaz
+    if not _in_memory(config['SQLALCHEMY_DATABASE_URI']):
+        options.update(
+            poolclass=timed_pool_class(config['DB_POOL_WAIT_LOG_MS']),
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+        )
+    return options
+
+
+def sqlite_pragmas(config):
+    """Config'ten her yeni SQLite bağlantısında çalışacak PRAGMA listesini üretir."""
+    return [
+        # WAL: okuyucular yazanı, yazan okuyucuları beklemez
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        # WAL ile NORMAL: commit başına fsync yok, sadece checkpoint'te (çökmede veri bozulmaz)
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        # Kilitliyse hemen "database is locked" vermek yerine bu kadar ms bekle
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT_MS']),
+        # Negatif değer KB cinsinden sayfa önbelleği demek
+        ('cache_size', -config['SQLITE_CACHE_SIZE_KB']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+        ('temp_store', config['SQLITE_TEMP_STORE']),
+        ('foreign_keys', 'ON' if config['SQLITE_FOREIGN_KEYS'] else 'OFF'),
+    ]
+
+
+def lift_statement_deadline():
+    """Bu istek için süre sınırını kaldırır (akış halindeki dışa aktarım, toplu içe aktarım gibi)."""
+    g.db_deadline = None
+
+
+def _request_deadline():
+    return g.get('db_deadline') if has_request_context() else None
+
+
+def _install_sqlite_pragmas(app, engine):
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def _install_statement_deadline(app, engine):
+    """
+    İstek başladığında bir son tarih belirlenir; bu tarihten sonra yeni sorgu
+    çalıştırılmaz, çalışan sorgu ise iptal edilir: SQLite'ta ilerleme
+    handler'ı, PostgreSQL'de statement_timeout ile. Diğer veritabanlarında
+    sadece yeni sorgular engellenir. Arka plan işleri etkilenmez.
+    """
+    timeout = app.config['DB_STATEMENT_TIMEOUT_MS'] / 1000
+    dialect = engine.dialect.name
+
+    def set_deadline(sender, **extra):
+        g.db_deadline = time.monotonic() + timeout
+    request_started.connect(set_deadline, app, weak=False)
+
+    if dialect == 'sqlite':
+        @event.listens_for(engine, 'connect')
+        def install_progress_handler(dbapi_connection, connection_record):
+            info = connection_record.info
+
+            def expired():
+                deadline = info.get('deadline')
+                return 1 if deadline is not None and time.monotonic() > deadline else 0
+            dbapi_connection.set_progress_handler(expired, SQLITE_PROGRESS_STEPS)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def check_deadline(conn, cursor, statement, parameters, context, executemany):
+        deadline = _request_deadline()
+        if deadline is not None and time.monotonic() > deadline:
+            raise StatementTimeout()
+        conn.info['deadline'] = deadline
+        if dialect == 'postgresql':
+            # Sunucu tarafı sınır, bağlantının bu istekteki ilk sorgusunda kalan süreye ayarlanır
+            if deadline is not None and 'pg_timeout' not in conn.info:
+                conn.info['pg_timeout'] = max(1, int((deadline - time.monotonic()) * 1000))
+                cursor.execute(f"SET statement_timeout = {conn.info['pg_timeout']}")
+            elif deadline is None and conn.info.pop('pg_timeout', None):
+                cursor.execute('SET statement_timeout = 0')
+
+    @event.listens_for(engine, 'handle_error')
+    def translate_timeout(context):
+        message = str(context.original_exception)
+        if 'interrupted' in message or 'statement timeout' in message:
+            return StatementTimeout()
+
+    @event.listens_for(engine, 'rollback')
+    def forget_timeout(conn):
+        # SET, geri alınan işlemle birlikte geri alınır
+        conn.info.pop('pg_timeout', None)
+
+    @event.listens_for(engine.pool, 'checkin')
+    def clear_deadline(dbapi_connection, connection_record):
+        connection_record.info.pop('deadline', None)
+        if connection_record.info.pop('pg_timeout', None) and dbapi_connection is not None:
+            cursor = dbapi_connection.cursor()
+            cursor.execute('SET statement_timeout = 0')
+            cursor.close()
+            dbapi_connection.commit()
+
+    @app.errorhandler(StatementTimeout)
+    def statement_timeout(e):
+        db.session.rollback()
+        logger.warning("statement_timeout endpoint=%s limit_ms=%d", request.endpoint,
+                       app.config['DB_STATEMENT_TIMEOUT_MS'])
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.is_json:
+            return jsonify(ok=False, error='DB_TIMEOUT'), 503
+        return 'İşlem zaman aşımına uğradı, lütfen tekrar deneyin.', 503
+
+
+def init_engine(app):
+    """Motor açıldıktan sonra bağlantı düzeyindeki ayarları kurar."""
+    with app.app_context():
+        engine = db.engine
+    if app.config['SQLITE_PRAGMAS_ENABLED'] and engine.dialect.name == 'sqlite':
+        _install_sqlite_pragmas(app, engine)
+    if app.config['DB_STATEMENT_TIMEOUT_MS']:
+        _install_statement_deadline(app, engine)
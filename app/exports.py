@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, time
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Session, Reservation, Member, Measurement, Attendance
+
+# Yanıt parçası bu boyutu geçince gönderilir
+CHUNK_BYTES = 64 * 1024
+
+
+def _reservations(tenant_id, date_from, date_to):
+    stmt = (
+        select(
+            Reservation.id, Session.date.label('session_date'), Session.time.label('session_time'),
+            Reservation.session_id, Reservation.member_id, Reservation.user_name, Reservation.status,
+            Reservation.cancel_status, Reservation.created_at, Reservation.updated_at,
+        )
+        .join(Session, Session.id == Reservation.session_id)
+        .where(Reservation.tenant_id == tenant_id)
+        .order_by(Session.date, Session.time, Reservation.id)
+    )
+    if date_from:
+        stmt = stmt.where(Session.date >= date_from)
+    if date_to:
+        stmt = stmt.where(Session.date <= date_to)
+    return stmt
+
+
+def _attendance(tenant_id, date_from, date_to):
+    stmt = (
+        select(Attendance.date, Attendance.member_id, Member.full_name, Attendance.status, Attendance.count)
+        .join(Member, Member.id == Attendance.member_id)
+        .where(Attendance.tenant_id == tenant_id)
+        .order_by(Attendance.date, Attendance.member_id)
+    )
+    if date_from:
+        stmt = stmt.where(Attendance.date >= date_from)
+    if date_to:
+        stmt = stmt.where(Attendance.date <= date_to)
+    return stmt
+
+
+def _measurements(tenant_id, date_from, date_to):
+    stmt = (
+        select(
+            Measurement.id, Measurement.date, Measurement.member_id, Member.full_name,
+            Measurement.weight, Measurement.waist, Measurement.hip, Measurement.chest,
+        )
+        .join(Member, Member.id == Measurement.member_id)
+        .where(Measurement.tenant_id == tenant_id)
+        .order_by(Measurement.date, Measurement.id)
+    )
+    if date_from:
+        stmt = stmt.where(Measurement.date >= date_from)
+    if date_to:
+        stmt = stmt.where(Measurement.date <= date_to)
+    return stmt
+
+
+EXPORTS = {
+    'reservations': _reservations,
+    'attendance': _attendance,
+    'measurements': _measurements,
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def _encode_rows(fmt, columns, rows, first_batch=1000):
+    """
+    Satırları seçilen formatta metin parçalarına çevirir. Başlık satırı ve ilk
+    `first_batch` satır hemen verilir (indirme beklemeden başlasın); sonrası
+    CHUNK_BYTES'lık parçalarda toplanır.
+    """
+    if fmt == 'csv':
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(columns)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        for n, row in enumerate(rows, 1):
+            writer.writerow([_plain(v) for v in row])
+            if n == first_batch or buf.tell() >= CHUNK_BYTES:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+    else:
+        parts, size = [], 0
+        for n, row in enumerate(rows, 1):
+            line = json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + '\n'
+            parts.append(line)
+            size += len(line)
+            if n == first_batch or size >= CHUNK_BYTES:
+                yield ''.join(parts)
+                parts, size = [], 0
+        yield ''.join(parts)
+
+
+def stream_export(kind, tenant_id, fmt='csv', date_from=None, date_to=None, compress=False, batch_size=1000):
+    """
+    Dışa aktarımı parça parça üretir: satırlar yield_per ile sunucu tarafı
+    imleçten okunur; başlık ve ilk parti hemen, sonrası ~64 KB'lık parçalar
+    halinde (istenirse gzip'lenerek) verilir.
+    Bellek kullanımı satır sayısından bağımsızdır.
+    """
+    stmt = EXPORTS[kind](tenant_id, date_from, date_to).execution_options(yield_per=batch_size)
+    result = db.session.execute(stmt)
+    columns = list(result.keys())
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip başlığı
+    try:
+        for text in _encode_rows(fmt, columns, result, batch_size):
+            data = text.encode('utf-8')
+            if compressor:
+                # Her parça hemen gönderilebilsin diye sıkıştırıcı tamponu boşaltılır
+                data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        if compressor:
+            yield compressor.flush()
+    finally:
+        result.close()
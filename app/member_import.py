@@ -0,0 +1,168 @@
+import csv
+import io
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import Member
+
+# Başlık satırında tanınan kolon adları (Member.name_key_for ile normalize edilmiş)
+NAME_HEADERS = {'full_name', 'name', 'ad soyad', 'adsoyad', 'isim', 'ad', 'üye', 'uye'}
+CREDIT_HEADERS = {'credits', 'credit', 'kredi', 'hak', 'seans hakki', 'kalan seans'}
+
+MAX_REPORTED_ERRORS = 1000
+
+
+class MemberImportError(Exception):
+    """Dosya hiç okunamadığında fırlatılır; satır hataları rapora yazılır."""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+def iter_csv_rows(stream):
+    """CSV dosyasını satır satır okur; ayraç (',' ya da ';') başlıktan tahmin edilir."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        first = text.readline()
+    except UnicodeDecodeError:
+        raise MemberImportError('bad_encoding')
+    delimiter = ';' if first.count(';') > first.count(',') else ','
+    try:
+        yield from csv.reader(chain([first], text), delimiter=delimiter)
+    except UnicodeDecodeError:
+        raise MemberImportError('bad_encoding')
+
+
+def iter_xlsx_rows(stream):
+    """XLSX dosyasının ilk sayfasını salt-okunur modda satır satır okur."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise MemberImportError('xlsx_unavailable')
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception:
+        raise MemberImportError('bad_file')
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ['' if v is None else str(v) for v in row]
+    finally:
+        workbook.close()
+
+
+def iter_rows(filename, stream):
+    if filename.lower().endswith('.xlsx'):
+        return iter_xlsx_rows(stream)
+    if filename.lower().endswith(('.csv', '.txt')):
+        return iter_csv_rows(stream)
+    raise MemberImportError('bad_format')
+
+
+def _columns(header):
+    """Başlık satırından (isim, kredi) kolon indekslerini bulur; başlık yoksa None."""
+    cells = [Member.name_key_for(c) for c in header]
+    name_col = next((i for i, c in enumerate(cells) if c in NAME_HEADERS), None)
+    if name_col is None:
+        return None
+    credit_col = next((i for i, c in enumerate(cells) if c in CREDIT_HEADERS), None)
+    return name_col, credit_col
+
+
+def _parse_credits(raw):
+    raw = (raw or '').strip()
+    if not raw:
+        return 0
+    value = float(raw.replace(',', '.'))  # Excel sayıları "10.0" gelebilir
+    if value < 0 or value != int(value):
+        raise ValueError(raw)
+    return int(value)
+
+
+def import_members(tenant_id, rows, chunk_size=500):
+    """
+    Satır akışından üyeleri toplu ekler. Mevcut isimler tek sorguyla bir kümeye
+    alınır; yeni kayıtlar chunk_size'lık parçalar halinde INSERT edilip commit
+    edilir. Dosya ne kadar büyük olursa olsun bellekte sadece bir parça tutulur.
+    Satır bazında hata raporu döndürür.
+    """
+    known = set(db.session.scalars(select(Member.name_key).where(Member.tenant_id == tenant_id)))
+    report = {'created': 0, 'duplicates': 0, 'error_count': 0, 'errors': []}
+    buffer = []
+
+    def error(line, name, message):
+        report['error_count'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': line, 'name': name, 'error': message})
+
+    def flush():
+        if not buffer:
+            return
+        try:
+            db.session.execute(insert(Member), [params for _, params in buffer])
+            db.session.commit()
+        except IntegrityError:
+            # Bu arada başka biri aynı ismi eklediyse: o satırları ayıklayıp tekrar dene
+            db.session.rollback()
+            taken = set(db.session.scalars(select(Member.name_key).where(
+                Member.tenant_id == tenant_id, Member.name_key.in_([p['name_key'] for _, p in buffer])
+            )))
+            for line_no, params in buffer:
+                if params['name_key'] in taken:
+                    report['duplicates'] += 1
+                    error(line_no, params['full_name'], 'Bu isim zaten kayıtlı.')
+            buffer[:] = [(n, p) for n, p in buffer if p['name_key'] not in taken]
+            if buffer:
+                db.session.execute(insert(Member), [params for _, params in buffer])
+                db.session.commit()
+        report['created'] += len(buffer)
+        buffer.clear()
+
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return report
+    columns = _columns(header)
+    line = 1
+    if columns is None:
+        # Başlıksız dosya: 1. kolon isim, 2. kolon kredi
+        columns = (0, 1)
+        rows = chain([header], rows)
+        line = 0
+    name_col, credit_col = columns
+
+    now = datetime.now()
+    for row in rows:
+        line += 1
+        if not any(c.strip() for c in row):
+            continue
+        raw_name = row[name_col] if name_col < len(row) else ''
+        name = Member.canonical(raw_name)
+        if not name:
+            error(line, raw_name, 'İsim boş.')
+            continue
+        if len(name) > 120:
+            error(line, name[:40], 'İsim 120 karakterden uzun.')
+            continue
+        try:
+            credits = _parse_credits(row[credit_col] if credit_col is not None and credit_col < len(row) else '')
+        except ValueError:
+            error(line, name, 'Seans hakkı geçersiz.')
+            continue
+
+        key = Member.name_key_for(name)
+        if key in known:
+            report['duplicates'] += 1
+            error(line, name, 'Bu isim zaten kayıtlı.')
+            continue
+        known.add(key)
+        buffer.append((line, {'tenant_id': tenant_id, 'full_name': name, 'name_key': key,
+                              'credits': credits, 'created_at': now}))
+        if len(buffer) >= chunk_size:
+            flush()
+    flush()
+    return report
@@ -1,5 +1,5 @@
 from app.extensions import db
-from sqlalchemy import Enum, CheckConstraint
+from sqlalchemy import Enum, CheckConstraint, text
 from datetime import date, datetime, time, timedelta
 from sqlalchemy.orm import validates
 
@@ -22,16 +22,33 @@ class Member(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"), nullable=False, index=True)  # YENİ
     full_name = db.Column(db.String(120), nullable=False, index=True)
+    # İsim aramaları için büyük/küçük harf ve boşluk farkından bağımsız anahtar
+    # (mevcut veritabanlarına `flask db upgrade` göçüyle eklenir)
+    name_key = db.Column(db.String(120), nullable=False)
     credits = db.Column(db.Integer, default=0, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
 
     # Aynı stüdyoda aynı isimden iki kişi olamaz (Unique constraint stüdyo bazlı olmalı)
-    __table_args__ = (db.UniqueConstraint('tenant_id', 'full_name', name='uq_tenant_member_name'),)
+    __table_args__ = (
+        db.UniqueConstraint('tenant_id', 'full_name', name='uq_tenant_member_name'),
+        db.Index('uq_tenant_member_name_key', 'tenant_id', 'name_key', unique=True),
+    )
 
     @staticmethod
     def canonical(name: str) -> str:
         return " ".join(name.strip().split())
 
+    @staticmethod
+    def name_key_for(name: str) -> str:
+        # Türkçe I/ı ve İ/i çiftleri de aynı anahtara düşsün ("YILMAZ" == "Yılmaz")
+        key = Member.canonical(name).casefold()
+        return key.replace("i\u0307", "i").replace("ı", "i")
+
+    @validates("full_name")
+    def sync_name_key(self, key, value):
+        self.name_key = Member.name_key_for(value)
+        return value
+
 class Measurement(db.Model):
     __tablename__ = "measurements"
     id = db.Column(db.Integer, primary_key=True)
@@ -64,6 +81,11 @@ class Session(db.Model):
         CheckConstraint('capacity >= 0'),
         CheckConstraint('spots_left >= 0'),
         CheckConstraint('spots_left <= capacity'),
+        # Takvim haftalık pencere sorguları için; aynı stüdyoda aynı gün/saatte tek seans
+        # (eşzamanlı seri açılışları çift seans üretemesin)
+        db.Index('uq_sessions_tenant_date_time', 'tenant_id', 'date', 'time', unique=True),
+        # Admin seans listesinin kategori bazlı keyset sayfalaması için
+        db.Index('ix_sessions_tenant_open_keyset', 'tenant_id', 'completed', 'is_recurring', 'date', 'time', 'id'),
     )
     
     reservations = db.relationship("Reservation", backref="session", lazy=True, cascade="all, delete-orphan")
@@ -81,21 +103,103 @@ class Reservation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"), nullable=False, index=True) # YENİ
     user_name = db.Column(db.String(120), nullable=False, index=True)
+    # Eski kayıtlar `flask backfill-member-ids` ile doldurulana kadar boş olabilir
+    member_id = db.Column(db.Integer, db.ForeignKey("members.id", ondelete="SET NULL"), nullable=True, index=True)
     session_id = db.Column(db.Integer, db.ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False, index=True)
     status = db.Column(Enum(*ALLOWED_STATUSES, name="reservation_status"), default="active", nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     cancel_reason = db.Column(db.Text, nullable=True)
     cancel_status = db.Column(Enum(*ALLOWED_CANCEL, name="cancel_status"), default="none", nullable=False)
+
+    __table_args__ = (
+        # Aynı seansta aynı üyenin tek bir aktif kaydı olabilir (eşzamanlı çift kayda karşı)
+        db.Index('uq_reservation_active', 'session_id', 'member_id', unique=True,
+                 sqlite_where=text("status = 'active'"),
+                 postgresql_where=text("status = 'active'")),
+    )
     
     @validates("user_name")
     def normalize_name(self, key, value):
         return value.strip()
 
 class Attendance(db.Model):
+    """Üye-gün bazında katılım özeti; seans kapatma ve iadelerde güncellenir."""
     __tablename__ = "attendance"
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"), nullable=False, index=True) # YENİ
     member_id = db.Column(db.Integer, db.ForeignKey("members.id"), index=True, nullable=False)
     date = db.Column(db.Date, index=True, nullable=False)
-    status = db.Column(db.String(20), default="attended", nullable=False)
\ No newline at end of file
+    status = db.Column(db.String(20), default="attended", nullable=False)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('tenant_id', 'member_id', 'date', 'status', name='uq_attendance_member_day'),
+    )
+
+class CloseWatermark(db.Model):
+    """Her stüdyo için seansların hangi ana kadar kapatıldığını tutar."""
+    __tablename__ = "close_watermarks"
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True)
+    closed_until = db.Column(db.DateTime, nullable=False)
+
+class JobLease(db.Model):
+    """Periyodik işin (seans kapatma vb.) aynı anda tek süreçte çalışması için kira kaydı."""
+    __tablename__ = "job_leases"
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class CalendarVersion(db.Model):
+    """Stüdyo-hafta bazında takvim değişiklik sayacı (ETag için)."""
+    __tablename__ = "calendar_versions"
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True)
+    week_start = db.Column(db.Date, primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+class RecurrenceVersion(db.Model):
+    """Stüdyo bazında tekrar kuralı değişiklik sayacı (planlı tekrarların ETag'i için)."""
+    __tablename__ = "recurrence_versions"
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+class RecurrenceRule(db.Model):
+    """
+    Tekrarlanan seans kuralı. Somut Session satırları sadece kayan ufuk
+    (materialized_until) içinde üretilir; recur_group_id üzerinden bağlanır.
+    """
+    __tablename__ = "recurrence_rules"
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
+    group_id = db.Column(db.String(36), nullable=False, unique=True)
+    frequency = db.Column(Enum('weekly', 'biweekly', 'monthly', name="recurrence_frequency"), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    time = db.Column(db.Time, nullable=False)
+    until = db.Column(db.Date, nullable=True)  # Boşsa süresiz
+    capacity = db.Column(db.Integer, nullable=False)
+    notes = db.Column(db.String(255))
+    # Bu tarihe kadar (dahil) olan tekrarlar Session olarak üretildi
+    materialized_until = db.Column(db.Date, nullable=False)
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint('capacity >= 1'),
+        db.Index('ix_recurrence_rules_tenant_horizon', 'tenant_id', 'is_active', 'materialized_until'),
+    )
+
+    members = db.relationship("RecurrenceMember", backref="rule", lazy=True, cascade="all, delete-orphan")
+    exceptions = db.relationship("RecurrenceException", backref="rule", lazy=True, cascade="all, delete-orphan")
+
+class RecurrenceMember(db.Model):
+    """Kuraldan üretilen her seansa otomatik eklenen sabit üye."""
+    __tablename__ = "recurrence_members"
+    rule_id = db.Column(db.Integer, db.ForeignKey("recurrence_rules.id", ondelete="CASCADE"), primary_key=True)
+    member_id = db.Column(db.Integer, db.ForeignKey("members.id", ondelete="CASCADE"), primary_key=True)
+    position = db.Column(db.Integer, default=0, nullable=False)
+
+class RecurrenceException(db.Model):
+    """Kuralın atlanacak tekrarı (tatil, iptal edilen ders vb.)."""
+    __tablename__ = "recurrence_exceptions"
+    rule_id = db.Column(db.Integer, db.ForeignKey("recurrence_rules.id", ondelete="CASCADE"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
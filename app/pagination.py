@@ -0,0 +1,68 @@
+from datetime import date, time
+
+from sqlalchemy import tuple_
+from sqlalchemy.engine import Row
+
+from app.models import Session
+
+
+def encode_session_cursor(s):
+    """Seansın (date, time, id) anahtarını URL'de taşınabilir imlece çevirir."""
+    return f"{s.date.isoformat()}|{s.time.strftime('%H:%M:%S')}|{s.id}"
+
+
+def decode_session_cursor(raw):
+    """İmleci (date, time, id) üçlüsüne çözer; boş veya bozuksa None döner."""
+    if not raw:
+        return None
+    try:
+        d, t, sid = raw.split('|')
+        return date.fromisoformat(d), time.fromisoformat(t), int(sid)
+    except ValueError:
+        return None
+
+
+def _keyset_query(query, cursor, limit, descending):
+    key = tuple_(Session.date, Session.time, Session.id)
+    if cursor:
+        query = query.filter(key < tuple_(*cursor) if descending else key > tuple_(*cursor))
+    if descending:
+        query = query.order_by(Session.date.desc(), Session.time.desc(), Session.id.desc())
+    else:
+        query = query.order_by(Session.date.asc(), Session.time.asc(), Session.id.asc())
+    return query.limit(limit + 1)
+
+
+def session_keyset_page(query, cursor, limit, descending=False):
+    """
+    Sorguyu (date, time, id) üzerinde keyset ile sayfalar. OFFSET kullanılmadığı
+    için sayfa maliyeti geçmiş büyüdükçe artmaz. (satırlar, sonraki imleç) döner.
+    """
+    rows = _keyset_query(query, cursor, limit, descending).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, (encode_session_cursor(rows[-1]) if has_more else None)
+
+
+class SessionKeysetStream:
+    """
+    session_keyset_page'in akış (streaming) hali: satırları yield_per ile parça
+    parça okur, şablon render edilirken tüketilir. Sonraki imleç (`next`) ancak
+    iterasyon bittikten sonra dolar. Sorgu Session dışında kolonlar da
+    seçiyorsa Session satırın ilk elemanı olmalıdır.
+    """
+
+    def __init__(self, query, cursor, limit, descending=False, chunk_size=100):
+        self.query = _keyset_query(query, cursor, limit, descending).yield_per(chunk_size)
+        self.limit = limit
+        self.next = None
+
+    def __iter__(self):
+        last = None
+        for n, row in enumerate(self.query):
+            if n == self.limit:
+                s = last[0] if isinstance(last, Row) else last
+                self.next = encode_session_cursor(s)
+                break
+            last = row
+            yield row
@@ -0,0 +1,126 @@
+import logging
+import time
+
+from flask import g, has_request_context, request, request_started, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Log satırında en yavaş sorgunun ilk kaç karakteri gösterilir
+SLOWEST_SQL_CHARS = 200
+
+
+class RequestProfile:
+    """Tek bir isteğin SQL ve şablon ölçümleri."""
+
+    __slots__ = ('started', 'queries', 'sql_ms', 'slowest_ms', 'slowest_sql', 'render_ms', '_render_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = None
+        self.render_ms = 0.0
+        self._render_started = None
+
+    def add_query(self, statement, elapsed_ms):
+        self.queries += 1
+        self.sql_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_sql = statement
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+def _current():
+    return g.get('_profile') if has_request_context() else None
+
+
+class RequestProfiler:
+    """
+    İstek başına sorgu sayısı, toplam SQL süresi, en yavaş sorgu ve Jinja
+    render süresini ölçer; `Server-Timing` başlığı ve tek satırlık log olarak
+    yayınlar. Motor olayları tüm Engine'lere bağlanır ama sadece profil açık
+    bir istek içindeyken sayar; arka plan thread'leri etkilenmez.
+    """
+
+    def __init__(self):
+        self._listening = False
+
+    def init_app(self, app):
+        if not app.config['REQUEST_PROFILING_ENABLED']:
+            return
+        self._listen_engines()
+        request_started.connect(self._start, app)
+        before_render_template.connect(self._render_start, app)
+        template_rendered.connect(self._render_end, app)
+        app.after_request(self._finish)
+
+    def _listen_engines(self):
+        if self._listening:
+            return
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor)
+        self._listening = True
+
+    # --- SQLAlchemy olayları ---
+
+    @staticmethod
+    def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+        if _current() is not None:
+            conn.info.setdefault('_profile_started', []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+        profile = _current()
+        stack = conn.info.get('_profile_started')
+        if profile is None or not stack:
+            return
+        profile.add_query(statement, (time.perf_counter() - stack.pop()) * 1000)
+
+    # --- Flask sinyalleri ---
+
+    @staticmethod
+    def _start(sender, **extra):
+        g._profile = RequestProfile()
+
+    @staticmethod
+    def _render_start(sender, template, context, **extra):
+        profile = _current()
+        if profile is not None:
+            profile._render_started = time.perf_counter()
+
+    @staticmethod
+    def _render_end(sender, template, context, **extra):
+        profile = _current()
+        if profile is not None and profile._render_started is not None:
+            profile.render_ms += (time.perf_counter() - profile._render_started) * 1000
+            profile._render_started = None
+
+    @staticmethod
+    def _finish(response):
+        profile = _current()
+        if profile is None:
+            return response
+        total_ms = profile.total_ms()
+        # Akış halindeki yanıtlarda (stream_template, dışa aktarım) gövde henüz
+        # üretilmediği için ölçüm sadece ilk parçaya kadar olan kısmı kapsar
+        response.headers.add('Server-Timing', ', '.join([
+            f'db;dur={profile.sql_ms:.1f};desc="{profile.queries} queries"',
+            f'tpl;dur={profile.render_ms:.1f}',
+            f'app;dur={total_ms:.1f}',
+        ]))
+        slowest = ' '.join(profile.slowest_sql.split())[:SLOWEST_SQL_CHARS] if profile.slowest_sql else ''
+        logger.info(
+            "request endpoint=%s method=%s status=%s queries=%d sql_ms=%.1f render_ms=%.1f total_ms=%.1f slowest_ms=%.1f slowest=%r",
+            request.endpoint, request.method, response.status_code, profile.queries, profile.sql_ms,
+            profile.render_ms, total_ms, profile.slowest_ms, slowest,
+        )
+        return response
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,174 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import update, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import Session, Reservation
+from app.calendar_versions import bump_range
+
+
+class ReservationError(Exception):
+    """Rezervasyon yapılamadığında fırlatılır; `code` route'larda mesaja çevrilir."""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+def _claim_seat(session_id):
+    """Koşullu UPDATE ile tek koltuk ayırır; yer yoksa False döner."""
+    res = db.session.execute(
+        update(Session)
+        .where(Session.id == session_id, Session.spots_left > 0, Session.completed.is_(False))
+        .values(spots_left=Session.spots_left - 1)
+        .execution_options(synchronize_session=False)
+    )
+    return res.rowcount == 1
+
+
+def _release_seat(session_id):
+    db.session.execute(
+        update(Session)
+        .where(Session.id == session_id, Session.spots_left < Session.capacity)
+        .values(spots_left=Session.spots_left + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _set_status(reservation_id, new_status, **extra):
+    """Sadece hâlâ aktif olan rezervasyonun durumunu değiştirir (çift iptale karşı)."""
+    res = db.session.execute(
+        update(Reservation)
+        .where(Reservation.id == reservation_id, Reservation.status == 'active')
+        .values(status=new_status, updated_at=datetime.utcnow(), **extra)
+        .execution_options(synchronize_session=False)
+    )
+    return res.rowcount == 1
+
+
+def _insert_reservation(tenant_id, session_id, member_id, user_name):
+    r = Reservation(tenant_id=tenant_id, member_id=member_id, user_name=user_name,
+                    session_id=session_id, status='active')
+    db.session.add(r)
+    try:
+        # Aynı seansta aynı üyenin ikinci aktif kaydı uq_reservation_active'e takılır
+        db.session.flush()
+    except IntegrityError:
+        raise ReservationError('duplicate')
+    return r
+
+
+def _check_bookable(s):
+    if s is None:
+        raise ReservationError('not_found')
+    if s.completed or s.is_past:
+        raise ReservationError('past')
+
+
+def reserve(tenant_id, session_id, member, check_credits=True, commit=True):
+    """
+    Üyeyi seansa kaydeder. Koltuk tek bir koşullu UPDATE ile alınır, böylece
+    eşzamanlı isteklerde fazla satış olmaz. Hata durumunda ReservationError.
+    """
+    s = Session.query.filter_by(id=session_id, tenant_id=tenant_id).first()
+    try:
+        _check_bookable(s)
+        if check_credits and (member is None or (member.credits or 0) <= 0):
+            raise ReservationError('no_credits')
+        if not _claim_seat(session_id):
+            raise ReservationError('full')
+        r = _insert_reservation(tenant_id, session_id, member.id, member.full_name)
+        if commit:
+            db.session.commit()
+        return r
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def reserve_many(sessions, members):
+    """
+    Admin ön atamaları için toplu kayıt: her seansa, kapasite elverdiğince
+    verilen üyeleri (sırayla) ekler. Kredi kontrolü yapmaz, commit etmez.
+    Koltuklar, aynı sayıda koltuk alınan seanslar için tek UPDATE ile düşülür;
+    bu arada başka bir istek koltukları kapmışsa ReservationError('full').
+    Seans id -> eklenen kayıt sayısı döndürür.
+    """
+    members = list({m.id: m for m in members}.values())
+    session_ids = [s.id for s in sessions]
+    if not session_ids or not members:
+        return {}
+
+    existing = set(db.session.execute(
+        select(Reservation.session_id, Reservation.member_id).where(
+            Reservation.session_id.in_(session_ids),
+            Reservation.status == 'active',
+            Reservation.member_id.in_([m.id for m in members]),
+        )
+    ).all())
+    # Kimlik haritasındaki spots_left bayat olabilir; güncel değerler tek sorguda
+    free = dict(db.session.execute(
+        select(Session.id, Session.spots_left).where(Session.id.in_(session_ids), Session.completed.is_(False))
+    ).all())
+
+    plan = {}
+    for sid in session_ids:
+        todo = [m for m in members if (sid, m.id) not in existing][:free.get(sid, 0)]
+        if todo:
+            plan[sid] = todo
+    if not plan:
+        return {}
+
+    by_count = defaultdict(list)
+    for sid, todo in plan.items():
+        by_count[len(todo)].append(sid)
+    for n, ids in by_count.items():
+        res = db.session.execute(
+            update(Session)
+            .where(Session.id.in_(ids), Session.spots_left >= n, Session.completed.is_(False))
+            .values(spots_left=Session.spots_left - n)
+            .execution_options(synchronize_session=False)
+        )
+        if res.rowcount != len(ids):
+            raise ReservationError('full')
+
+    tenant_ids = {s.id: s.tenant_id for s in sessions}
+    db.session.execute(insert(Reservation), [
+        {'tenant_id': tenant_ids[sid], 'member_id': m.id, 'user_name': m.full_name,
+         'session_id': sid, 'status': 'active'}
+        for sid, todo in plan.items() for m in todo
+    ])
+    return {sid: len(todo) for sid, todo in plan.items()}
+
+
+def cancel(reservation, new_status='canceled', commit=True, **extra):
+    """Aktif rezervasyonu iptal eder ve koltuğu geri verir. İptal edildiyse True."""
+    changed = _set_status(reservation.id, new_status, **extra)
+    if changed and not reservation.session.completed:
+        _release_seat(reservation.session_id)
+        bump_range(reservation.tenant_id, reservation.session.date, reservation.session.date)
+    if commit:
+        db.session.commit()
+    return changed
+
+
+def move(reservation, target_session_id):
+    """Rezervasyonu başka bir seansa taşır; hedefte koltuk atomik olarak alınır."""
+    tenant_id = reservation.tenant_id
+    target = Session.query.filter_by(id=target_session_id, tenant_id=tenant_id).first()
+    try:
+        _check_bookable(target)
+        if not _claim_seat(target.id):
+            raise ReservationError('full')
+        if not _set_status(reservation.id, 'moved'):
+            raise ReservationError('not_active')
+        _release_seat(reservation.session_id)
+        new_r = _insert_reservation(tenant_id, target.id, reservation.member_id, reservation.user_name)
+        bump_range(tenant_id, reservation.session.date, reservation.session.date)
+        db.session.commit()
+        return new_r
+    except Exception:
+        db.session.rollback()
+        raise
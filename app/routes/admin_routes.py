@@ -1,14 +1,24 @@
 import os
-import uuid
 import logging
 from datetime import date, datetime, timedelta
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, g
-from sqlalchemy import func, and_
+from flask import (Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, g,
+                   Response, stream_template, stream_with_context)
+from sqlalchemy import func, and_, or_, select
+from sqlalchemy.orm import joinedload
 
 # Modeller ve Eklentiler
-from app.models import db, Session, Reservation, Member, Measurement, Tenant
+from app.models import db, Session, Reservation, Member, Measurement, Tenant, RecurrenceMember, Attendance
 from app.decorators import admin_required
-from app.utils import auto_reserve
+from app.utils import auto_reserve, find_member
+from app import reservations
+from app.attendance import apply_attendance_deltas
+from app.stats import stats_cache
+from app.series import (create_rule, FREQUENCY_WEEKS, SeriesError, series_rule, rest_of_series, cancel_rest,
+                        shift_time, change_capacity, add_standing_member, remove_standing_member)
+from app.member_import import import_members, iter_rows, MemberImportError
+from app.exports import stream_export, EXPORTS, FORMATS as EXPORT_FORMATS
+from app.engine import lift_statement_deadline
+from app.pagination import session_keyset_page, decode_session_cursor, SessionKeysetStream
 
 # Blueprint Tanımı
 # Not: URL Prefix'i artık __init__.py içinde dinamik veriyoruz, burayı boş bırakıyoruz.
@@ -41,52 +51,72 @@ def logout():
 @admin_bp.route('/dashboard')
 @admin_required
 def dashboard():
-    # Sadece BU stüdyonun verilerini say
-    total_sessions = Session.query.filter_by(tenant_id=g.tenant.id).count()
-    
-    upcoming = Session.query.filter(
-        Session.tenant_id == g.tenant.id,
-        Session.date >= date.today()
-    ).count()
-    
-    active_res = Reservation.query.filter(
-        Reservation.tenant_id == g.tenant.id,
-        Reservation.status == 'active'
-    ).count()
-    
-    today = date.today()
-    
-    # Bugünün doluluk oranı (Sadece bu stüdyo için)
-    today_fill = (
-        db.session.query(func.sum(Session.capacity - Session.spots_left))
-        .filter(Session.tenant_id == g.tenant.id, Session.date == today)
-        .scalar() or 0
-    )
-    today_cap = (
-        db.session.query(func.sum(Session.capacity))
-        .filter(Session.tenant_id == g.tenant.id, Session.date == today)
-        .scalar() or 0
-    )
-    
-    pending_count = Reservation.query.filter(
-        Reservation.tenant_id == g.tenant.id,
-        Reservation.cancel_status == 'pending'
-    ).count()
-    
-    members = Member.query.filter_by(tenant_id=g.tenant.id).order_by(Member.full_name.asc()).all()
-    
-    return render_template('admin_dashboard.html',
-                           total_sessions=total_sessions,
-                           upcoming=upcoming,
-                           active_res=active_res,
-                           today_fill=today_fill,
-                           today_cap=today_cap,
-                           pending_count=pending_count,
-                           members=members)
+    # Sadece BU stüdyonun verileri; sayaçlar kısa süreli önbellekten gelir
+    stats = stats_cache.get(g.tenant.id)
+    # Üye listesi ölçüm panelinde sayfa sayfa yüklenir (admin.members_api)
+    return render_template('admin_dashboard.html', **stats)
+
+
+@admin_bp.route('/api/members')
+@admin_required
+def members_api():
+    """Üye listesi (JSON): ?q= arama, ?after= sayfalama imleci, ?limit=."""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    q = request.args.get('q', '').strip()
+    after = request.args.get('after', '')
+
+    query = Member.query.filter(Member.tenant_id == g.tenant.id)
+    if q:
+        query = query.filter(Member.name_key.contains(Member.name_key_for(q), autoescape=True))
+    if after:
+        query = query.filter(Member.name_key > after)
+    rows = query.order_by(Member.name_key.asc()).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return jsonify({
+        'items': [{'id': m.id, 'full_name': m.full_name} for m in rows],
+        'next': rows[-1].name_key if has_more else None,
+    })
 
 
 # --- 2. Seans Yönetimi (Ekleme / Listeleme) ---
 
+SESSIONS_PAGE_SIZE = 20
+
+# Liste kategorileri; her biri SQL tarafında completed / is_recurring ile süzülür
+SESSION_CATEGORIES = {
+    'planned': {'name': 'Planlandı', 'icon': '📅', 'bg': 'yellow-100', 'color': 'yellow-800', 'recurring': False},
+    'series': {'name': 'Haftalık Seri', 'icon': '🔄', 'bg': 'blue-100', 'color': 'blue-800', 'recurring': True},
+}
+
+
+def _category_query(tenant_id, key):
+    return Session.query.filter(
+        Session.tenant_id == tenant_id,
+        Session.completed.is_(False),
+        Session.is_recurring.is_(SESSION_CATEGORIES[key]['recurring']),
+    )
+
+
+def _session_category_counts(tenant_id):
+    """Toplam ve kategori bazında seans sayıları; tek GROUP BY sorgusu."""
+    counts = {'total': 0, **{key: 0 for key in SESSION_CATEGORIES}}
+    rows = (
+        db.session.query(Session.completed, Session.is_recurring, func.count(Session.id))
+        .filter(Session.tenant_id == tenant_id)
+        .group_by(Session.completed, Session.is_recurring)
+    )
+    for completed, recurring, n in rows:
+        counts['total'] += n
+        if completed:
+            continue
+        for key, meta in SESSION_CATEGORIES.items():
+            if meta['recurring'] == bool(recurring):
+                counts[key] += n
+    return counts
+
+
 @admin_bp.route('/sessions', methods=['GET', 'POST'])
 @admin_required
 def sessions():
@@ -106,11 +136,9 @@ def sessions():
 
         recurring = str(data.get('recurring', data.get('reserved_slot', 'false'))).lower() in ('true', '1', 'on')
         
-        repeat_weeks = int(data.get('repeat_weeks', 12))
-        repeat_pattern = data.get('repeat_pattern')
-        if repeat_pattern == 'weekly': repeat_weeks = 12
-        elif repeat_pattern == 'biweekly': repeat_weeks = 24
-        elif repeat_pattern == 'monthly': repeat_weeks = 48
+        # Seri artık bir kural: sıklık desenden gelir, bitiş verilmezse süresiz devam eder
+        frequency = data.get('repeat_pattern') if data.get('repeat_pattern') in FREQUENCY_WEEKS else 'weekly'
+        until = _parse_iso_date(data.get('until') or '')
 
         member_ids = []
         if is_ajax:
@@ -136,37 +164,28 @@ def sessions():
         except Exception:
             return jsonify(ok=False, error='BAD_DATETIME'), 400 if is_ajax else redirect(url_for('admin.sessions'))
 
-        created = 0
-        group_id = None
-        
+        if recurring and until is None and str(data.get('repeat_weeks', '')).isdigit():
+            # Eski API: sabit sayıda hafta istenirse kural o tarihte biter
+            until = (base_dt + timedelta(weeks=max(int(data['repeat_weeks']), 1) - 1)).date()
+        exceptions = []
+        if is_ajax:
+            exceptions = [d for d in map(_parse_iso_date, data.get('exceptions') or []) if d]
+
         # --- Kayıt İşlemi ---
         if recurring:
-            group_id = str(uuid.uuid4())
-            new_sessions = []
-            for i in range(repeat_weeks):
-                dt = base_dt + timedelta(weeks=i)
-                # Çakışma kontrolü (Sadece bu stüdyo için)
-                exists = Session.query.filter_by(tenant_id=g.tenant.id, date=dt.date(), time=dt.time()).first()
-                if exists: continue
-                
-                # YENİ: tenant_id=g.tenant.id EKLENDİ 👇
-                s = Session(tenant_id=g.tenant.id, date=dt.date(), time=dt.time(), capacity=capacity, 
-                            spots_left=capacity, notes=notes, is_recurring=True, recur_group_id=group_id)
-                db.session.add(s)
-                db.session.flush()
-                new_sessions.append(s)
-                created += 1
-            
-            db.session.commit()
-            
-            for s in new_sessions:
-                if member_ids:
-                    auto_reserve(s, member_ids)
-                    
+            result = create_rule(g.tenant.id, base_dt, frequency, capacity, notes, member_ids,
+                                 until=until, exceptions=exceptions)
+
             if is_ajax:
-                return jsonify(ok=True, mode='recurring', count=created, group_id=group_id), 201
+                return jsonify(ok=True, mode='recurring', count=result['created'], skipped=result['skipped'],
+                               reserved=result['reserved'], group_id=result['group_id'], rule_id=result['rule_id'],
+                               materialized_until=result['materialized_until'].isoformat()), 201
             else:
-                flash(f'{created} haftalık seans eklendi.', 'success')
+                msg = (f"Seri oluşturuldu: {result['materialized_until'].strftime('%d.%m.%Y')} tarihine kadar "
+                       f"{result['created']} seans açıldı, sonrası otomatik eklenecek.")
+                if result['skipped']:
+                    msg += f" {result['skipped']} hafta aynı saatte seans olduğu için atlandı."
+                flash(msg, 'success')
                 return redirect(url_for('admin.sessions'))
         else:
             # Tekil Seans
@@ -190,26 +209,40 @@ def sessions():
 
     # GET İsteği: Listeleme (Sadece bu stüdyonun verileri)
     members = Member.query.filter_by(tenant_id=g.tenant.id).order_by(Member.full_name.asc()).all()
-    all_sessions = Session.query.filter_by(tenant_id=g.tenant.id).order_by(Session.date.asc(), Session.time.asc()).all()
-    
-    categories = [
-        {
-            'name': 'Planlandı',
-            'icon': '📅',
-            'bg': 'yellow-100',
-            'color': 'yellow-800',
-            'items': [s for s in all_sessions if not s.completed and not s.is_recurring]
-        },
-        {
-            'name': 'Haftalık Seri',
-            'icon': '🔄',
-            'bg': 'blue-100',
-            'color': 'blue-800',
-            'items': [s for s in all_sessions if not s.completed and s.is_recurring]
-        }
-    ]
-    
-    return render_template('admin_sessions_simplified.html', sessions=all_sessions, members=members, categories=categories)
+    counts = _session_category_counts(g.tenant.id)
+
+    categories = []
+    for key, meta in SESSION_CATEGORIES.items():
+        items, next_cursor = session_keyset_page(_category_query(g.tenant.id, key), None, SESSIONS_PAGE_SIZE)
+        categories.append(dict(meta, key=key, items=items, count=counts[key], next=next_cursor))
+
+    return render_template('admin_sessions_simplified.html', total_sessions=counts['total'],
+                           members=members, categories=categories)
+
+
+@admin_bp.route('/sessions/page')
+@admin_required
+def sessions_page():
+    """Seans listesinin sonsuz kaydırma için JSON sayfası: ?category=, ?after=, ?limit=."""
+    key = request.args.get('category', '')
+    if key not in SESSION_CATEGORIES:
+        return jsonify(ok=False, error='BAD_CATEGORY'), 400
+    limit = min(max(request.args.get('limit', SESSIONS_PAGE_SIZE, type=int), 1), 100)
+    cursor = decode_session_cursor(request.args.get('after', ''))
+
+    items, next_cursor = session_keyset_page(_category_query(g.tenant.id, key), cursor, limit)
+    return jsonify({
+        'items': [{
+            'id': s.id,
+            'date': s.date.isoformat(),
+            'time': s.time.strftime('%H:%M'),
+            'capacity': s.capacity,
+            'spots_left': s.spots_left,
+            'notes': s.notes,
+        } for s in items],
+        'html': render_template('_session_items.html', items=items),
+        'next': next_cursor,
+    })
 
 
 @admin_bp.route('/sessions/<int:session_id>/delete', methods=['POST'])
@@ -222,13 +255,18 @@ def delete_session(session_id):
         flash('Geçmiş seans silinemez.', 'error')
         return redirect(url_for('admin.sessions'))
 
-    for r in s.reservations:
-        # Üyeyi bu stüdyoda ara
-        m = Member.query.filter(Member.tenant_id == g.tenant.id, func.lower(Member.full_name) == r.user_name.lower()).first()
-        if m and r.status == 'attended':
-            m.credits += 1
-        db.session.delete(r)
+    # Katılmış sayılan kayıtların kredilerini üye bazında tek seferde iade et
+    refunds = dict(
+        db.session.query(Reservation.member_id, func.count(Reservation.id))
+        .filter(Reservation.session_id == s.id, Reservation.status == 'attended', Reservation.member_id.isnot(None))
+        .group_by(Reservation.member_id)
+    )
+    if refunds:
+        for m in Member.query.filter(Member.tenant_id == g.tenant.id, Member.id.in_(refunds)):
+            m.credits += refunds[m.id]
+        apply_attendance_deltas({(g.tenant.id, mid, s.date): -n for mid, n in refunds.items()})
     
+    # Rezervasyonlar cascade ile silinir
     db.session.delete(s)
     db.session.commit()
     flash('Seans silindi.', 'success')
@@ -249,6 +287,100 @@ def sessions_calendar():
     return render_template('admin_calendar.html')
 
 
+# --- 2b. Seri İşlemleri ---
+
+SERIES_ERRORS = {
+    'not_found': 'Seri bulunamadı.',
+    'conflict': 'Yeni saatte zaten seans olan günler var',
+    'member_not_found': 'Üye bulunamadı.',
+    'bad_input': 'Geçersiz değer.',
+}
+
+SERIES_DONE = {
+    'cancel': '{sessions_deleted} seans ve {reservations_deleted} kayıt silindi, {credits_refunded} kredi iade edildi.',
+    'time': '{sessions_updated} seansın saati güncellendi.',
+    'capacity': '{sessions_updated} seansın kapasitesi güncellendi, {sessions_skipped} seans mevcut kayıtlar nedeniyle atlandı.',
+    'add_member': 'Üye {reservations_added} seansa eklendi.',
+    'remove_member': 'Üyenin {reservations_canceled} kaydı iptal edildi.',
+}
+
+
+@admin_bp.route('/series/<group_id>')
+@admin_required
+def series_detail(group_id):
+    rule = series_rule(g.tenant.id, group_id)
+    window = rest_of_series(g.tenant.id, group_id)
+    upcoming_count = db.session.query(func.count(Session.id)).filter(*window).scalar()
+    if rule is None and not upcoming_count:
+        flash(SERIES_ERRORS['not_found'], 'error')
+        return redirect(url_for('admin.sessions'))
+
+    upcoming = (
+        Session.query.filter(*window)
+        .order_by(Session.date.asc(), Session.time.asc())
+        .limit(SESSIONS_PAGE_SIZE)
+        .all()
+    )
+    standing = []
+    if rule is not None:
+        standing = (
+            Member.query.join(RecurrenceMember, RecurrenceMember.member_id == Member.id)
+            .filter(RecurrenceMember.rule_id == rule.id)
+            .order_by(RecurrenceMember.position.asc())
+            .all()
+        )
+    members = Member.query.filter_by(tenant_id=g.tenant.id).order_by(Member.full_name.asc()).all()
+    return render_template('admin_series.html', group_id=group_id, rule=rule, upcoming=upcoming,
+                           upcoming_count=upcoming_count, standing=standing, members=members)
+
+
+@admin_bp.route('/series/<group_id>/<action>', methods=['POST'])
+@admin_required
+def series_action(group_id, action):
+    """Serinin kalan seansları üzerinde toplu işlem: cancel, time, capacity, add_member, remove_member."""
+    if action not in SERIES_DONE:
+        return jsonify(ok=False, error='BAD_ACTION'), 404
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.is_json
+    data = (request.get_json(silent=True) or {}) if is_ajax else request.form
+
+    try:
+        if action == 'cancel':
+            result = cancel_rest(g.tenant.id, group_id)
+        elif action == 'time':
+            try:
+                new_time = datetime.strptime(str(data.get('time', '')), '%H:%M').time()
+            except ValueError:
+                raise SeriesError('bad_input')
+            result = shift_time(g.tenant.id, group_id, new_time)
+        elif action == 'capacity':
+            capacity = str(data.get('capacity', ''))
+            if not capacity.isdigit() or int(capacity) < 1:
+                raise SeriesError('bad_input')
+            result = change_capacity(g.tenant.id, group_id, int(capacity))
+        else:
+            member_id = str(data.get('member_id', ''))
+            if not member_id.isdigit():
+                raise SeriesError('bad_input')
+            op = add_standing_member if action == 'add_member' else remove_standing_member
+            result = op(g.tenant.id, group_id, int(member_id))
+    except SeriesError as e:
+        db.session.rollback()
+        if is_ajax:
+            return jsonify(ok=False, error=e.code.upper(), dates=[d.isoformat() for d in e.dates]), 400
+        msg = SERIES_ERRORS.get(e.code, 'İşlem yapılamadı.')
+        if e.dates:
+            msg += ': ' + ', '.join(d.strftime('%d.%m.%Y') for d in e.dates[:5])
+        flash(msg, 'error')
+        return redirect(url_for('admin.series_detail', group_id=group_id))
+
+    if is_ajax:
+        return jsonify(ok=True, action=action, **result)
+    flash(SERIES_DONE[action].format(**result), 'success')
+    if action == 'cancel':
+        return redirect(url_for('admin.sessions'))
+    return redirect(url_for('admin.series_detail', group_id=group_id))
+
+
 # --- 3. Üye Yönetimi ---
 
 @admin_bp.route('/members', methods=['GET', 'POST'])
@@ -264,10 +396,7 @@ def members():
         canon = Member.canonical(name)
         
         # Sadece BU stüdyoda bu isim var mı diye bakıyoruz
-        exists = Member.query.filter(
-            Member.tenant_id == g.tenant.id,
-            func.lower(Member.full_name) == canon.lower()
-        ).first()
+        exists = find_member(g.tenant.id, canon)
         
         if exists:
             flash('Bu isim bu stüdyoda zaten kayıtlı.', 'error')
@@ -285,12 +414,52 @@ def members():
     return render_template('admin_members.html', members=members_list)
 
 
+MEMBER_IMPORT_ERRORS = {
+    'bad_format': 'Sadece .csv ve .xlsx dosyaları yüklenebilir.',
+    'bad_encoding': 'Dosya UTF-8 olarak okunamadı.',
+    'bad_file': 'Dosya okunamadı.',
+    'xlsx_unavailable': 'XLSX desteği için sunucuda openpyxl kurulu olmalı; CSV olarak yükleyin.',
+}
+
+
+@admin_bp.route('/members/import', methods=['POST'])
+@admin_required
+def import_members_file():
+    """CSV/XLSX'ten toplu üye ekleme; satır bazında hata raporu döner."""
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        if is_ajax:
+            return jsonify(ok=False, error='NO_FILE'), 400
+        flash('Dosya seçilmedi.', 'error')
+        return redirect(url_for('admin.members'))
+
+    # Büyük dosyalar parça parça commit edilir; istek süresi sınırına takılmasın
+    lift_statement_deadline()
+    try:
+        report = import_members(g.tenant.id, iter_rows(upload.filename, upload.stream))
+    except MemberImportError as e:
+        db.session.rollback()
+        if is_ajax:
+            return jsonify(ok=False, error=e.code.upper()), 400
+        flash(MEMBER_IMPORT_ERRORS[e.code], 'error')
+        return redirect(url_for('admin.members'))
+
+    if is_ajax:
+        return jsonify(ok=True, **report)
+    flash(f"{report['created']} üye eklendi, {report['error_count']} satır atlandı.",
+          'success' if report['created'] else 'info')
+    members_list = Member.query.filter_by(tenant_id=g.tenant.id).order_by(Member.full_name.asc()).all()
+    return render_template('admin_members.html', members=members_list, import_report=report)
+
+
 @admin_bp.route('/members/<int:member_id>/delete', methods=['POST'])
 @admin_required
 def delete_member(member_id):
     m = Member.query.filter_by(id=member_id, tenant_id=g.tenant.id).first_or_404()
     
     Measurement.query.filter_by(member_id=member_id).delete()
+    Attendance.query.filter_by(member_id=member_id).delete()
     db.session.delete(m)
     db.session.commit()
     flash('Üye silindi.', 'success')
@@ -322,15 +491,17 @@ def cancel_reservation_refund(reservation_id):
         flash('Rezervasyon zaten iptal.', 'info')
         return redirect(url_for('admin.session_participants', session_id=r.session_id))
 
-    m = Member.query.filter(Member.tenant_id == g.tenant.id, func.lower(Member.full_name) == r.user_name.lower()).first()
+    m = Member.query.filter_by(id=r.member_id, tenant_id=g.tenant.id).first() if r.member_id else None
 
     if r.status == 'attended' and m:
         m.credits += 1
+        apply_attendance_deltas({(g.tenant.id, m.id, r.session.date): -1})
 
-    if r.status == 'active' and not r.session.completed:
-        r.session.spots_left += 1
-
-    r.status = 'canceled'
+    if r.status == 'active':
+        # Koltuk iadesi koşullu UPDATE ile (eşzamanlı iptallerde çift iade olmasın)
+        reservations.cancel(r, commit=False)
+    else:
+        r.status = 'canceled'
     db.session.commit()
     flash('Rezervasyon iptal edildi (Varsa iade yapıldı).', 'success')
     return redirect(url_for('admin.session_participants', session_id=r.session_id))
@@ -338,33 +509,114 @@ def cancel_reservation_refund(reservation_id):
 
 # --- 5. API Endpointleri (AJAX için) ---
 
+def _parse_iso_date(raw):
+    try:
+        return date.fromisoformat(raw) if raw else None
+    except ValueError:
+        return None
+
+
+RESERVATION_STATUS_TEXT = {
+    'active': 'Aktif',
+    'canceled': 'İptal',
+    'moved': 'Taşındı',
+    'attended': 'Katıldı',
+    'no_show': 'Gelmedi'
+}
+
+MAX_DETAIL_SESSIONS = 500
+
+
+def _session_details(sessions_):
+    """
+    Seans detaylarını toplu hazırlar: katılımcılar önceden eager yüklenmiş
+    olmalı, durum sayıları tek GROUP BY sorgusuyla gelir.
+    """
+    ids = [s.id for s in sessions_]
+    counts = {sid: {} for sid in ids}
+    if ids:
+        rows = (
+            db.session.query(Reservation.session_id, Reservation.status, func.count(Reservation.id))
+            .filter(Reservation.session_id.in_(ids))
+            .group_by(Reservation.session_id, Reservation.status)
+        )
+        for sid, status, n in rows:
+            counts[sid][status] = n
+
+    details = []
+    for s in sessions_:
+        c = counts[s.id]
+        attended = c.get('attended', 0)
+        details.append({
+            'id': s.id,
+            'start_at': datetime.combine(s.date, s.time).isoformat(),
+            'date': s.date.strftime('%d.%m.%Y'),
+            'time': s.time.strftime('%H:%M'),
+            'capacity': s.capacity,
+            # İptal/taşınmış kayıtlar koltuk tutmaz
+            'remaining': s.capacity - c.get('active', 0) - attended,
+            'status_counts': c,
+            'attendanceRate': round(attended * 100 / s.capacity) if s.capacity else 0,
+            'attendees': [
+                {'name': r.user_name, 'status': r.status,
+                 'status_text': RESERVATION_STATUS_TEXT.get(r.status, r.status)}
+                for r in sorted(s.reservations, key=lambda r: (r.created_at or datetime.min, r.id))
+            ],
+            'participants': [
+                f"{r.user_name} ({RESERVATION_STATUS_TEXT.get(r.status, r.status)})" for r in s.reservations
+            ],
+            'notes': s.notes or ''
+        })
+    return details
+
+
 @admin_bp.route('/api/session/<int:session_id>/details', methods=['GET'])
 @admin_required
 def get_session_details_api(session_id):
-    session_obj = Session.query.filter_by(id=session_id, tenant_id=g.tenant.id).first_or_404()
-    reservations = Reservation.query.filter(Reservation.session_id == session_id).all()
-
-    participants = []
-    for res in reservations:
-        status_text = {
-            'active': 'Aktif',
-            'canceled': 'İptal',
-            'moved': 'Taşındı',
-            'attended': 'Katıldı',
-            'no_show': 'Gelmedi'
-        }.get(res.status, res.status)
-        participants.append(f"{res.user_name} ({status_text})")
-
-    remaining = session_obj.capacity - len(reservations)
-    start_at = datetime.combine(session_obj.date, session_obj.time).isoformat()
+    session_obj = (
+        Session.query.options(joinedload(Session.reservations))
+        .filter_by(id=session_id, tenant_id=g.tenant.id)
+        .first_or_404()
+    )
+    return jsonify(_session_details([session_obj])[0])
 
-    return jsonify({
-        'start_at': start_at,
-        'capacity': session_obj.capacity,
-        'remaining': remaining,
-        'participants': participants,
-        'notes': session_obj.notes or ''
-    })
+
+@admin_bp.route('/api/sessions/details', methods=['GET'])
+@admin_required
+def get_sessions_details_api():
+    """
+    Çok sayıda seansın detayı tek istekte: ?ids=1,2,3 ya da ?date_from=&date_to=.
+    Katılımcılar tek (joined) sorguyla yüklenir; en fazla MAX_DETAIL_SESSIONS seans.
+    """
+    raw_ids = ','.join(request.args.getlist('ids'))
+    ids = {int(x) for x in raw_ids.split(',') if x.strip().isdigit()}
+    date_from = _parse_iso_date(request.args.get('date_from', ''))
+    date_to = _parse_iso_date(request.args.get('date_to', ''))
+    if not ids and not (date_from and date_to):
+        return jsonify(ok=False, error='BAD_PAYLOAD'), 400
+
+    query = Session.query.filter(Session.tenant_id == g.tenant.id)
+    if ids:
+        query = query.filter(Session.id.in_(list(ids)[:MAX_DETAIL_SESSIONS]))
+    else:
+        query = query.filter(Session.date >= date_from, Session.date <= date_to)
+
+    # LIMIT, joinedload ile birleşince rezervasyon satırlarını keseceği için önce id'ler seçilir
+    page = (
+        query.with_entities(Session.id)
+        .order_by(Session.date.asc(), Session.time.asc(), Session.id.asc())
+        .limit(MAX_DETAIL_SESSIONS + 1)
+        .subquery()
+    )
+    sessions_ = (
+        Session.query.options(joinedload(Session.reservations))
+        .filter(Session.id.in_(select(page.c.id)))
+        .order_by(Session.date.asc(), Session.time.asc(), Session.id.asc())
+        .all()
+    )
+    truncated = len(sessions_) > MAX_DETAIL_SESSIONS
+    sessions_ = sessions_[:MAX_DETAIL_SESSIONS]
+    return jsonify(ok=True, sessions=_session_details(sessions_), truncated=truncated)
 
 # --- 6. İptal İstekleri ve Diğerleri ---
 
@@ -378,14 +630,106 @@ def list_cancel_requests():
     return render_template('admin_cancel_requests.html', requests=pending_requests)
 
 
+COMPLETED_PAGE_SIZE = 50
+
+
+def _completed_session_criteria(tenant_id, args):
+    """Tamamlanan seans filtrelerini (tarih aralığı, metin) SQL koşullarına çevirir."""
+    criteria = [Session.tenant_id == tenant_id, Session.completed.is_(True)]
+    filters = {}
+
+    date_from = _parse_iso_date(args.get('date_from', ''))
+    date_to = _parse_iso_date(args.get('date_to', ''))
+    if date_from:
+        criteria.append(Session.date >= date_from)
+        filters['date_from'] = date_from.isoformat()
+    if date_to:
+        criteria.append(Session.date <= date_to)
+        filters['date_to'] = date_to.isoformat()
+
+    q = args.get('q', '').strip()
+    if q:
+        # Not metninde ya da katılımcı adında geçenler
+        by_member = (
+            select(Reservation.id)
+            .join(Member, Member.id == Reservation.member_id)
+            .where(Reservation.session_id == Session.id,
+                   Member.name_key.contains(Member.name_key_for(q), autoescape=True))
+            .exists()
+        )
+        criteria.append(or_(Session.notes.icontains(q, autoescape=True), by_member))
+        filters['q'] = q
+    return criteria, filters
+
+
+def _completed_summary(criteria):
+    """Filtrelenmiş geçmişin özet sayaçları (iki toplu sorgu)."""
+    total, capacity = db.session.query(
+        func.count(Session.id), func.coalesce(func.sum(Session.capacity), 0)
+    ).filter(*criteria).one()
+    attended = (
+        db.session.query(func.count(Reservation.id))
+        .join(Session, Session.id == Reservation.session_id)
+        .filter(Reservation.status == 'attended', *criteria)
+        .scalar()
+    )
+    return {
+        'total_completed': total,
+        'total_attendance': attended,
+        'completion_rate': round(attended * 100 / capacity) if capacity else 0,
+    }
+
+
 @admin_bp.route('/sessions/completed')
 @admin_required
 def completed_sessions():
-    sessions = Session.query.filter(
-        Session.tenant_id == g.tenant.id,
-        Session.completed == True
-    ).order_by(Session.date.desc(), Session.time.desc()).all()
-    return render_template('admin_completed_sessions.html', sessions=sessions)
+    criteria, filters = _completed_session_criteria(g.tenant.id, request.args)
+    limit = min(max(request.args.get('limit', COMPLETED_PAGE_SIZE, type=int), 1), 500)
+    cursor = decode_session_cursor(request.args.get('after', ''))
+
+    attended = (
+        select(func.count(Reservation.id))
+        .where(Reservation.session_id == Session.id, Reservation.status == 'attended')
+        .correlate(Session)
+        .scalar_subquery()
+    )
+    summary = _completed_summary(criteria)
+    # Satırlar şablon render edilirken parça parça okunur; uzun geçmişte bellek sabit kalır.
+    # Akış, istek süresi sınırından uzun sürebilir (özet sorguları sınır içinde kaldı)
+    lift_statement_deadline()
+    rows = SessionKeysetStream(
+        db.session.query(Session, attended.label('attended')).filter(*criteria),
+        cursor, limit, descending=True,
+    )
+    return Response(stream_with_context(stream_template(
+        'admin_completed_sessions.html',
+        rows=rows, filters=filters, is_first_page=cursor is None, **summary,
+    )))
+
+# --- 7b. Veri Dışa Aktarma ---
+
+@admin_bp.route('/export/<kind>')
+@admin_required
+def export_data(kind):
+    """Stüdyo verisini akış halinde indirir: ?format=csv|ndjson, ?date_from=, ?date_to=, ?gzip=1."""
+    fmt = request.args.get('format', 'csv')
+    if kind not in EXPORTS or fmt not in EXPORT_FORMATS:
+        return jsonify(ok=False, error='BAD_EXPORT'), 404
+    date_from = _parse_iso_date(request.args.get('date_from', ''))
+    date_to = _parse_iso_date(request.args.get('date_to', ''))
+    compress = request.args.get('gzip') == '1'
+    # Akış, istek süresi sınırından uzun sürebilir
+    lift_statement_deadline()
+
+    filename = f"{g.tenant.domain_prefix}_{kind}_{date.today().isoformat()}.{fmt}" + ('.gz' if compress else '')
+    body = stream_export(kind, g.tenant.id, fmt, date_from, date_to, compress)
+    resp = Response(stream_with_context(body), mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt])
+    resp.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    resp.headers['Cache-Control'] = 'no-store'
+    # Nginx vb. ters vekillerin yanıtı tamponlamaması için
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
 
 # --- 8. Ölçüm (Measurement) İşlemleri ---
 
@@ -463,15 +807,14 @@ def handle_cancel_request(req_id, action):
     r = Reservation.query.filter_by(id=req_id, tenant_id=g.tenant.id).first_or_404()
     
     if action == 'approve':
-        r.status = 'canceled'
-        r.cancel_status = 'approved'
-        r.session.spots_left += 1
-        
-        member = Member.query.filter(Member.tenant_id == g.tenant.id, func.lower(Member.full_name) == r.user_name.lower()).first()
-        if member:
-            member.credits += 1
-            
-        flash('İptal talebi onaylandı. Kredi iade edildi.', 'success')
+        if reservations.cancel(r, commit=False, cancel_status='approved'):
+            member = Member.query.filter_by(id=r.member_id, tenant_id=g.tenant.id).first() if r.member_id else None
+            if member:
+                member.credits += 1
+            flash('İptal talebi onaylandı. Kredi iade edildi.', 'success')
+        else:
+            r.cancel_status = 'approved'
+            flash('Rezervasyon zaten aktif değil, talep kapatıldı.', 'info')
         
     elif action == 'reject':
         r.cancel_status = 'rejected'
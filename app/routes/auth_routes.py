@@ -4,6 +4,7 @@ import json
 import base64
 from flask import Blueprint, render_template, redirect, url_for, flash, session, request, g
 from app.models import db, Member, Tenant
+from app.utils import find_member
 from clerk_backend_api import Clerk
 
 auth_bp = Blueprint('auth', __name__)
@@ -65,12 +66,8 @@ def clerk_sync():
         # Eğer bir stüdyo içindeysek (g.tenant doluysa)
         if g.tenant:
             # Üyeyi bul veya oluştur
-            member = Member.query.filter(
-                Member.tenant_id == g.tenant.id,
-                # Email ile eşleştirme yapıyoruz (daha sağlam)
-                # Not: Member modeline email alanı eklemeni öneririm, şimdilik full_name ile devam.
-                Member.full_name == full_name 
-            ).first()
+            # Not: Member modeline email alanı eklemeni öneririm, şimdilik full_name ile devam.
+            member = find_member(g.tenant.id, full_name)
 
             if not member:
                 # Yeni üye oluştur (Otomatik kayıt)
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from app.extensions import db
-from app.models import Tenant
+from app.models import Tenant, Reservation, Attendance, Measurement, Session, Member
+from app.tenant_cache import tenant_cache
 
 # BU SATIR EKSİK OLABİLİR 👇
 super_admin_bp = Blueprint('super_admin', __name__, url_prefix='/super-admin')
@@ -14,7 +15,8 @@ def dashboard():
     return render_template('super_admin/dashboard.html', 
                          studios=studios, 
                          total=total_studios, 
-                         active=active_studios)
+                         active=active_studios,
+                         cache_stats=tenant_cache.stats())
 
 @super_admin_bp.route('/add-studio', methods=['POST'])
 def add_studio():
@@ -30,6 +32,8 @@ def add_studio():
                 new_studio = Tenant(name=name, domain_prefix=prefix)
                 db.session.add(new_studio)
                 db.session.commit()
+                # Bu prefix daha önce "bulunamadı" olarak önbelleğe alınmış olabilir
+                tenant_cache.invalidate(prefix)
                 flash('Yeni stüdyo başarıyla oluşturuldu!', 'success')
             except Exception as e:
                 db.session.rollback()
@@ -44,8 +48,14 @@ def delete_studio(id):
     studio = Tenant.query.get_or_404(id)
     try:
         # Veritabanından sil
+        prefix = studio.domain_prefix
+        # Yabancı anahtarlar açık olduğundan stüdyonun kayıtları bağımlılık sırasıyla silinir
+        # (seri kuralları, kapatma sınırı ve takvim sürümleri veritabanında CASCADE ile gider)
+        for model in (Reservation, Attendance, Measurement, Session, Member):
+            model.query.filter_by(tenant_id=id).delete(synchronize_session=False)
         db.session.delete(studio)
         db.session.commit()
+        tenant_cache.invalidate(prefix)
         flash('Stüdyo başarıyla silindi.', 'success')
     except Exception as e:
         db.session.rollback()
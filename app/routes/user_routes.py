@@ -1,12 +1,19 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, g
+import hashlib
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, g, jsonify, make_response, abort
 from datetime import date, datetime, timedelta, time as dtime
 from sqlalchemy import func, and_
+from sqlalchemy.orm import contains_eager
 from collections import defaultdict
 
 # Modelleri ve Yardımcıları İmport Et
-from app.models import db, Member, Reservation, Session, Measurement
+from app.models import db, Member, Reservation, Session, Measurement, RecurrenceRule
 from app.decorators import login_required
-from app.utils import week_bounds, make_days, time_range, mark_user_joined
+from app.utils import week_bounds, make_days, time_range, mark_user_joined, week_sessions, find_member
+from app.calendar_versions import current_version, rules_version
+from app.series import planned_sessions, materialize_occurrence, lookahead_limit
+from app.attendance import daily_attendance
+from app import reservations
+from app.reservations import ReservationError
 
 user_bp = Blueprint('user', __name__)
 
@@ -21,31 +28,58 @@ def home():
     return redirect(url_for('auth.login'))
 # 👆👆👆 ---------------------------------------------------------- 👆👆👆
 
+# --- YARDIMCI FONKSİYON: Oturumdaki Üye ---
+def current_member():
+    """Oturumdaki kullanıcının bu stüdyodaki üye kaydı (istek boyunca önbellekte)."""
+    if 'current_member' not in g:
+        member = None
+        if session.get('user_id'):
+            member = Member.query.filter_by(id=session['user_id'], tenant_id=g.tenant.id).first()
+        if member is None:
+            # Eski oturumlarda sadece isim vardır
+            member = find_member(g.tenant.id, session.get('user_name'))
+        g.current_member = member
+    return g.current_member
+
+def current_member_id():
+    member = current_member()
+    return member.id if member else None
+
 # --- YARDIMCI FONKSİYON: Katılım Verisini Hazırla ---
-def build_attendance_weeks(member_id, num_weeks=20):
+def build_attendance_weeks(tenant_id, member_id, num_weeks=20):
     """
     Son 'num_weeks' hafta için (Pzt-Paz) katılım sayılarını hazırlar.
+    Pencere, özet tablodan ve aktif kayıtlardan birer sorguyla okunur; ızgara
+    bellekte doldurulur.
     """
-    weeks_data = []
     today = date.today()
     current_week_start = today - timedelta(days=today.weekday())
-    
+    window_start = current_week_start - timedelta(weeks=num_weeks - 1)
+    window_end = current_week_start + timedelta(days=7)
+
+    # Tamamlanan katılımlar özet tablodan, henüz kapanmamış kayıtlar rezervasyonlardan
+    counts = daily_attendance(tenant_id, member_id, window_start, window_end)
+    for day, n in (
+        db.session.query(Session.date, func.count(Reservation.id))
+        .join(Reservation, Reservation.session_id == Session.id)
+        .filter(
+            Reservation.tenant_id == tenant_id,
+            Reservation.member_id == member_id,
+            Reservation.status == 'active',
+            Session.date >= window_start,
+            Session.date < window_end,
+        )
+        .group_by(Session.date)
+    ):
+        counts[day] += n
+
+    weeks_data = []
     for i in range(num_weeks):
         w_start = current_week_start - timedelta(weeks=i)
         week_days = []
         for d in range(7): 
             day_date = w_start + timedelta(days=d)
-            count = (
-                db.session.query(Reservation)
-                .join(Session)
-                .filter(
-                    Reservation.user_name == session['user_name'],
-                    Reservation.status.in_(['attended', 'active']),
-                    Session.date == day_date
-                )
-                .count()
-            )
-            week_days.append({'date': day_date, 'count': count})
+            week_days.append({'date': day_date, 'count': counts.get(day_date, 0)})
         weeks_data.append(week_days)
     return weeks_data
 
@@ -54,16 +88,19 @@ def build_attendance_weeks(member_id, num_weeks=20):
 @login_required
 def user_dashboard():
     name = session['user_name']
+    member = current_member()
+    member_id = current_member_id()
     
     # Sadece BU stüdyonun (tenant) rezervasyonlarını getir
     my_active = (
         Reservation.query
+        .join(Session)
+        .options(contains_eager(Reservation.session))
         .filter(
-            Reservation.user_name == name,
+            Reservation.member_id == member_id,
             Reservation.status == 'active',
             Reservation.tenant_id == g.tenant.id # Çoklu stüdyo güvenliği
         )
-        .join(Session)
         .order_by(Session.date.asc(), Session.time.asc())
         .all()
     )
@@ -108,11 +145,6 @@ def user_dashboard():
 
     upcoming = Session.query.filter(Session.tenant_id == g.tenant.id, Session.date >= date.today()).order_by(Session.date.asc(), Session.time.asc()).all()
     
-    member = Member.query.filter(
-        Member.tenant_id == g.tenant.id,
-        func.lower(Member.full_name) == name.lower()
-    ).first()
-    
     credits_left = member.credits if member else 0
     
     first_day = date.today().replace(day=1)
@@ -122,15 +154,8 @@ def user_dashboard():
         next_month = first_day.replace(month=first_day.month+1, day=1)
     
     monthly_attended = (
-        db.session.query(Reservation)
-        .join(Session)
-        .filter(
-            Reservation.user_name == name,
-            Reservation.status == 'attended',
-            Reservation.tenant_id == g.tenant.id,
-            Session.date >= first_day,
-            Session.date < next_month
-        ).count()
+        sum(daily_attendance(g.tenant.id, member_id, first_day, next_month).values())
+        if member_id else 0
     )
 
     measurements = []
@@ -153,62 +178,60 @@ def user_dashboard():
 @user_bp.route('/profile')
 @login_required
 def profile():
-    name = session['user_name']
-    member = Member.query.filter(
-        Member.tenant_id == g.tenant.id,
-        func.lower(Member.full_name) == name.lower()
-    ).first()
+    member = current_member()
     
     measurements = []
     weeks = [] 
     
     if member:
         measurements = Measurement.query.filter_by(member_id=member.id).order_by(Measurement.date.desc()).all()
-        weeks = build_attendance_weeks(member.id, num_weeks=20)
+        num_weeks = request.args.get('weeks', 20, type=int)
+        weeks = build_attendance_weeks(g.tenant.id, member.id, num_weeks=min(max(num_weeks, 1), 52))
 
     return render_template('profile.html', member=member, measurements=measurements, weeks=weeks)
 
 # --- 3. Rezervasyon İşlemleri ---
 
+RESERVE_ERRORS = {
+    'past': ('Geçmiş/bitmiş seansa kayıt olunamaz.', 'error'),
+    'full': ('Bu seans dolu.', 'error'),
+    'no_credits': ('Seans hakkınız kalmamış.', 'error'),
+    'duplicate': ('Zaten bu seanstasınız.', 'info'),
+}
+
 @user_bp.route('/reserve/<int:session_id>', methods=['POST'])
 @login_required
 def reserve(session_id):
-    s = Session.query.filter_by(id=session_id, tenant_id=g.tenant.id).first_or_404()
-    
-    if s.completed or s.is_past:
-        flash('Geçmiş/bitmiş seansa kayıt olunamaz.', 'error')
-        return redirect(url_for('user.user_dashboard'))
-    if s.spots_left <= 0:
-        flash('Bu seans dolu.', 'error')
-        return redirect(url_for('user.user_dashboard'))
-
-    member = Member.query.filter(
-        Member.tenant_id == g.tenant.id,
-        func.lower(Member.full_name) == session['user_name'].lower()
-    ).first()
-    
-    if not member or member.credits <= 0:
-        flash('Seans hakkınız kalmamış.', 'error')
-        return redirect(url_for('user.user_dashboard'))
-
-    existing = Reservation.query.filter_by(user_name=session['user_name'], session_id=session_id, status='active').first()
-    if existing:
-        flash('Zaten bu seanstasınız.', 'info')
+    try:
+        reservations.reserve(g.tenant.id, session_id, current_member())
+    except ReservationError as e:
+        if e.code == 'not_found':
+            abort(404)
+        flash(*RESERVE_ERRORS[e.code])
         return redirect(url_for('user.user_dashboard'))
-
-    r = Reservation(tenant_id=g.tenant.id, user_name=session['user_name'], session_id=session_id, status='active')
-    db.session.add(r)
-    s.spots_left -= 1
-    db.session.commit()
     flash('Kayıt oluşturuldu ✅', 'success')
     return redirect(url_for('user.user_dashboard'))
 
+@user_bp.route('/reserve/rule/<int:rule_id>/<day>', methods=['POST'])
+@login_required
+def reserve_planned(rule_id, day):
+    """Kuraldan henüz açılmamış bir tekrara kayıt: tekrar önce Session olarak açılır."""
+    rule = RecurrenceRule.query.filter_by(id=rule_id, tenant_id=g.tenant.id, is_active=True).first_or_404()
+    try:
+        occurrence = materialize_occurrence(rule, date.fromisoformat(day))
+    except ValueError:
+        abort(404)
+    if occurrence is None:
+        abort(404)
+    return reserve(occurrence.id)
+
 @user_bp.route('/cancel/<int:reservation_id>', methods=['POST'])
 @login_required
 def cancel(reservation_id):
     r = Reservation.query.filter_by(id=reservation_id, tenant_id=g.tenant.id).first_or_404()
     
-    if r.user_name != session['user_name']:
+    member_id = current_member_id()
+    if member_id is None or r.member_id != member_id:
         flash('Yetkisiz işlem.', 'error')
         return redirect(url_for('user.user_dashboard'))
         
@@ -217,9 +240,9 @@ def cancel(reservation_id):
         flash('24 saatten az kaldığı için iptal edilemez. Hocanızla görüşün.', 'error')
         return redirect(url_for('user.user_dashboard'))
 
-    r.status = 'canceled'
-    r.session.spots_left += 1
-    db.session.commit()
+    if not reservations.cancel(r):
+        flash('Rezervasyon zaten iptal.', 'info')
+        return redirect(url_for('user.user_dashboard'))
     flash('Rezervasyon iptal edildi.', 'success')
     return redirect(url_for('user.user_dashboard'))
 
@@ -227,6 +250,11 @@ def cancel(reservation_id):
 @login_required
 def cancel_request(reservation_id):
     r = Reservation.query.filter_by(id=reservation_id, tenant_id=g.tenant.id).first_or_404()
+
+    member_id = current_member_id()
+    if member_id is None or r.member_id != member_id:
+        flash('Yetkisiz işlem.', 'error')
+        return redirect(url_for('user.user_dashboard'))
     
     # 24 Saat Kontrolü
     session_dt = datetime.combine(r.session.date, r.session.time)
@@ -253,28 +281,24 @@ def cancel_request(reservation_id):
 def move(reservation_id):
     r = Reservation.query.filter_by(id=reservation_id, tenant_id=g.tenant.id).first_or_404()
     
-    if r.user_name != session['user_name'] or r.status != 'active':
+    member_id = current_member_id()
+    if member_id is None or r.member_id != member_id or r.status != 'active':
         flash('İşlem yapılamadı.', 'error')
         return redirect(url_for('user.user_dashboard'))
 
     if request.method == 'POST':
         target_id = int(request.form.get('target_id'))
-        target = Session.query.filter_by(id=target_id, tenant_id=g.tenant.id).first_or_404()
-        
-        if target.is_past:
-            flash('Geçmiş seansa taşınamaz.', 'error')
+        try:
+            reservations.move(r, target_id)
+        except ReservationError as e:
+            if e.code == 'not_found':
+                abort(404)
+            flash({
+                'past': 'Geçmiş seansa taşınamaz.',
+                'full': 'Hedef seans dolu.',
+                'duplicate': 'Zaten bu seanstasınız.',
+            }.get(e.code, 'İşlem yapılamadı.'), 'error')
             return redirect(url_for('user.move', reservation_id=reservation_id))
-        if target.spots_left <= 0:
-            flash('Hedef seans dolu.', 'error')
-            return redirect(url_for('user.move', reservation_id=reservation_id))
-            
-        r.status = 'moved'
-        r.session.spots_left += 1
-        
-        new_r = Reservation(tenant_id=g.tenant.id, user_name=r.user_name, session_id=target.id, status='active')
-        db.session.add(new_r)
-        target.spots_left -= 1
-        db.session.commit()
         flash('Saat değiştirildi ✅', 'success')
         return redirect(url_for('user.user_dashboard'))
 
@@ -304,10 +328,9 @@ def calendar():
     except:
         anchor = datetime.now()
         
-    sessions = Session.query.filter_by(tenant_id=g.tenant.id).order_by(Session.date.asc(), Session.time.asc()).all()
-    
-    week_start, _ = week_bounds(anchor)
-    mark_user_joined(sessions, session.get("user_name"))
+    week_start, week_end = week_bounds(anchor)
+    sessions = _with_planned(week_sessions(g.tenant.id, week_start, week_end),
+                             _planned_week(week_start, week_end))
     by_cell = defaultdict(list)
     for s in sessions:
         by_cell[(s.date.isoformat(), s.time.strftime('%H:%M'))].append(s)
@@ -321,23 +344,101 @@ def calendar():
     
     return render_template("sessions_calendar.html", days=days, slots=slots, by_cell=by_cell, week_label=week_label, prev_week=prev_week, next_week=next_week, role=role)
 
+def _planned_week(week_start, week_end):
+    """Haftaya düşen, kurallardan henüz açılmamış tekrarlar (sadece gösterim için)."""
+    return planned_sessions(g.tenant.id, week_start.date(), week_end.date(), current_member_id())
+
+def _with_planned(sessions, planned):
+    """Gerçek seanslara kullanıcının kayıt işaretini koyar ve aynı saatte seansı
+    olmayan planlı tekrarları ekler."""
+    mark_user_joined(sessions, current_member_id())
+    taken = {(s.date, s.time) for s in sessions}
+    merged = sessions + [p for p in planned if (p.date, p.time) not in taken]
+    return sorted(merged, key=lambda s: (s.date, s.time))
+
+def _parse_week_anchor(value):
+    try:
+        return datetime.fromisoformat(value) if value else datetime.now()
+    except ValueError:
+        return datetime.now()
+
+def _calendar_etag(week_start, week_end, role):
+    """Stüdyo-hafta sürümü + kural sürümü + kullanıcıya göre değişen kısımlardan ETag üretir.
+    Sadece birincil anahtar okumaları yapar; planlı tekrarlar 304 kontrolünden sonra üretilir."""
+    version = current_version(g.tenant.id, week_start.date())
+    # Kural değişiklikleri açılmamış haftaların sürümünü artırmaz; kural sürümü ayrıca katılır.
+    # Gösterilen son gün (lookahead) her gün kaydığından haftaya düşüyorsa o da katılır.
+    rules = rules_version(g.tenant.id)
+    shown_until = min(max(week_start.date(), lookahead_limit() + timedelta(days=1)), week_end.date())
+    viewer = hashlib.sha1(f"{session.get('user_name', '')}|{role}".encode()).hexdigest()[:10]
+    return f"{g.tenant.id}-{week_start.date().isoformat()}-{version}.{rules}.{shown_until:%m%d}-{viewer}"
+
+def _not_modified(etag):
+    resp = make_response('', 304)
+    resp.set_etag(etag, weak=True)
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
+
+def _with_etag(resp, etag):
+    resp = make_response(resp)
+    resp.set_etag(etag, weak=True)
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
+
 @user_bp.route('/calendar/grid')
 def calendar_grid():
-    week_start_str = request.args.get('week_start')
-    try:
-        anchor = datetime.fromisoformat(week_start_str) if week_start_str else datetime.now()
-    except:
-        anchor = datetime.now()
-        
-    sessions = Session.query.filter_by(tenant_id=g.tenant.id).order_by(Session.date.asc(), Session.time.asc()).all()
-    
-    week_start, _ = week_bounds(anchor)
-    mark_user_joined(sessions, session.get("user_name"))
+    week_start, week_end = week_bounds(_parse_week_anchor(request.args.get('week_start')))
+    role = 'admin' if session.get('is_admin') else 'member'
+
+    etag = _calendar_etag(week_start, week_end, role)
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+
+    # Kurallardan henüz açılmamış tekrarlar bellekte üretilir (okuma yolunda yazma yok)
+    sessions = _with_planned(week_sessions(g.tenant.id, week_start, week_end),
+                             _planned_week(week_start, week_end))
     by_cell = defaultdict(list)
     for s in sessions:
         by_cell[(s.date.isoformat(), s.time.strftime('%H:%M'))].append(s)
     days = make_days(week_start)
     slots = time_range(start_h=8, end_h=22, step_min=60)
-    role = 'admin' if session.get('is_admin') else 'member'
     
-    return render_template('_calendar_grid.html', days=days, slots=slots, by_cell=by_cell, role=role)
\ No newline at end of file
+    html = render_template('_calendar_grid.html', days=days, slots=slots, by_cell=by_cell, role=role)
+    return _with_etag(html, etag)
+
+@user_bp.route('/calendar/week.json')
+def calendar_week_api():
+    """Haftalık takvim verisi (JSON). Hafta değişmediyse 304 döner."""
+    week_start, week_end = week_bounds(_parse_week_anchor(request.args.get('week_start')))
+    role = 'admin' if session.get('is_admin') else 'member'
+
+    etag = _calendar_etag(week_start, week_end, role)
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+
+    # Kurallardan henüz açılmamış tekrarlar bellekte üretilir (okuma yolunda yazma yok)
+    sessions = _with_planned(week_sessions(g.tenant.id, week_start, week_end),
+                             _planned_week(week_start, week_end))
+    payload = {
+        'week_start': week_start.date().isoformat(),
+        'week_end': week_end.date().isoformat(),
+        'prev_week': (week_start - timedelta(days=7)).date().isoformat(),
+        'next_week': (week_start + timedelta(days=7)).date().isoformat(),
+        'role': role,
+        'sessions': [
+            {
+                'id': s.id,
+                'rule_id': getattr(s, 'rule_id', None),
+                'date': s.date.isoformat(),
+                'time': s.time.strftime('%H:%M'),
+                'capacity': s.capacity,
+                'spots_left': s.spots_left,
+                'completed': s.completed,
+                'is_recurring': s.is_recurring,
+                'notes': s.notes or '',
+                'user_joined': s.user_joined,
+            }
+            for s in sessions
+        ],
+    }
+    return _with_etag(jsonify(payload), etag)
@@ -0,0 +1,178 @@
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import JobLease
+from app.utils import close_past_sessions_logic
+from app.series import extend_horizons
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """
+    İstek akışının dışında periyodik çalışan arka plan işlerinin ortak iskeleti.
+    Uygulama içinde thread olarak ya da ilgili `flask ... --watch` komutuyla
+    ayrı bir süreç olarak çalıştırılabilir. Alt sınıflar `work()` yazar.
+
+    Birden çok worker/süreç aynı işi başlatsa da her çalışma önce
+    veritabanındaki kira kaydını (JobLease) almaya çalışır; kira başkasındaysa
+    o tur atlanır.
+    """
+
+    name = 'job'
+    interval_key = None  # app.config'ten okunacak aralık anahtarı
+    lease_seconds = 300  # Süreç çökerse kira en geç bu kadar sonra serbest kalır
+
+    def __init__(self, interval=60):
+        self.interval = interval
+        self.last_run = None
+        self.totals = {'runs': 0}
+        self._app = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._holder = f"{socket.gethostname()}:{os.getpid()}"
+
+    def init_app(self, app):
+        self._app = app
+        if self.interval_key:
+            self.interval = app.config[self.interval_key]
+
+    def work(self, **kwargs):
+        raise NotImplementedError
+
+    def _acquire_lease(self):
+        """Kirayı alır ya da uzatır; başka bir süreçte geçerli kira varsa False döner."""
+        now = datetime.utcnow()
+        table = JobLease.__table__
+        values = {'holder': self._holder, 'expires_at': now + timedelta(seconds=self.lease_seconds)}
+        acquired = db.session.execute(
+            update(table)
+            .where(table.c.name == self.name, or_(table.c.expires_at < now, table.c.holder == self._holder))
+            .values(**values)
+        ).rowcount
+        if not acquired:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(table).values(name=self.name, **values))
+            except IntegrityError:
+                db.session.rollback()
+                return False
+        db.session.commit()
+        return True
+
+    def _release_lease(self):
+        table = JobLease.__table__
+        db.session.execute(
+            update(table)
+            .where(table.c.name == self.name, table.c.holder == self._holder)
+            .values(expires_at=datetime.utcnow())
+        )
+        db.session.commit()
+
+    def run_once(self, **kwargs):
+        """
+        İşi bir kez çalıştırır ve bu çalışmanın metriklerini döndürür. Kira
+        başka bir süreçteyse çalışmaz ve {'skipped': 'lease_held'} döner.
+        """
+        with self._run_lock, self._app.app_context():
+            started = time.perf_counter()
+            try:
+                if not self._acquire_lease():
+                    logger.debug("%s kirası başka süreçte, tur atlandı", self.name)
+                    return {'skipped': 'lease_held'}
+                try:
+                    result = self.work(**kwargs)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("%s çalışması başarısız oldu", self.name)
+                    raise
+                finally:
+                    self._release_lease()
+            finally:
+                db.session.remove()
+            result['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+        self.last_run = result
+        self.totals['runs'] += 1
+        for key, value in result.items():
+            if key != 'duration_ms' and isinstance(value, (int, float)):
+                self.totals[key] = self.totals.get(key, 0) + value
+        logger.info("%s %s", self.name, " ".join(f"{k}={v}" for k, v in result.items()))
+        return result
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                pass  # Hata loglandı, bir sonraki turda tekrar denenir
+            self._stop.wait(self.interval)
+
+    def ensure_started(self):
+        """Arka plan thread'ini (henüz başlamadıysa) başlatır."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run_forever, name=self.name.replace('_', '-'), daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+class SessionCloser(PeriodicJob):
+    """Geçmiş seansları kapatıp kredileri düşen zamanlayıcı."""
+
+    name = 'session_closer'
+    interval_key = 'SESSION_CLOSER_INTERVAL'
+
+    def __init__(self, interval=60):
+        super().__init__(interval)
+        self.totals.update(sessions_closed=0, credits_debited=0)
+
+    def work(self, full=False):
+        return close_past_sessions_logic(full=full)
+
+
+class RecurrenceExtender(PeriodicJob):
+    """Tekrarlama kurallarının kayan ufkunu ileri taşıyan zamanlayıcı."""
+
+    name = 'recurrence_extender'
+    interval_key = 'RECURRENCE_EXTEND_INTERVAL'
+
+    def work(self):
+        return extend_horizons()
+
+
+class SqliteMaintenance(PeriodicJob):
+    """WAL dosyasını checkpoint edip küçülten ve sorgu planlayıcı istatistiklerini
+    tazeleyen (PRAGMA optimize) SQLite bakım işi."""
+
+    name = 'sqlite_maintenance'
+    interval_key = 'SQLITE_MAINTENANCE_INTERVAL'
+
+    def work(self):
+        mode = self._app.config['SQLITE_CHECKPOINT_MODE']
+        with db.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+            busy, wal_pages, checkpointed = conn.exec_driver_sql(f'PRAGMA wal_checkpoint({mode})').one()
+            conn.exec_driver_sql('PRAGMA optimize')
+        # busy=1: okuyucular yüzünden checkpoint tamamlanamadı, sonraki turda devam edilir
+        return {'busy': busy, 'wal_pages': wal_pages, 'checkpointed': checkpointed}
+
+
+session_closer = SessionCloser()
+recurrence_extender = RecurrenceExtender(interval=3600)
+sqlite_maintenance = SqliteMaintenance(interval=600)
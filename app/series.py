@@ -0,0 +1,413 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert, select, update, delete, or_, func, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+
+from app.extensions import db
+from app.models import Session, Reservation, Member, RecurrenceRule, RecurrenceMember, RecurrenceException
+from app.calendar_versions import bump_range, bump_rules
+from app.attendance import attendance_deltas, apply_attendance_deltas
+from app.utils import auto_reserve, _session_not_before, rewind_close_watermark
+
+# Kural sıklığı -> tekrarlar arası hafta (aylık: 4 haftada bir, aynı gün)
+FREQUENCY_WEEKS = {'weekly': 1, 'biweekly': 2, 'monthly': 4}
+
+
+def _insert_occurrences(tenant_id, group_id, datetimes, capacity, notes, member_ids):
+    """
+    Verilen tarih/saatler için tek çakışma sorgusu, seanslar için toplu INSERT
+    ve ön atamalar için auto_reserve çalıştırır. Commit etmez.
+    """
+    taken = set()
+    if datetimes:
+        taken = set(
+            db.session.execute(
+                select(Session.date, Session.time).where(
+                    Session.tenant_id == tenant_id,
+                    Session.time.in_({dt.time() for dt in datetimes}),
+                    Session.date.in_([dt.date() for dt in datetimes]),
+                )
+            ).all()
+        )
+    slots = [dt for dt in datetimes if (dt.date(), dt.time()) not in taken]
+    result = {'created': len(slots), 'skipped': len(datetimes) - len(slots), 'reserved': 0}
+    if not slots:
+        return result
+
+    db.session.execute(insert(Session), [
+        {'tenant_id': tenant_id, 'date': dt.date(), 'time': dt.time(), 'capacity': capacity,
+         'spots_left': capacity, 'notes': notes, 'is_recurring': True, 'recur_group_id': group_id}
+        for dt in slots
+    ])
+    if member_ids:
+        new_sessions = Session.query.filter(
+            Session.tenant_id == tenant_id,
+            Session.recur_group_id == group_id,
+            Session.date.in_([dt.date() for dt in slots]),
+        ).all()
+        result['reserved'] = auto_reserve(new_sessions, member_ids, commit=False)
+
+    # Core INSERT'ler ORM flush dinleyicilerine görünmez; takvim sürümleri ve
+    # (başlangıcı geçmişte kalan kurallar için) kapatma sınırı elle güncellenir
+    bump_range(tenant_id, slots[0].date(), slots[-1].date())
+    rewind_close_watermark(db.session.connection(), tenant_id, min(slots))
+    return result
+
+
+# --- Kural tabanlı seriler ---
+
+def horizon_end(today=None):
+    """Kuralların önceden Session olarak açıldığı kayan ufkun son günü."""
+    today = today or date.today()
+    return today + timedelta(days=current_app.config['RECURRENCE_HORIZON_DAYS'])
+
+
+def occurrence_dates(rule, start, end, skip=()):
+    """Kuralın [start, end] aralığına düşen (istisnalar hariç) tekrar tarihleri."""
+    step = timedelta(weeks=FREQUENCY_WEEKS[rule.frequency])
+    if start <= rule.start_date:
+        d = rule.start_date
+    else:
+        d = rule.start_date + step * -(-(start - rule.start_date).days // step.days)
+    last = min(end, rule.until) if rule.until else end
+    while d <= last:
+        if d not in skip:
+            yield d
+        d += step
+
+
+def _pending_rules(end):
+    return RecurrenceRule.query.filter(
+        RecurrenceRule.is_active.is_(True),
+        RecurrenceRule.materialized_until < end,
+        or_(RecurrenceRule.until.is_(None), RecurrenceRule.materialized_until < RecurrenceRule.until),
+    )
+
+
+def _materialize(rule, end):
+    """Kuralın ufkunu `end` tarihine kadar somut seanslara açar. Commit etmez."""
+    start = rule.materialized_until + timedelta(days=1)
+    skip = {e.date for e in rule.exceptions}
+    dates = list(occurrence_dates(rule, start, end, skip))
+    member_ids = [rm.member_id for rm in sorted(rule.members, key=lambda rm: rm.position)]
+    result = _insert_occurrences(
+        rule.tenant_id, rule.group_id, [datetime.combine(d, rule.time) for d in dates],
+        rule.capacity, rule.notes, member_ids,
+    )
+    rule.materialized_until = max(rule.materialized_until, min(end, rule.until) if rule.until else end)
+    return result
+
+
+def create_rule(tenant_id, base_dt: datetime, frequency, capacity, notes='', member_ids=(),
+                until=None, exceptions=()):
+    """
+    Tekrarlama kuralı oluşturur ve sadece ufuk içindeki tekrarları Session
+    olarak açar; sonrası arka plan işiyle (ya da o tekrara kayıt olunurken) açılır.
+    """
+    rule = RecurrenceRule(
+        tenant_id=tenant_id, group_id=str(uuid.uuid4()), frequency=frequency,
+        start_date=base_dt.date(), time=base_dt.time(), until=until, capacity=capacity, notes=notes,
+        materialized_until=base_dt.date() - timedelta(days=1),
+    )
+    if member_ids:
+        valid = set(db.session.scalars(
+            select(Member.id).where(Member.tenant_id == tenant_id, Member.id.in_(member_ids))
+        ))
+        rule.members = [
+            RecurrenceMember(member_id=mid, position=i)
+            for i, mid in enumerate(mid for mid in dict.fromkeys(member_ids) if mid in valid)
+        ]
+    rule.exceptions = [RecurrenceException(date=d) for d in set(exceptions)]
+    db.session.add(rule)
+    db.session.flush()
+
+    result = _materialize(rule, horizon_end())
+    db.session.commit()
+    result.update(rule_id=rule.id, group_id=rule.group_id, materialized_until=rule.materialized_until)
+    return result
+
+
+def extend_horizons(tenant_id=None, until=None):
+    """Aktif kuralların ufkunu `until` (varsayılan: kayan ufuk) tarihine uzatır; tek commit."""
+    until = until or horizon_end()
+    query = _pending_rules(until).options(
+        selectinload(RecurrenceRule.members), selectinload(RecurrenceRule.exceptions)
+    )
+    if tenant_id is not None:
+        query = query.filter(RecurrenceRule.tenant_id == tenant_id)
+
+    totals = {'rules': 0, 'sessions_created': 0, 'skipped': 0, 'reserved': 0}
+    for rule in query.all():
+        result = _materialize(rule, until)
+        totals['rules'] += 1
+        totals['sessions_created'] += result['created']
+        totals['skipped'] += result['skipped']
+        totals['reserved'] += result['reserved']
+    db.session.commit()
+    return totals
+
+
+class PlannedSession:
+    """
+    Kuralın henüz Session olarak açılmamış bir tekrarının takvimdeki hali.
+    Veritabanında satırı yoktur (id None); kayıt olunurken açılır.
+    """
+
+    id = None
+    completed = False
+    is_recurring = True
+
+    def __init__(self, rule, day, member_id=None):
+        standing = [rm.member_id for rm in rule.members]
+        self.rule_id = rule.id
+        self.date = day
+        self.time = rule.time
+        self.capacity = rule.capacity
+        # Sabit üyeler açılışta otomatik eklenecek
+        self.spots_left = max(rule.capacity - len(standing), 0)
+        self.notes = rule.notes
+        self.user_joined = member_id is not None and member_id in standing
+
+
+def lookahead_limit():
+    """Takvimde kurallardan tekrar gösterilen/açılan en ileri gün."""
+    return date.today() + timedelta(days=current_app.config['RECURRENCE_MAX_LOOKAHEAD_DAYS'])
+
+
+def planned_sessions(tenant_id, start, end, member_id=None):
+    """
+    Stüdyo kurallarının [start, end) aralığına düşen ama henüz Session olarak
+    açılmamış tekrarlarını bellekte üretir (veritabanına yazmaz). Ufkun
+    içindeki haftalarda tek bir indeksli sorgudan ibarettir.
+    """
+    last = min(end - timedelta(days=1), lookahead_limit())
+    if last < start:
+        return []
+    rules = _pending_rules(last).filter(RecurrenceRule.tenant_id == tenant_id).options(
+        selectinload(RecurrenceRule.members), selectinload(RecurrenceRule.exceptions)
+    ).all()
+    planned = []
+    for rule in rules:
+        first = max(start, rule.materialized_until + timedelta(days=1))
+        skip = {e.date for e in rule.exceptions}
+        planned += [PlannedSession(rule, d, member_id) for d in occurrence_dates(rule, first, last, skip)]
+    return planned
+
+
+def materialize_occurrence(rule, day):
+    """
+    Kuralın `day` tarihli tekrarını (henüz açılmadıysa) kural ufkunu o güne
+    uzatarak açar ve Session'ı döndürür. Tarih kuralın bir tekrarı değilse ya
+    da aynı saatte başka seans varsa None döner. Eşzamanlı açılışta tekil
+    indeks çakışması yakalanır ve diğerinin açtığı seans kullanılır.
+    """
+    skip = {e.date for e in rule.exceptions}
+    if day > lookahead_limit() or not list(occurrence_dates(rule, day, day, skip)):
+        return None
+    if day > rule.materialized_until:
+        try:
+            _materialize(rule, day)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+    return Session.query.filter_by(tenant_id=rule.tenant_id, recur_group_id=rule.group_id, date=day).first()
+
+
+# --- Seri bazlı toplu işlemler ---
+
+class SeriesError(Exception):
+    """Seri işlemi yapılamadığında fırlatılır; `code` route'larda mesaja çevrilir."""
+
+    def __init__(self, code, dates=()):
+        super().__init__(code)
+        self.code = code
+        self.dates = list(dates)
+
+
+def series_rule(tenant_id, group_id):
+    """Serinin kuralı; kural öncesi oluşturulmuş eski serilerde None."""
+    return RecurrenceRule.query.filter_by(tenant_id=tenant_id, group_id=group_id).first()
+
+
+def rest_of_series(tenant_id, group_id, moment=None):
+    """Serinin henüz başlamamış ve kapanmamış seanslarını seçen koşullar."""
+    return [
+        Session.tenant_id == tenant_id,
+        Session.recur_group_id == group_id,
+        Session.completed.is_(False),
+        _session_not_before(moment or datetime.now()),
+    ]
+
+
+def _window_bounds(window):
+    return db.session.execute(
+        select(func.count(Session.id), func.min(Session.date), func.max(Session.date)).where(*window)
+    ).one()
+
+
+def cancel_rest(tenant_id, group_id, moment=None):
+    """
+    Serinin kalan seanslarını ve kayıtlarını siler, kuralı durdurur. Katılmış
+    sayılan kayıt varsa krediler üye bazında tek executemany ile iade edilir.
+    """
+    window = rest_of_series(tenant_id, group_id, moment)
+    session_ids = select(Session.id).where(*window)
+    count, first, last = _window_bounds(window)
+    result = {'sessions_deleted': 0, 'reservations_deleted': 0, 'credits_refunded': 0}
+
+    if count:
+        refunds = db.session.execute(
+            select(Reservation.member_id, func.count(Reservation.id))
+            .where(Reservation.session_id.in_(session_ids), Reservation.status == 'attended',
+                   Reservation.member_id.isnot(None))
+            .group_by(Reservation.member_id)
+        ).all()
+        if refunds:
+            members = Member.__table__
+            db.session.execute(
+                update(members).where(members.c.id == bindparam('mid'))
+                .values(credits=members.c.credits + bindparam('n')),
+                [{'mid': mid, 'n': n} for mid, n in refunds],
+            )
+            apply_attendance_deltas(attendance_deltas(
+                Reservation.session_id.in_(session_ids), Reservation.status == 'attended', sign=-1
+            ))
+            result['credits_refunded'] = sum(n for _, n in refunds)
+
+        result['reservations_deleted'] = db.session.execute(
+            delete(Reservation).where(Reservation.session_id.in_(session_ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        result['sessions_deleted'] = db.session.execute(
+            delete(Session).where(*window).execution_options(synchronize_session=False)
+        ).rowcount
+        bump_range(tenant_id, first, last)
+
+    rule = series_rule(tenant_id, group_id)
+    if rule is not None:
+        rule.is_active = False
+    if not count and rule is None:
+        raise SeriesError('not_found')
+    db.session.commit()
+    return result
+
+
+def shift_time(tenant_id, group_id, new_time, moment=None):
+    """Kalan seansların saatini topluca değiştirir; çakışma varsa hiçbirine dokunmaz."""
+    window = rest_of_series(tenant_id, group_id, moment)
+    count, first, last = _window_bounds(window)
+    conflicts = db.session.scalars(
+        select(Session.date).where(
+            Session.tenant_id == tenant_id,
+            Session.time == new_time,
+            or_(Session.recur_group_id.is_(None), Session.recur_group_id != group_id),
+            Session.date.in_(select(Session.date).where(*window)),
+        )
+    ).all()
+    if conflicts:
+        raise SeriesError('conflict', conflicts)
+
+    updated = 0
+    if count:
+        updated = db.session.execute(
+            update(Session).where(*window).values(time=new_time)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        bump_range(tenant_id, first, last)
+        # Bugünkü seans daha erkene alınırsa geçmişe düşebilir; kapatma sınırı geri çekilir
+        rewind_close_watermark(db.session.connection(), tenant_id, datetime.combine(first, new_time))
+    rule = series_rule(tenant_id, group_id)
+    if rule is not None:
+        rule.time = new_time
+    elif not count:
+        raise SeriesError('not_found')
+    db.session.commit()
+    return {'sessions_updated': updated}
+
+
+def change_capacity(tenant_id, group_id, capacity, moment=None):
+    """
+    Kalan seansların kapasitesini değiştirir; spots_left dolu koltuk sayısı
+    korunarak tek UPDATE ile hesaplanır. Mevcut kaydı yeni kapasiteyi aşan
+    seanslar olduğu gibi bırakılır ve `sessions_skipped` olarak raporlanır.
+    """
+    window = rest_of_series(tenant_id, group_id, moment)
+    count, first, last = _window_bounds(window)
+    booked = Session.capacity - Session.spots_left
+    updated = 0
+    if count:
+        updated = db.session.execute(
+            update(Session).where(*window, booked <= capacity)
+            .values(capacity=capacity, spots_left=capacity - booked)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        bump_range(tenant_id, first, last)
+    rule = series_rule(tenant_id, group_id)
+    if rule is not None:
+        rule.capacity = capacity
+    elif not count:
+        raise SeriesError('not_found')
+    db.session.commit()
+    return {'sessions_updated': updated, 'sessions_skipped': count - updated}
+
+
+def add_standing_member(tenant_id, group_id, member_id, moment=None):
+    """Üyeyi serinin sabit üyesi yapar ve kalan seanslara (yer oldukça) ekler."""
+    member = Member.query.filter_by(id=member_id, tenant_id=tenant_id).first()
+    if member is None:
+        raise SeriesError('member_not_found')
+    rule = series_rule(tenant_id, group_id)
+    if rule is not None and not any(rm.member_id == member_id for rm in rule.members):
+        position = max((rm.position for rm in rule.members), default=-1) + 1
+        rule.members.append(RecurrenceMember(member_id=member_id, position=position))
+
+    sessions_ = Session.query.filter(*rest_of_series(tenant_id, group_id, moment)).all()
+    if not sessions_ and rule is None:
+        raise SeriesError('not_found')
+    reserved = auto_reserve(sessions_, [member_id], commit=False)
+    db.session.commit()
+    return {'sessions': len(sessions_), 'reservations_added': reserved}
+
+
+def remove_standing_member(tenant_id, group_id, member_id, moment=None):
+    """
+    Üyeyi sabit üyelikten çıkarır; kalan seanslardaki aktif kayıtlarını iptal
+    edip koltukları geri verir. Aktif kayıtlardan kredi düşülmediği için iade yoktur.
+    """
+    window = rest_of_series(tenant_id, group_id, moment)
+    rule = series_rule(tenant_id, group_id)
+    if rule is not None:
+        RecurrenceMember.query.filter_by(rule_id=rule.id, member_id=member_id).delete()
+        # Toplu DELETE flush dinleyicisine görünmez; planlı tekrarlar elle eskitilir
+        bump_rules(db.session.connection(), [tenant_id])
+
+    rows = db.session.execute(
+        select(Reservation.session_id, Session.date)
+        .join(Session, Session.id == Reservation.session_id)
+        .where(*window, Reservation.member_id == member_id, Reservation.status == 'active')
+    ).all()
+    canceled = 0
+    if rows:
+        session_ids = [sid for sid, _ in rows]
+        canceled = db.session.execute(
+            update(Reservation)
+            .where(Reservation.session_id.in_(session_ids), Reservation.member_id == member_id,
+                   Reservation.status == 'active')
+            .values(status='canceled', updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.execute(
+            update(Session)
+            .where(Session.id.in_(session_ids), Session.spots_left < Session.capacity)
+            .values(spots_left=Session.spots_left + 1)
+            .execution_options(synchronize_session=False)
+        )
+        dates = [d for _, d in rows]
+        bump_range(tenant_id, min(dates), max(dates))
+    elif rule is None:
+        raise SeriesError('not_found')
+    db.session.commit()
+    return {'reservations_canceled': canceled}
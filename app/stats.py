@@ -0,0 +1,78 @@
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import select, func, case
+
+from app.extensions import db
+from app.models import Session, Reservation
+
+
+def compute_dashboard_stats(tenant_id: int, today: date | None = None):
+    """Admin paneli sayaçlarını iki toplu (aggregate) sorguyla hesaplar."""
+    today = today or date.today()
+    is_today = Session.date == today
+    total_sessions, upcoming, today_fill, today_cap = db.session.execute(
+        select(
+            func.count(Session.id),
+            func.sum(case((Session.date >= today, 1), else_=0)),
+            func.sum(case((is_today, Session.capacity - Session.spots_left), else_=0)),
+            func.sum(case((is_today, Session.capacity), else_=0)),
+        ).where(Session.tenant_id == tenant_id)
+    ).one()
+    active_res, pending_count = db.session.execute(
+        select(
+            func.sum(case((Reservation.status == 'active', 1), else_=0)),
+            func.sum(case((Reservation.cancel_status == 'pending', 1), else_=0)),
+        ).where(Reservation.tenant_id == tenant_id)
+    ).one()
+    return {
+        'total_sessions': total_sessions or 0,
+        'upcoming': upcoming or 0,
+        'active_res': active_res or 0,
+        'today_fill': today_fill or 0,
+        'today_cap': today_cap or 0,
+        'pending_count': pending_count or 0,
+    }
+
+
+class StatsCache:
+    """Stüdyo bazında kısa ömürlü (TTL) panel istatistikleri önbelleği."""
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._data = {}
+        # Hesaplama sürerken gelen invalidate, eski sonucun önbelleğe yazılmasını engeller
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def _generation(self, tenant_id):
+        return self._epoch, self._generations.get(tenant_id, 0)
+
+    def get(self, tenant_id):
+        now = time.monotonic()
+        today = date.today()
+        with self._lock:
+            entry = self._data.get(tenant_id)
+            # Gün değişince "bugün" sayaçları da değişir
+            if entry and entry[1] > now and entry[2] == today:
+                return entry[0]
+            generation = self._generation(tenant_id)
+        stats = compute_dashboard_stats(tenant_id, today)
+        with self._lock:
+            if self._generation(tenant_id) == generation:
+                self._data[tenant_id] = (stats, now + self.ttl, today)
+        return stats
+
+    def invalidate(self, *tenant_ids):
+        with self._lock:
+            if not tenant_ids:
+                self._data.clear()
+                self._epoch += 1
+            for tenant_id in tenant_ids:
+                self._data.pop(tenant_id, None)
+                self._generations[tenant_id] = self._generations.get(tenant_id, 0) + 1
+
+
+stats_cache = StatsCache()
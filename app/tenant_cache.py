@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.models import Tenant
+
+
+@dataclass(frozen=True)
+class TenantRecord:
+    """Oturumdan bağımsız, salt okunur stüdyo kaydı (g.tenant için)."""
+    id: int
+    name: str
+    domain_prefix: str
+    is_active: bool
+
+    @classmethod
+    def from_model(cls, tenant):
+        return cls(
+            id=tenant.id,
+            name=tenant.name,
+            domain_prefix=tenant.domain_prefix,
+            is_active=bool(tenant.is_active),
+        )
+
+
+class TenantCache:
+    """
+    domain_prefix -> TenantRecord eşlemesi için sınırlı LRU + TTL önbellek.
+    Bilinmeyen prefix'ler de (tarayıcı botları vs.) kısa süreliğine önbelleğe
+    alınır; bunlar ayrı ve daha küçük bir LRU'da tutulur, gerçek stüdyoları
+    önbellekten atamaz.
+    """
+
+    def __init__(self, max_size=256, ttl=300, negative_ttl=30, negative_max_size=64):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.negative_max_size = negative_max_size
+        self._data = OrderedDict()
+        self._missing = OrderedDict()  # prefix -> bitiş zamanı
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, max_size=None, ttl=None, negative_ttl=None, negative_max_size=None):
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl is not None:
+                self.ttl = ttl
+            if negative_ttl is not None:
+                self.negative_ttl = negative_ttl
+            if negative_max_size is not None:
+                self.negative_max_size = negative_max_size
+            self._data.clear()
+            self._missing.clear()
+
+    def get(self, prefix):
+        """Prefix'e ait kaydı döndürür, stüdyo yoksa None döner."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(prefix)
+            if entry is not None and entry[1] > now:
+                self._data.move_to_end(prefix)
+                self.hits += 1
+                return entry[0]
+            expires = self._missing.get(prefix)
+            if expires is not None and expires > now:
+                self._missing.move_to_end(prefix)
+                self.hits += 1
+                return None
+            self.misses += 1
+
+        tenant = Tenant.query.filter_by(domain_prefix=prefix).first()
+        record = TenantRecord.from_model(tenant) if tenant else None
+        self._store(prefix, record, now)
+        return record
+
+    def _store(self, prefix, record, now):
+        with self._lock:
+            if record is None:
+                self._data.pop(prefix, None)
+                self._remember(self._missing, prefix, now + self.negative_ttl, self.negative_max_size)
+            else:
+                self._missing.pop(prefix, None)
+                self._remember(self._data, prefix, (record, now + self.ttl), self.max_size)
+
+    @staticmethod
+    def _remember(entries, prefix, value, limit):
+        entries[prefix] = value
+        entries.move_to_end(prefix)
+        while len(entries) > limit:
+            entries.popitem(last=False)
+
+    def invalidate(self, *prefixes):
+        """Verilen prefix'leri siler; prefix verilmezse tüm önbelleği temizler."""
+        with self._lock:
+            if not prefixes:
+                self._data.clear()
+                self._missing.clear()
+                return
+            for prefix in prefixes:
+                self._data.pop(prefix, None)
+                self._missing.pop(prefix, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'negative_size': len(self._missing),
+                'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+tenant_cache = TenantCache()
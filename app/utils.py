@@ -1,6 +1,10 @@
 from datetime import datetime, date, timedelta, time as dtime
-from app.models import db, Reservation, Session, Member
-from sqlalchemy import func, and_
+from app.models import db, Reservation, Session, Member, Tenant, CloseWatermark
+from sqlalchemy import func, and_, or_, case, select, update, bindparam, event, inspect
+from sqlalchemy.orm import Session as OrmSession
+from app.calendar_versions import bump_range
+from app.reservations import reserve_many
+from app.attendance import attendance_deltas, apply_attendance_deltas
 
 def week_bounds(anchor: datetime):
     start = anchor - timedelta(days=anchor.weekday())
@@ -20,66 +24,263 @@ def time_range(start_h=7, end_h=22, step_min=60):
         cur += timedelta(minutes=step_min)
     return out
 
-def mark_user_joined(sessions, member_name: str | None):
+def week_sessions(tenant_id: int, week_start: datetime, week_end: datetime):
+    """Stüdyonun sadece [week_start, week_end) aralığındaki seanslarını getirir."""
+    return (
+        Session.query
+        .filter(
+            Session.tenant_id == tenant_id,
+            Session.date >= week_start.date(),
+            Session.date < week_end.date(),
+        )
+        .order_by(Session.date.asc(), Session.time.asc())
+        .all()
+    )
+
+def mark_user_joined(sessions, member_id: int | None):
     for s in sessions:
         s.user_joined = False
-    if not member_name:
+    if not member_id or not sessions:
         return sessions
-    joined = {
-        r.session_id
-        for r in Reservation.query
-            .filter_by(user_name=member_name, status='active')
-            .all()
-    }
+    joined = set(
+        db.session.scalars(
+            select(Reservation.session_id).where(
+                Reservation.member_id == member_id,
+                Reservation.status == 'active',
+                Reservation.session_id.in_([s.id for s in sessions]),
+            )
+        )
+    )
     for s in sessions:
         s.user_joined = (s.id in joined)
     return sessions
 
-def auto_reserve(session, member_ids):
-    if not member_ids:
-        return
-    for member_id in member_ids:
-        member = Member.query.get(member_id)
-        if not member and isinstance(member_id, int): # ID kontrolü
-             pass 
-        
-        # Eğer member_id bir int ise ve yukarıda bulamadıysa (Member.get logic)
-        # Buradaki mantığı senin orijinal koduna sadık kalarak basitleştirdim.
-        
-        if member:
-            reservation = Reservation(
-                session_id=session.id,
-                user_name=member.full_name,
-                status='active'
-            )
-            db.session.add(reservation)
-            if session.spots_left > 0:
-                session.spots_left -= 1
-    db.session.commit()
+def auto_reserve(sessions, member_ids, commit=True):
+    """
+    Seçili üyeleri seanslara toplu ön atar (tek Session ya da liste alır).
+    Üyeler tek tenant-scoped IN sorgusuyla yüklenir, kayıt matrisi toplu
+    eklenir ve varsayılan olarak tek commit yapılır. Eklenen kayıt sayısını döndürür.
+    """
+    if isinstance(sessions, Session):
+        sessions = [sessions]
+    if not member_ids or not sessions:
+        return 0
+    tenant_id = sessions[0].tenant_id
+    sessions = [s for s in sessions if s.tenant_id == tenant_id]
+    order = {mid: i for i, mid in enumerate(dict.fromkeys(member_ids))}
+    members = sorted(
+        Member.query.filter(Member.tenant_id == tenant_id, Member.id.in_(list(order))),
+        key=lambda m: order[m.id],
+    )
+    try:
+        added = reserve_many(sessions, members)
+        if added:
+            dates = [s.date for s in sessions if s.id in added]
+            bump_range(tenant_id, min(dates), max(dates))
+        if commit:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return sum(added.values())
+
+def find_member(tenant_id: int, name: str | None):
+    """İsimden üye araması; (tenant_id, name_key) indeksini kullanır."""
+    if not name or not name.strip():
+        return None
+    return Member.query.filter_by(tenant_id=tenant_id, name_key=Member.name_key_for(name)).first()
+
+def link_reservation_members(rows):
+    """
+    (id, tenant_id, user_name) satırlarının member_id alanını name_key indeksi
+    üzerinden toplu olarak doldurur. Eşleşen kayıt sayısını döndürür.
+    """
+    keys = {(t, Member.name_key_for(n)) for _, t, n in rows}
+    if not keys:
+        return 0
+    found = {}
+    for tenant_id in {t for t, _ in keys}:
+        names = [k for t, k in keys if t == tenant_id]
+        for mid, key in db.session.execute(
+            select(Member.id, Member.name_key)
+            .where(Member.tenant_id == tenant_id, Member.name_key.in_(names))
+        ):
+            found[(tenant_id, key)] = mid
+    params = [
+        {'rid': rid, 'mid': found[(t, Member.name_key_for(n))]}
+        for rid, t, n in rows if (t, Member.name_key_for(n)) in found
+    ]
+    if params:
+        db.session.execute(
+            update(Reservation.__table__)
+            .where(Reservation.__table__.c.id == bindparam('rid'))
+            .values(member_id=bindparam('mid')),
+            params,
+        )
+    return len(params)
+
+def backfill_reservation_member_ids(batch_size: int = 1000):
+    """
+    member_id'si boş rezervasyonları isimden eşleştirerek küçük partiler halinde
+    doldurur. Her parti ayrı commit edilir, uygulama çalışırken güvenle çalışır.
+    (işlenen, eşleşmeyen) sayılarını döndürür.
+    """
+    last_id = 0
+    processed = 0
+    while True:
+        rows = db.session.execute(
+            select(Reservation.id, Reservation.tenant_id, Reservation.user_name)
+            .where(Reservation.id > last_id, Reservation.member_id.is_(None))
+            .order_by(Reservation.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        link_reservation_members(rows)
+        db.session.commit()
+        processed += len(rows)
+        last_id = rows[-1][0]
+    unmatched = db.session.scalar(
+        select(func.count(Reservation.id)).where(Reservation.member_id.is_(None))
+    )
+    return processed, unmatched
 
 # Geçmiş seansları kapatma mantığı
-def close_past_sessions_logic():
-    now = datetime.now()
-    to_close = (
-        Session.query
-        .filter(
-            Session.completed.is_(False),
-            (Session.date < now.date()) |
-            and_(Session.date == now.date(), Session.time < now.time())
+def _session_before(moment: datetime):
+    return or_(
+        Session.date < moment.date(),
+        and_(Session.date == moment.date(), Session.time < moment.time()),
+    )
+
+def _session_not_before(moment: datetime):
+    return or_(
+        Session.date > moment.date(),
+        and_(Session.date == moment.date(), Session.time >= moment.time()),
+    )
+
+def close_tenant_sessions(tenant_id: int, cutoff: datetime, since: datetime | None = None):
+    """
+    Bir stüdyonun [since, cutoff) aralığında başlayan açık seanslarını birkaç
+    toplu SQL ifadesiyle kapatır. Commit etmez; sonuç sayılarını döndürür.
+    """
+    window = [Session.tenant_id == tenant_id, Session.completed.is_(False), _session_before(cutoff)]
+    if since is not None:
+        window.append(_session_not_before(since))
+    session_ids = select(Session.id).where(*window)
+
+    first_date = db.session.execute(select(func.min(Session.date)).where(*window)).scalar()
+    if first_date is None:
+        return {'sessions_closed': 0, 'credits_debited': 0}
+    bump_range(tenant_id, first_date, cutoff.date())
+
+    # Henüz geri doldurulmamış eski kayıtların üyesini isimden bul
+    link_reservation_members(db.session.execute(
+        select(Reservation.id, Reservation.tenant_id, Reservation.user_name)
+        .where(Reservation.session_id.in_(session_ids), Reservation.member_id.is_(None))
+    ).all())
+
+    # Üye başına bu aralıktaki aktif rezervasyon sayısı
+    per_member = (
+        select(Reservation.member_id, func.count(Reservation.id).label('n'))
+        .where(Reservation.session_id.in_(session_ids), Reservation.status == 'active')
+        .group_by(Reservation.member_id)
+        .subquery()
+    )
+    member_filter = (
+        Member.tenant_id == tenant_id,
+        Member.credits > 0,
+        Member.id == per_member.c.member_id,
+    )
+
+    credits_debited = db.session.execute(
+        select(func.sum(case((Member.credits > per_member.c.n, per_member.c.n), else_=Member.credits)))
+        .where(*member_filter)
+    ).scalar() or 0
+
+    if credits_debited:
+        db.session.execute(
+            update(Member)
+            .where(*member_filter)
+            .values(credits=case((Member.credits > per_member.c.n, Member.credits - per_member.c.n), else_=0))
+            .execution_options(synchronize_session=False)
         )
-        .all()
+    # Katılım özet tablosu için (üye, gün) bazında artışlar
+    deltas = attendance_deltas(Reservation.session_id.in_(session_ids), Reservation.status == 'active')
+
+    db.session.execute(
+        update(Reservation)
+        .where(Reservation.session_id.in_(session_ids), Reservation.status == 'active')
+        .values(status='attended')
+        .execution_options(synchronize_session=False)
     )
-    if not to_close:
+    sessions_closed = db.session.execute(
+        update(Session)
+        .where(*window)
+        .values(completed=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    apply_attendance_deltas(deltas)
+
+    return {'sessions_closed': sessions_closed, 'credits_debited': int(credits_debited)}
+
+def close_past_sessions_logic(full: bool = False):
+    """
+    Başlama saati geçmiş seansları tamamlandı olarak işaretler, aktif
+    rezervasyonları 'attended' yapar ve üyelerden kredi düşer.
+
+    Her stüdyo için en son kapatılan an (CloseWatermark) saklanır ve sonraki
+    çalışmalar sadece yeni aralığa bakar. Bu sınırdan önceye eklenen/taşınan
+    seanslar sınırı geri çeker (rewind_close_watermark). `full=True` sınırı
+    tamamen yok sayar.
+    Kapatılan seans ve düşülen kredi sayısını döndürür.
+    """
+    result = {'sessions_closed': 0, 'credits_debited': 0}
+    now = datetime.now()
+    # Sunucu veritabanlarında satır kilidi: eşzamanlı geri çekme bu çalışmanın üzerine yazılmasın
+    watermarks = {w.tenant_id: w for w in CloseWatermark.query.with_for_update().all()}
+
+    for tenant_id in db.session.scalars(select(Tenant.id)).all():
+        mark = watermarks.get(tenant_id)
+        since = None if (full or mark is None) else mark.closed_until
+        counts = close_tenant_sessions(tenant_id, now, since)
+        result['sessions_closed'] += counts['sessions_closed']
+        result['credits_debited'] += counts['credits_debited']
+
+        if mark is None:
+            db.session.add(CloseWatermark(tenant_id=tenant_id, closed_until=now))
+        else:
+            mark.closed_until = now
+    db.session.commit()
+    return result
+
+def rewind_close_watermark(connection, tenant_id: int, start: datetime):
+    """
+    Geçmişe eklenen ya da geçmişe taşınan seans için stüdyonun kapatma
+    sınırını seansın başlangıcına geri çeker; bir sonraki çalışma onu da
+    kapatır. Gelecekteki seanslar için bir şey yapmaz.
+    """
+    if start >= datetime.now():
         return
+    table = CloseWatermark.__table__
+    connection.execute(
+        update(table)
+        .where(table.c.tenant_id == tenant_id, table.c.closed_until > start)
+        .values(closed_until=start)
+    )
 
-    for s in to_close:
-        s.completed = True
-        for r in s.reservations:
-            if r.status == 'active':
-                r.status = 'attended'
-                m = Member.query.filter(
-                    func.lower(Member.full_name) == r.user_name.lower()
-                ).first()
-                if m and (m.credits or 0) > 0:
-                    m.credits -= 1
-    db.session.commit()
\ No newline at end of file
+@event.listens_for(OrmSession, 'after_flush')
+def _rewind_for_backdated_sessions(session, flush_context):
+    # after_flush'ta new/dirty listeleri ve öznitelik geçmişi hâlâ flush öncesini gösterir
+    earliest = {}
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Session) or obj.completed or obj.tenant_id is None or obj.date is None:
+            continue
+        if obj not in session.new:
+            attrs = inspect(obj).attrs
+            if not (attrs.date.history.has_changes() or attrs.time.history.has_changes()):
+                continue
+        start = datetime.combine(obj.date, obj.time or dtime(0, 0))
+        if obj.tenant_id not in earliest or start < earliest[obj.tenant_id]:
+            earliest[obj.tenant_id] = start
+    for tenant_id, start in earliest.items():
+        rewind_close_watermark(session.connection(), tenant_id, start)
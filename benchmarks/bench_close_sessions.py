@@ -0,0 +1,114 @@
+"""
+Seans kapatma benchmark'ı: eski satır satır ORM döngüsü ile yeni toplu
+(set-based) kapatmayı aynı veri üzerinde karşılaştırır.
+
+    python benchmarks/bench_close_sessions.py --reservations 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, time as dtime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_app(db_path):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['SESSION_CLOSER_ENABLED'] = '0'
+    from app import create_app
+    return create_app()
+
+
+def seed(reservations, members_count, per_session):
+    from app.models import db, Tenant, Member, Session, Reservation
+
+    db.drop_all()
+    db.create_all()
+    tenant = Tenant(name='Bench', domain_prefix='bench')
+    db.session.add(tenant)
+    db.session.commit()
+
+    names = [f'Üye {i}' for i in range(members_count)]
+    db.session.execute(Member.__table__.insert(), [
+        {'tenant_id': tenant.id, 'full_name': n, 'name_key': Member.name_key_for(n),
+         'credits': 10_000, 'created_at': datetime.now()}
+        for n in names
+    ])
+
+    session_count = reservations // per_session
+    start = date.today() - timedelta(days=session_count // 10 + 1)
+    db.session.execute(Session.__table__.insert(), [
+        {'tenant_id': tenant.id, 'date': start + timedelta(days=i // 10), 'time': dtime(8 + i % 10, 0),
+         'capacity': per_session, 'spots_left': 0, 'is_recurring': False, 'completed': False,
+         'is_reserved': False}
+        for i in range(session_count)
+    ])
+    now = datetime.utcnow()
+    db.session.execute(Reservation.__table__.insert(), [
+        {'tenant_id': tenant.id, 'user_name': names[(sid * per_session + k) % members_count],
+         'member_id': (sid * per_session + k) % members_count + 1, 'session_id': sid + 1, 'status': 'active', 'cancel_status': 'none',
+         'created_at': now, 'updated_at': now}
+        for sid in range(session_count) for k in range(per_session)
+    ])
+    db.session.commit()
+    return session_count
+
+
+def legacy_close():
+    """Eski uygulama: her seans ve rezervasyon için ayrı ORM sorgusu."""
+    from sqlalchemy import func, and_
+    from app.models import db, Session, Member
+
+    now = datetime.now()
+    to_close = Session.query.filter(
+        Session.completed.is_(False),
+        (Session.date < now.date()) | and_(Session.date == now.date(), Session.time < now.time())
+    ).all()
+    for s in to_close:
+        s.completed = True
+        for r in s.reservations:
+            if r.status == 'active':
+                r.status = 'attended'
+                m = Member.query.filter(func.lower(Member.full_name) == r.user_name.lower()).first()
+                if m and (m.credits or 0) > 0:
+                    m.credits -= 1
+    db.session.commit()
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return round(time.perf_counter() - started, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reservations', type=int, default=100_000)
+    parser.add_argument('--members', type=int, default=500)
+    parser.add_argument('--per-session', type=int, default=4)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    from app.models import db
+    from app.utils import close_past_sessions_logic
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, 'bench.db'))
+        report = {'reservations': args.reservations}
+        with app.app_context():
+            report['sessions'] = seed(args.reservations, args.members, args.per_session)
+            report['set_based_s'] = timed(close_past_sessions_logic)
+            # Watermark sayesinde ikinci çalışma sadece yeni aralığa bakar
+            report['set_based_incremental_s'] = timed(close_past_sessions_logic)
+            if not args.skip_legacy:
+                seed(args.reservations, args.members, args.per_session)
+                report['legacy_s'] = timed(legacy_close)
+            db.session.remove()
+    print(json.dumps(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""
+Uçtan uca endpoint benchmark'ı: sentetik çok stüdyolu veri seti üzerinde
+gerçek Flask uygulamasını test client ile çalıştırır ve her sıcak endpoint
+için gecikme yüzdelikleri ile istek başına sorgu sayısını JSON olarak basar.
+Sorgu sayıları REQUEST_PROFILING_ENABLED ile gelen Server-Timing başlığından
+okunur.
+
+    python benchmarks/bench_endpoints.py --tenants 3 --members 200 --years 2 --iterations 50
+    python benchmarks/bench_endpoints.py --db /tmp/bench.db ...   # veri seti tekrar kullanılır
+
+Farklı commit'lerde aynı parametrelerle çalıştırılıp çıktılar karşılaştırılabilir.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def build_app(db_path):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['SESSION_CLOSER_ENABLED'] = '0'
+    os.environ['RECURRENCE_EXTENDER_ENABLED'] = '0'
+    os.environ['REQUEST_PROFILING_ENABLED'] = '1'
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+    return app
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(samples):
+    """[(süre_ms, sorgu, sql_ms)] listesini yüzdelik özetine çevirir."""
+    wall = sorted(s[0] for s in samples)
+    queries = sorted(s[1] for s in samples)
+    sql = sorted(s[2] for s in samples)
+    return {
+        'n': len(samples),
+        'p50_ms': round(percentile(wall, 50), 2),
+        'p90_ms': round(percentile(wall, 90), 2),
+        'p95_ms': round(percentile(wall, 95), 2),
+        'p99_ms': round(percentile(wall, 99), 2),
+        'max_ms': round(wall[-1], 2),
+        'mean_ms': round(statistics.fmean(wall), 2),
+        'queries_p50': percentile(queries, 50),
+        'queries_max': queries[-1],
+        'sql_ms_p50': round(percentile(sql, 50), 2),
+    }
+
+
+class Runner:
+    def __init__(self, app, tenants):
+        self.app = app
+        self.tenants = tenants  # [{'prefix', 'member', 'free_sessions'}]
+        self.client = app.test_client()
+        self.samples = {}
+
+    def login(self, tenant, admin=False):
+        with self.client.session_transaction() as s:
+            s.clear()
+            s['user_name'] = s['member_name'] = tenant['member_name']
+            s['user_id'] = tenant['member_id']
+            if admin:
+                s['is_admin'] = True
+
+    def call(self, name, method, url, record=True, **kwargs):
+        started = time.perf_counter()
+        resp = self.client.open(url, method=method, **kwargs)
+        body = resp.get_data()  # Akış halindeki yanıtlar da sonuna kadar okunur
+        elapsed = (time.perf_counter() - started) * 1000
+        if resp.status_code >= 400:
+            raise RuntimeError(f'{name}: {method} {url} -> {resp.status_code}')
+        match = SERVER_TIMING_DB.search(resp.headers.get('Server-Timing', ''))
+        if record:
+            sql_ms, queries = (float(match.group(1)), int(match.group(2))) if match else (0.0, 0)
+            self.samples.setdefault(name, []).append((elapsed, queries, sql_ms))
+        return resp, body
+
+
+def latest_reservation_id(tenant, session_id):
+    from app.models import Reservation
+    return Reservation.query.with_entities(Reservation.id).filter_by(
+        session_id=session_id, member_id=tenant['member_id'], status='active'
+    ).scalar()
+
+
+def prepare_tenants(iterations):
+    """Her stüdyoya hiç rezervasyonu olmayan bir benchmark üyesi ekler ve
+    rezervasyon döngüsü için boş yeri olan ileri tarihli seansları seçer."""
+    from app.models import db, Tenant, Member, Session
+
+    tenants = []
+    first_free = date.today() + timedelta(days=3)  # 24 saat iptal sınırının dışında
+    for tenant in Tenant.query.order_by(Tenant.id):
+        member = Member.query.filter_by(tenant_id=tenant.id, full_name='Benchmark Üyesi').first()
+        if member is None:
+            member = Member(tenant_id=tenant.id, full_name='Benchmark Üyesi', credits=1_000_000)
+            db.session.add(member)
+            db.session.commit()
+        free = [sid for (sid,) in db.session.query(Session.id).filter(
+            Session.tenant_id == tenant.id, Session.date >= first_free, Session.spots_left > 0
+        ).order_by(Session.date, Session.time).limit(2 * iterations)]
+        tenants.append({'prefix': tenant.domain_prefix, 'member_id': member.id,
+                        'member_name': member.full_name, 'free_sessions': free})
+    return tenants
+
+
+def run_endpoints(runner, iterations, warmup, only):
+    week = (date.today() - timedelta(days=7)).isoformat()
+    reads = [
+        ('calendar', False, '/{p}/calendar?d=' + week),
+        ('calendar_grid', False, '/{p}/calendar/grid?week_start=' + week),
+        ('user_dashboard', False, '/{p}/dashboard'),
+        ('profile', False, '/{p}/profile'),
+        ('admin_dashboard', True, '/{p}/admin/dashboard'),
+    ]
+    for name, admin, pattern in reads:
+        if only and name not in only:
+            continue
+        for i in range(warmup + iterations):
+            tenant = runner.tenants[i % len(runner.tenants)]
+            runner.login(tenant, admin=admin)
+            runner.call(name, 'GET', pattern.format(p=tenant['prefix']), record=i >= warmup)
+
+    if only and not {'reserve', 'move', 'cancel'} & set(only):
+        return
+    # Rezervasyon döngüsü: boş bir seansa kayıt -> başka seansa taşı -> iptal
+    for i in range(iterations):
+        tenant = runner.tenants[i % len(runner.tenants)]
+        k = i // len(runner.tenants)
+        free = tenant['free_sessions']
+        if 2 * k + 1 >= len(free):
+            break
+        source, target = free[2 * k], free[2 * k + 1]
+        p = tenant['prefix']
+        runner.login(tenant)
+        with runner.app.app_context():
+            runner.call('reserve', 'POST', f'/{p}/reserve/{source}')
+            rid = latest_reservation_id(tenant, source)
+            runner.call('move', 'POST', f'/{p}/move/{rid}', data={'target_id': target})
+            rid = latest_reservation_id(tenant, target)
+            runner.call('cancel', 'POST', f'/{p}/cancel/{rid}')
+
+
+def run_close_sessions(app):
+    """Seans kapatma işini (ilk çalışma ve boşta tekrar) sorgu sayısıyla ölçer."""
+    from sqlalchemy import event
+    from app.models import db
+    from app.utils import close_past_sessions_logic
+
+    samples = []
+    with app.app_context():
+        statements = [0]
+
+        def count(*_):
+            statements[0] += 1
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            for _ in range(2):
+                statements[0] = 0
+                started = time.perf_counter()
+                result = close_past_sessions_logic()
+                samples.append({'ms': round((time.perf_counter() - started) * 1000, 2),
+                                'queries': statements[0], **result})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+            db.session.remove()
+    return {'first': samples[0], 'idle': samples[1]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=3)
+    parser.add_argument('--members', type=int, default=200)
+    parser.add_argument('--years', type=float, default=2.0)
+    parser.add_argument('--sessions-per-day', type=int, default=6)
+    parser.add_argument('--capacity', type=int, default=6)
+    parser.add_argument('--fill', type=float, default=0.8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', nargs='*', help='sadece bu endpoint(ler)i ölç')
+    parser.add_argument('--db', help='veri seti dosyası; varsa yeniden üretilmez')
+    parser.add_argument('--out', help='JSON çıktıyı ayrıca bu dosyaya yaz')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, 'bench.db')
+        reuse = os.path.exists(db_path)
+        app = build_app(db_path)
+
+        from app.models import db
+        from benchmarks.dataset import build_dataset
+
+        report = {'params': {k: v for k, v in vars(args).items() if k not in ('db', 'out')}}
+        with app.app_context():
+            if reuse:
+                report['dataset'] = 'reused'
+            else:
+                db.create_all()
+                started = time.perf_counter()
+                report['dataset'] = build_dataset(
+                    tenants=args.tenants, members=args.members, years=args.years,
+                    sessions_per_day=args.sessions_per_day, capacity=args.capacity,
+                    fill=args.fill, seed=args.seed,
+                )
+                report['dataset']['build_s'] = round(time.perf_counter() - started, 2)
+            tenants = prepare_tenants(args.iterations)
+            db.session.remove()
+
+        runner = Runner(app, tenants)
+        run_endpoints(runner, args.iterations, args.warmup, args.only)
+        report['endpoints'] = {name: summarize(s) for name, s in runner.samples.items()}
+        if not args.only or 'close_sessions' in args.only:
+            report['close_sessions'] = run_close_sessions(app)
+
+    output = json.dumps(report, ensure_ascii=False)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
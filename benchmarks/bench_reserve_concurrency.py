@@ -0,0 +1,103 @@
+"""
+Rezervasyon yarışı benchmark'ı: N eşzamanlı üye aynı (popüler) seanslara
+kayıt olmaya çalışır. Fazla satış olmadığını ve saniyedeki işlem sayısını raporlar.
+
+    python benchmarks/bench_reserve_concurrency.py --bookers 200 --capacity 20
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, time as dtime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bookers', type=int, default=200)
+    parser.add_argument('--capacity', type=int, default=20)
+    parser.add_argument('--sessions', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ['SESSION_CLOSER_ENABLED'] = '0'
+        from app import create_app
+        from app.models import db, Tenant, Member, Session, Reservation
+        from app import reservations
+        from app.reservations import ReservationError
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            tenant = Tenant(name='Bench', domain_prefix='bench')
+            db.session.add(tenant)
+            db.session.flush()
+            tenant_id = tenant.id
+            db.session.add_all([
+                Member(tenant_id=tenant_id, full_name=f'Üye {i}', credits=10) for i in range(args.bookers)
+            ])
+            sessions = [
+                Session(tenant_id=tenant_id, date=date.today() + timedelta(days=2), time=dtime(9 + i, 0),
+                        capacity=args.capacity, spots_left=args.capacity)
+                for i in range(args.sessions)
+            ]
+            db.session.add_all(sessions)
+            db.session.commit()
+            session_ids = [s.id for s in sessions]
+            # Thread'ler bağlantı tutmadan beklesin diye üyeler önceden yüklenir
+            members = Member.query.filter_by(tenant_id=tenant_id).order_by(Member.id).all()
+            db.session.expunge_all()
+
+        outcomes = {}
+        lock = threading.Lock()
+        barrier = threading.Barrier(args.bookers)
+
+        def booker(i):
+            with app.app_context():
+                member = members[i]
+                barrier.wait()
+                for sid in session_ids:
+                    try:
+                        reservations.reserve(tenant_id, sid, member)
+                        code = 'ok'
+                    except ReservationError as e:
+                        code = e.code
+                    except Exception as e:
+                        code = type(e).__name__
+                    with lock:
+                        outcomes[code] = outcomes.get(code, 0) + 1
+                db.session.remove()
+
+        threads = [threading.Thread(target=booker, args=(i,)) for i in range(args.bookers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            oversold = 0
+            for sid in session_ids:
+                s = db.session.get(Session, sid)
+                active = Reservation.query.filter_by(session_id=sid, status='active').count()
+                oversold += max(0, active - s.capacity) + (1 if s.spots_left != s.capacity - active else 0)
+
+        attempts = args.bookers * len(session_ids)
+        print(json.dumps({
+            'bookers': args.bookers,
+            'attempts': attempts,
+            'elapsed_s': round(elapsed, 3),
+            'attempts_per_s': round(attempts / elapsed, 1),
+            'outcomes': outcomes,
+            'oversold': oversold,
+        }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Seri oluşturma benchmark'ı: N admin aynı anda (farklı saatlere) haftalık seri
+açar. Eski hafta hafta döngü (exists + flush + seans başına auto_reserve
+commit'i) ile kural tabanlı create_rule (kuralın tekrarlarını toplu açan
+_materialize) karşılaştırılır. Kural, `--weeks` haftayı kapsayan `until` ile
+kurulur ve ufuk tüm haftaları içine alacak kadar uzatılır; iki yol da aynı
+sayıda seans açar.
+
+    python benchmarks/bench_series_create.py --admins 10 --weeks 48 --members 6
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, time as dtime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def legacy_create_series(tenant_id, base_dt, weeks, capacity, notes, member_ids):
+    """Değişiklik öncesi admin_routes.sessions POST döngüsü (karşılaştırma için)."""
+    from app.models import db, Session
+    from app.utils import auto_reserve
+
+    group_id = str(uuid.uuid4())
+    new_sessions = []
+    for i in range(weeks):
+        dt = base_dt + timedelta(weeks=i)
+        exists = Session.query.filter_by(tenant_id=tenant_id, date=dt.date(), time=dt.time()).first()
+        if exists:
+            continue
+        s = Session(tenant_id=tenant_id, date=dt.date(), time=dt.time(), capacity=capacity,
+                    spots_left=capacity, notes=notes, is_recurring=True, recur_group_id=group_id)
+        db.session.add(s)
+        db.session.flush()
+        new_sessions.append(s)
+    db.session.commit()
+    for s in new_sessions:
+        auto_reserve(s, member_ids)
+    return len(new_sessions)
+
+
+def run(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ['SESSION_CLOSER_ENABLED'] = '0'
+        os.environ['RECURRENCE_EXTENDER_ENABLED'] = '0'
+        os.environ['RECURRENCE_HORIZON_DAYS'] = str(args.weeks * 7 + 1)
+        from sqlalchemy import event
+        from app import create_app
+        from app.models import db, Tenant, Member, Session, Reservation
+        from app.series import create_rule
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            tenant = Tenant(name='Bench', domain_prefix='bench')
+            db.session.add(tenant)
+            db.session.flush()
+            tenant_id = tenant.id
+            db.session.add_all([
+                Member(tenant_id=tenant_id, full_name=f'Üye {i}', credits=10) for i in range(args.members)
+            ])
+            db.session.commit()
+            member_ids = [m.id for m in Member.query.filter_by(tenant_id=tenant_id)]
+
+            statements = [0]
+
+            def count(*_):
+                statements[0] += 1
+            event.listen(db.engine, 'before_cursor_execute', count)
+
+        start_day = date.today() + timedelta(days=1)
+        latencies = []
+        errors = {}
+        lock = threading.Lock()
+        barrier = threading.Barrier(args.admins)
+
+        def admin(i):
+            base_dt = datetime.combine(start_day, dtime(7 + i % 14, 0))
+            with app.app_context():
+                barrier.wait()
+                t0 = time.perf_counter()
+                try:
+                    if mode == 'legacy':
+                        legacy_create_series(tenant_id, base_dt, args.weeks, args.members, '', member_ids)
+                    else:
+                        until = base_dt.date() + timedelta(weeks=args.weeks - 1)
+                        create_rule(tenant_id, base_dt, 'weekly', args.members, '', member_ids, until=until)
+                    with lock:
+                        latencies.append(time.perf_counter() - t0)
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                finally:
+                    db.session.remove()
+
+        threads = [threading.Thread(target=admin, args=(i,)) for i in range(args.admins)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            sessions = Session.query.filter_by(tenant_id=tenant_id).count()
+            reserved = Reservation.query.filter_by(tenant_id=tenant_id).count()
+        latencies.sort()
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+            'max_ms': round(latencies[-1] * 1000, 1) if latencies else None,
+            'statements': statements[0],
+            'sessions': sessions,
+            'reservations': reserved,
+            'errors': errors,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--admins', type=int, default=10)
+    parser.add_argument('--weeks', type=int, default=48)
+    parser.add_argument('--members', type=int, default=6)
+    parser.add_argument('--mode', choices=['legacy', 'bulk', 'both'], default='both')
+    args = parser.parse_args()
+
+    modes = ['legacy', 'bulk'] if args.mode == 'both' else [args.mode]
+    report = {'admins': args.admins, 'weeks': args.weeks, 'members': args.members}
+    for mode in modes:
+        report[mode] = run(mode, args)
+    print(json.dumps(report))
+
+
+if __name__ == '__main__':
+    main()
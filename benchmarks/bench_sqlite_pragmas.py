@@ -0,0 +1,165 @@
+"""
+SQLite ayar profili benchmark'ı: aynı veri seti üzerinde eşzamanlı okuyucular
+(haftalık takvim + panel sayaçları) ve yazıcılar (rezervasyon al / iptal et)
+ayrı süreçlerde belirli bir süre çalışır. Varsayılan SQLite ayarları (SQLITE_PRAGMAS_ENABLED=0)
+ile WAL profili karşılaştırılır: saniyedeki işlem, gecikme ve "database is
+locked" hataları raporlanır.
+
+    python benchmarks/bench_sqlite_pragmas.py --readers 8 --writers 4 --seconds 10
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import multiprocessing
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p / 100))] * 1000, 2)
+
+
+def reader(app, tenant_id, i, deadline):
+    from app.models import db
+    from app.stats import compute_dashboard_stats
+    from app.utils import week_bounds, week_sessions
+
+    anchor = datetime.now() - timedelta(weeks=i % 8)
+    with app.app_context():
+        while time.time() < deadline:
+            started = time.perf_counter()
+            try:
+                week_start, week_end = week_bounds(anchor)
+                week_sessions(tenant_id, week_start, week_end)
+                compute_dashboard_stats(tenant_id)
+                yield time.perf_counter() - started, None
+            except Exception as e:
+                db.session.rollback()
+                yield None, e
+            finally:
+                db.session.remove()
+
+
+def writer(app, tenant_id, i, deadline, member_id, targets):
+    from app.models import db, Member
+    from app import reservations
+
+    k = 0
+    with app.app_context():
+        while time.time() < deadline:
+            session_id = targets[k % len(targets)]
+            k += 1
+            started = time.perf_counter()
+            try:
+                member = db.session.get(Member, member_id)
+                r = reservations.reserve(tenant_id, session_id, member, check_credits=False)
+                reservations.cancel(r)
+                yield time.perf_counter() - started, None
+            except Exception as e:
+                db.session.rollback()
+                yield None, e
+            finally:
+                db.session.remove()
+
+
+def worker(kind, args, queue):
+    """Ayrı süreç (gunicorn worker'ı gibi): kendi uygulaması ve bağlantı havuzuyla çalışır."""
+    from app import create_app
+    app = create_app()
+    latencies, errors = [], {}
+    for elapsed, error in kind(app, *args):
+        if error is None:
+            latencies.append(elapsed)
+        else:
+            name = 'database_is_locked' if 'locked' in str(error) else getattr(error, 'code', type(error).__name__)
+            errors[name] = errors.get(name, 0) + 1
+    queue.put((kind.__name__, latencies, errors))
+
+
+def run(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ['SESSION_CLOSER_ENABLED'] = '0'
+        os.environ['RECURRENCE_EXTENDER_ENABLED'] = '0'
+        os.environ['SQLITE_MAINTENANCE_ENABLED'] = '0'
+        os.environ['SQLITE_PRAGMAS_ENABLED'] = '1' if mode == 'tuned' else '0'
+        from app import create_app
+        from app.models import db, Tenant, Member, Session
+        from benchmarks.dataset import build_dataset
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            build_dataset(tenants=1, members=args.members, years=args.years, seed=1)
+            tenant_id = db.session.scalar(db.select(Tenant.id))
+            journal = db.session.connection().exec_driver_sql('PRAGMA journal_mode').scalar()
+            # Her yazıcıya hiç rezervasyonu olmayan kendi üyesi ve ayrı boş seanslar
+            writers = [Member(tenant_id=tenant_id, full_name=f'Yazıcı {i}', credits=0) for i in range(args.writers)]
+            db.session.add_all(writers)
+            db.session.commit()
+            writer_ids = [m.id for m in writers]
+            free = [sid for (sid,) in db.session.query(Session.id).filter(
+                Session.tenant_id == tenant_id, Session.date >= date.today() + timedelta(days=2),
+                Session.spots_left > 0,
+            ).order_by(Session.date, Session.time)]
+            db.session.remove()
+            db.engine.dispose()  # fork'tan önce açık bağlantı kalmasın
+
+        ctx = multiprocessing.get_context('fork')
+        queue = ctx.Queue()
+        deadline = time.time() + 1 + args.seconds
+        procs = [ctx.Process(target=worker, args=(reader, (tenant_id, i, deadline), queue))
+                 for i in range(args.readers)]
+        procs += [ctx.Process(target=worker, args=(writer, (tenant_id, i, deadline, writer_ids[i],
+                                                            free[i::args.writers]), queue))
+                  for i in range(args.writers)]
+        for p in procs:
+            p.start()
+        latencies = {'reader': [], 'writer': []}
+        errors = {}
+        for _ in procs:
+            kind, values, errs = queue.get()
+            latencies[kind] += values
+            for name, n in errs.items():
+                errors[name] = errors.get(name, 0) + n
+        for p in procs:
+            p.join()
+
+        return {
+            'journal_mode': journal,
+            'reads_per_s': round(len(latencies['reader']) / args.seconds, 1),
+            'writes_per_s': round(len(latencies['writer']) / args.seconds, 1),
+            'read_p50_ms': percentile(latencies['reader'], 50),
+            'read_p95_ms': percentile(latencies['reader'], 95),
+            'write_p50_ms': percentile(latencies['writer'], 50),
+            'write_p95_ms': percentile(latencies['writer'], 95),
+            'errors': errors,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--years', type=float, default=1.0, help='veri seti geçmişi')
+    parser.add_argument('--members', type=int, default=200)
+    parser.add_argument('--mode', choices=['default', 'tuned', 'both'], default='both')
+    args = parser.parse_args()
+
+    modes = ['default', 'tuned'] if args.mode == 'both' else [args.mode]
+    report = {'readers': args.readers, 'writers': args.writers, 'seconds': args.seconds}
+    for mode in modes:
+        report[mode] = run(mode, args)
+    print(json.dumps(report))
+
+
+if __name__ == '__main__':
+    main()
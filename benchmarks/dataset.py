@@ -0,0 +1,83 @@
+"""
+Benchmark'lar için sentetik çok stüdyolu veri seti. Aynı parametreler ve
+seed ile her seferinde aynı veri üretilir; kayıtlar ORM'e uğramadan Core
+toplu INSERT'lerle parça parça yazılır, milyonlarca rezervasyon bellekte
+tutulmaz.
+"""
+import random
+from datetime import date, datetime, timedelta, time as dtime
+
+from sqlalchemy import func, insert, literal, select
+
+
+def build_dataset(tenants=3, members=200, years=2.0, days_ahead=28, sessions_per_day=6,
+                  capacity=6, fill=0.8, open_days=2, seed=42):
+    """
+    `tenants` stüdyo, her birinde `members` üye ve bugünden `years` yıl geriye,
+    `days_ahead` gün ileriye günde `sessions_per_day` seans açar. Seansların
+    `fill` oranı dolu olur. Son `open_days` günün seansları kapatılmamış
+    bırakılır (seans kapatma işine iş kalsın diye). Uygulama bağlamında
+    çağrılmalıdır; üretilen kayıt sayılarını döndürür.
+    """
+    from app.models import db, Tenant, Member, Session, Reservation, Attendance, CloseWatermark
+    from app.bulk import bulk_insert
+
+    rng = random.Random(seed)
+    now = datetime.now()
+    today = date.today()
+    first_day = today - timedelta(days=int(years * 365))
+    close_until = datetime.combine(today - timedelta(days=open_days), dtime(0, 0))
+    per_session = max(0, min(capacity, round(capacity * fill)))
+    hours = [dtime(8 + i * 14 // max(sessions_per_day, 1), 0) for i in range(sessions_per_day)]
+    counts = {'tenants': tenants, 'members': 0, 'sessions': 0, 'reservations': 0}
+
+    for t in range(tenants):
+        tenant = Tenant(name=f'Bench Stüdyo {t}', domain_prefix=f'bench{t}')
+        db.session.add(tenant)
+        db.session.flush()
+        tid = tenant.id
+
+        names = [f'Üye {t}-{i}' for i in range(members)]
+        counts['members'] += bulk_insert(Member.__table__, (
+            {'tenant_id': tid, 'full_name': n, 'name_key': Member.name_key_for(n),
+             'credits': 1_000, 'created_at': now}
+            for n in names
+        ))
+        member_ids = list(db.session.scalars(select(Member.id).where(Member.tenant_id == tid).order_by(Member.id)))
+
+        def slots():
+            day = first_day
+            while day <= today + timedelta(days=days_ahead):
+                for h in hours:
+                    yield day, h
+                day += timedelta(days=1)
+
+        counts['sessions'] += bulk_insert(Session.__table__, (
+            {'tenant_id': tid, 'date': d, 'time': h, 'capacity': capacity, 'spots_left': capacity - per_session,
+             'is_recurring': False, 'completed': datetime.combine(d, h) < close_until, 'is_reserved': False}
+            for d, h in slots()
+        ))
+        sessions = db.session.execute(
+            select(Session.id, Session.date, Session.time, Session.completed)
+            .where(Session.tenant_id == tid).order_by(Session.date, Session.time)
+        ).all()
+
+        def reservations():
+            for sid, d, h, completed in sessions:
+                for idx in rng.sample(range(members), per_session):
+                    yield {'tenant_id': tid, 'user_name': names[idx], 'member_id': member_ids[idx],
+                           'session_id': sid, 'status': 'attended' if completed else 'active',
+                           'cancel_status': 'none', 'created_at': now, 'updated_at': now}
+        counts['reservations'] += bulk_insert(Reservation.__table__, reservations())
+
+        # Kapatılmış seansların katılım özeti tek INSERT ... SELECT ile
+        db.session.execute(insert(Attendance).from_select(
+            ['tenant_id', 'member_id', 'date', 'status', 'count'],
+            select(Reservation.tenant_id, Reservation.member_id, Session.date, literal('attended'), func.count())
+            .join(Session, Session.id == Reservation.session_id)
+            .where(Reservation.tenant_id == tid, Reservation.status == 'attended')
+            .group_by(Reservation.tenant_id, Reservation.member_id, Session.date)
+        ))
+        db.session.add(CloseWatermark(tenant_id=tid, closed_until=close_until))
+        db.session.commit()
+    return counts
@@ -0,0 +1,28 @@
+"""admin seans listesi için ix_sessions_tenant_open_keyset indeksi
+
+Revision ID: a1c5e8b3d9f4
+Revises: f2b7d4c8e1a6
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c5e8b3d9f4'
+down_revision = 'f2b7d4c8e1a6'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_sessions_tenant_open_keyset'
+
+
+def upgrade():
+    if INDEX_NAME not in {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('sessions')}:
+        op.create_index(INDEX_NAME, 'sessions',
+                        ['tenant_id', 'completed', 'is_recurring', 'date', 'time', 'id'])
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, table_name='sessions')
@@ -0,0 +1,172 @@
+"""reservations.member_id kolonu ve aktif rezervasyon tekil indeksi
+
+Sıra: boş değer kabul eden kolon ve indeksi, isimden (name_key) partili
+doldurma, aynı seansta aynı üyenin birden fazla aktif kaydının ayıklanması,
+kısmi tekil indeks (session_id, member_id) WHERE status = 'active'.
+
+Eşleşmeyen (silinmiş / adı değişmiş üye) kayıtlar boş kalır; üyeler
+düzeltildikten sonra `flask backfill-member-ids` aynı doldurmayı uygulama
+çalışırken tekrar yapar.
+
+Çift aktif kayıtlardan en eskisi korunur, diğerleri iptal edilip koltuğu
+seansa iade edilir ve loglanır.
+
+Revision ID: a7f3c9d2e1b4
+Revises: c4d1e8a2f6b3
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models import Member
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7f3c9d2e1b4'
+down_revision = 'c4d1e8a2f6b3'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+BATCH_SIZE = 1000
+FK_NAME = 'fk_reservations_member_id_members'
+INDEX_NAME = 'ix_reservations_member_id'
+ACTIVE_INDEX = 'uq_reservation_active'
+ACTIVE_COLUMNS = ['session_id', 'member_id']
+
+reservations = sa.table(
+    'reservations',
+    sa.column('id', sa.Integer),
+    sa.column('tenant_id', sa.Integer),
+    sa.column('user_name', sa.String),
+    sa.column('member_id', sa.Integer),
+    sa.column('session_id', sa.Integer),
+    sa.column('status', sa.String),
+    sa.column('cancel_reason', sa.Text),
+)
+members = sa.table(
+    'members',
+    sa.column('id', sa.Integer),
+    sa.column('tenant_id', sa.Integer),
+    sa.column('name_key', sa.String),
+)
+sessions = sa.table(
+    'sessions',
+    sa.column('id', sa.Integer),
+    sa.column('capacity', sa.Integer),
+    sa.column('spots_left', sa.Integer),
+)
+
+
+def _backfill(bind):
+    """member_id'si boş rezervasyonları id sırasıyla BATCH_SIZE'lık partilerle üyeye bağlar."""
+    last_id, linked = 0, 0
+    while True:
+        rows = bind.execute(
+            sa.select(reservations.c.id, reservations.c.tenant_id, reservations.c.user_name)
+            .where(reservations.c.id > last_id, reservations.c.member_id.is_(None))
+            .order_by(reservations.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return linked
+        keys = {(t, Member.name_key_for(n)) for _, t, n in rows}
+        found = {}
+        for tenant_id in {t for t, _ in keys}:
+            names = [k for t, k in keys if t == tenant_id]
+            for mid, key in bind.execute(
+                sa.select(members.c.id, members.c.name_key)
+                .where(members.c.tenant_id == tenant_id, members.c.name_key.in_(names))
+            ):
+                found[(tenant_id, key)] = mid
+        params = [
+            {'rid': rid, 'mid': found[(t, Member.name_key_for(n))]}
+            for rid, t, n in rows if (t, Member.name_key_for(n)) in found
+        ]
+        if params:
+            bind.execute(
+                reservations.update().where(reservations.c.id == sa.bindparam('rid'))
+                .values(member_id=sa.bindparam('mid')),
+                params,
+            )
+        linked += len(params)
+        last_id = rows[-1][0]
+
+
+def _cancel_duplicates(bind):
+    """Aynı seansta aynı üyenin fazladan aktif kayıtlarını iptal eder, koltuklarını iade eder."""
+    groups = bind.execute(
+        sa.select(reservations.c.session_id, reservations.c.member_id)
+        .where(reservations.c.status == 'active', reservations.c.member_id.isnot(None))
+        .group_by(reservations.c.session_id, reservations.c.member_id)
+        .having(sa.func.count() > 1)
+    ).all()
+    for session_id, member_id in groups:
+        ids = bind.execute(
+            sa.select(reservations.c.id)
+            .where(reservations.c.session_id == session_id, reservations.c.member_id == member_id,
+                   reservations.c.status == 'active')
+            .order_by(reservations.c.id)
+        ).scalars().all()
+        keep_id, extra = ids[0], ids[1:]
+        logger.warning(
+            "çift aktif rezervasyon: seans=%s üye=%s korunan=%s iptal edilen=%s",
+            session_id, member_id, keep_id, ", ".join(map(str, extra)),
+        )
+        bind.execute(
+            reservations.update().where(reservations.c.id.in_(extra))
+            .values(status='canceled', cancel_reason='Çift kayıt (göç sırasında iptal edildi)')
+        )
+        refunded = sessions.c.spots_left + len(extra)
+        bind.execute(
+            sessions.update().where(sessions.c.id == session_id)
+            .values(spots_left=sa.case((refunded > sessions.c.capacity, sessions.c.capacity), else_=refunded))
+        )
+    return len(groups)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {c['name'] for c in inspector.get_columns('reservations')}
+    indexes = {ix['name']: ix for ix in inspector.get_indexes('reservations')}
+
+    # 1. Kolon (boş değer kabul eder) ve indeksi
+    if 'member_id' not in columns:
+        with op.batch_alter_table('reservations') as batch_op:
+            batch_op.add_column(sa.Column('member_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(FK_NAME, 'members', ['member_id'], ['id'], ondelete='SET NULL')
+    if INDEX_NAME not in indexes:
+        op.create_index(INDEX_NAME, 'reservations', ['member_id'])
+
+    # 2. Partili doldurma, 3. çift aktif kayıtların ayıklanması
+    linked = _backfill(bind)
+    duplicates = _cancel_duplicates(bind)
+    unmatched = bind.execute(
+        sa.select(sa.func.count()).select_from(reservations).where(reservations.c.member_id.is_(None))
+    ).scalar()
+    logger.info("member_id: %d rezervasyon bağlandı, %d eşleşmedi, %d çift kayıt grubu ayıklandı",
+                linked, unmatched, duplicates)
+
+    # 4. Kısmi tekil indeks (eski isim bazlı sürümü varsa yenisiyle değiştirilir)
+    active = indexes.get(ACTIVE_INDEX)
+    if active is not None and active['column_names'] != ACTIVE_COLUMNS:
+        op.drop_index(ACTIVE_INDEX, table_name='reservations')
+        active = None
+    if active is None:
+        op.create_index(
+            ACTIVE_INDEX, 'reservations', ACTIVE_COLUMNS, unique=True,
+            sqlite_where=sa.text("status = 'active'"),
+            postgresql_where=sa.text("status = 'active'"),
+        )
+
+
+def downgrade():
+    op.drop_index(ACTIVE_INDEX, table_name='reservations')
+    op.drop_index(INDEX_NAME, table_name='reservations')
+    with op.batch_alter_table('reservations') as batch_op:
+        batch_op.drop_column('member_id')
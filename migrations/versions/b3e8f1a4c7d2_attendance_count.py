@@ -0,0 +1,87 @@
+"""attendance.count kolonu ve (tenant_id, member_id, date, status) tekilliği
+
+Eski tabloda her satır tek bir katılımdı; kolon bu yüzden 1 ile doldurulur.
+Aynı üye-gün-durum için birden fazla satır varsa en eskisi tutulur, adetler
+onda toplanır, diğerleri silinir ve loglanır. Sonra tekil kısıt kurulur.
+
+Özet rezervasyonlardan da baştan hesaplanabilir: `flask rebuild-attendance`.
+
+Revision ID: b3e8f1a4c7d2
+Revises: a7f3c9d2e1b4
+Create Date: 2026-10-18 12:20:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8f1a4c7d2'
+down_revision = 'a7f3c9d2e1b4'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+CONSTRAINT_NAME = 'uq_attendance_member_day'
+KEY_COLUMNS = ['tenant_id', 'member_id', 'date', 'status']
+
+attendance = sa.table(
+    'attendance',
+    sa.column('id', sa.Integer),
+    sa.column('tenant_id', sa.Integer),
+    sa.column('member_id', sa.Integer),
+    sa.column('date', sa.Date),
+    sa.column('status', sa.String),
+    sa.column('count', sa.Integer),
+)
+
+
+def _merge_duplicates(bind):
+    """Aynı anahtara düşen satırları en eskisinde toplar, diğerlerini siler."""
+    key = [attendance.c[name] for name in KEY_COLUMNS]
+    groups = bind.execute(
+        sa.select(*key, sa.func.min(attendance.c.id), sa.func.sum(attendance.c.count), sa.func.count())
+        .group_by(*key)
+        .having(sa.func.count() > 1)
+    ).all()
+    for tenant_id, member_id, day, status, keep_id, total, rows in groups:
+        logger.warning(
+            "çift katılım satırı: stüdyo=%s üye=%s gün=%s durum=%s satır=%d toplam=%d korunan=%s",
+            tenant_id, member_id, day, status, rows, total, keep_id,
+        )
+        match = [c == v for c, v in zip(key, (tenant_id, member_id, day, status))]
+        bind.execute(attendance.update().where(attendance.c.id == keep_id).values(count=total))
+        bind.execute(attendance.delete().where(*match, attendance.c.id != keep_id))
+    return len(groups)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {c['name'] for c in inspector.get_columns('attendance')}
+    constraints = {uc['name'] for uc in inspector.get_unique_constraints('attendance')}
+    constraints |= {ix['name'] for ix in inspector.get_indexes('attendance') if ix['unique']}
+
+    # 1. Kolon: mevcut satırların her biri tek katılım sayılır
+    if 'count' not in columns:
+        op.add_column('attendance', sa.Column('count', sa.Integer(), nullable=False, server_default='1'))
+
+    # 2. Çift satırların birleştirilmesi, 3. tekil kısıt
+    merged = _merge_duplicates(bind)
+    logger.info("attendance: %d çift satır grubu birleştirildi", merged)
+
+    with op.batch_alter_table('attendance') as batch_op:
+        if 'count' not in columns:
+            batch_op.alter_column('count', existing_type=sa.Integer(), existing_nullable=False,
+                                  server_default=None)
+        if CONSTRAINT_NAME not in constraints:
+            batch_op.create_unique_constraint(CONSTRAINT_NAME, KEY_COLUMNS)
+
+
+def downgrade():
+    with op.batch_alter_table('attendance') as batch_op:
+        batch_op.drop_constraint(CONSTRAINT_NAME, type_='unique')
+        batch_op.drop_column('count')
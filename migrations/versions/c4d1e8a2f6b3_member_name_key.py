@@ -0,0 +1,119 @@
+"""members.name_key kolonu ve (tenant_id, name_key) tekil indeksi
+
+Sıra: boş değer kabul eden kolon, partili doldurma, çakışma raporu, NOT NULL
+ve tekil indeks.
+
+Mevcut veritabanları e05709b9e5ea (başlangıç şeması) ile damgalı;
+create_all ile kurulmuş yeni veritabanlarında da çalışır: kolon/indeks
+zaten varsa ilgili adım atlanır.
+
+Aynı stüdyoda anahtarı çakışan (büyük/küçük harf, boşluk, I/İ farkı olan)
+üyelerden en eskisi anahtarı korur; diğerlerinin anahtarına "#<id>" eklenir
+ve hepsi loglanır. Bu kayıtlar admin panelinden elle birleştirilmelidir.
+
+Revision ID: c4d1e8a2f6b3
+Revises: e05709b9e5ea
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models import Member
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d1e8a2f6b3'
+down_revision = 'e05709b9e5ea'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+BATCH_SIZE = 1000
+KEY_LENGTH = 120
+INDEX_NAME = 'uq_tenant_member_name_key'
+
+members = sa.table(
+    'members',
+    sa.column('id', sa.Integer),
+    sa.column('tenant_id', sa.Integer),
+    sa.column('full_name', sa.String),
+    sa.column('name_key', sa.String),
+)
+
+
+def _backfill(bind):
+    """name_key'i boş satırları id sırasıyla BATCH_SIZE'lık partilerle doldurur."""
+    last_id, filled = 0, 0
+    while True:
+        rows = bind.execute(
+            sa.select(members.c.id, members.c.full_name)
+            .where(members.c.id > last_id, members.c.name_key.is_(None))
+            .order_by(members.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return filled
+        bind.execute(
+            members.update().where(members.c.id == sa.bindparam('mid')).values(name_key=sa.bindparam('key')),
+            [{'mid': mid, 'key': Member.name_key_for(name)} for mid, name in rows],
+        )
+        filled += len(rows)
+        last_id = rows[-1][0]
+
+
+def _separate_collisions(bind):
+    """Stüdyo içinde aynı anahtara düşen üyeleri raporlar ve tekil indeks kurulabilsin diye ayırır."""
+    groups = bind.execute(
+        sa.select(members.c.tenant_id, members.c.name_key)
+        .group_by(members.c.tenant_id, members.c.name_key)
+        .having(sa.func.count() > 1)
+    ).all()
+    for tenant_id, key in groups:
+        rows = bind.execute(
+            sa.select(members.c.id, members.c.full_name)
+            .where(members.c.tenant_id == tenant_id, members.c.name_key == key)
+            .order_by(members.c.id)
+        ).all()
+        (keep_id, keep_name), others = rows[0], rows[1:]
+        logger.warning(
+            "name_key çakışması: stüdyo=%s anahtar=%r korunan=%s (%s) ayrılan=%s",
+            tenant_id, key, keep_id, keep_name, ", ".join(f"{mid} ({name})" for mid, name in others),
+        )
+        for mid, _ in others:
+            suffix = f"#{mid}"
+            bind.execute(
+                members.update().where(members.c.id == mid)
+                .values(name_key=key[:KEY_LENGTH - len(suffix)] + suffix)
+            )
+    return len(groups)
+
+
+def upgrade():
+    bind = op.get_bind()
+    columns = {c['name']: c for c in sa.inspect(bind).get_columns('members')}
+
+    # 1. Kolon önce boş değer kabul ederek eklenir (mevcut satırlar için)
+    if 'name_key' not in columns:
+        op.add_column('members', sa.Column('name_key', sa.String(KEY_LENGTH), nullable=True))
+
+    # 2. Partiler halinde doldurma, 3. çakışma raporu
+    filled = _backfill(bind)
+    collisions = _separate_collisions(bind)
+    logger.info("name_key: %d üye dolduruldu, %d çakışma grubu ayrıldı", filled, collisions)
+
+    # 4. NOT NULL ve tekil indeks
+    if columns.get('name_key', {'nullable': True})['nullable']:
+        with op.batch_alter_table('members') as batch_op:
+            batch_op.alter_column('name_key', existing_type=sa.String(KEY_LENGTH), nullable=False)
+    if INDEX_NAME not in {ix['name'] for ix in sa.inspect(bind).get_indexes('members')}:
+        op.create_index(INDEX_NAME, 'members', ['tenant_id', 'name_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, table_name='members')
+    with op.batch_alter_table('members') as batch_op:
+        batch_op.drop_column('name_key')
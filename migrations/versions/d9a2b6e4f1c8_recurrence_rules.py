@@ -0,0 +1,196 @@
+"""tekrar kuralı tabloları ve (tenant_id, date, time) tekil seans indeksi
+
+recurrence_rules / recurrence_members / recurrence_exceptions ve ETag için
+recurrence_versions tabloları kurulur.
+
+Tekil indeksten önce aynı stüdyoda aynı gün/saate düşen seanslar bulunur:
+en eskisi tutulur, diğerlerinin rezervasyonları ona taşınır (üyenin orada
+zaten aktif kaydı varsa taşınan kayıt iptal edilir), boş kalan seanslar
+silinir ve her birleştirme loglanır. Kalan koltuk sayısı dolu kayıtlardan
+yeniden hesaplanır.
+
+Eski (tekil olmayan) ix_sessions_tenant_date_time indeksi varsa kaldırılır.
+
+Revision ID: d9a2b6e4f1c8
+Revises: b3e8f1a4c7d2
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9a2b6e4f1c8'
+down_revision = 'b3e8f1a4c7d2'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+SLOT_INDEX = 'uq_sessions_tenant_date_time'
+OLD_SLOT_INDEX = 'ix_sessions_tenant_date_time'
+HORIZON_INDEX = 'ix_recurrence_rules_tenant_horizon'
+# Koltuk tutmayan rezervasyon durumları
+RELEASED = ('canceled', 'moved')
+
+sessions = sa.table(
+    'sessions',
+    sa.column('id', sa.Integer),
+    sa.column('tenant_id', sa.Integer),
+    sa.column('date', sa.Date),
+    sa.column('time', sa.Time),
+    sa.column('capacity', sa.Integer),
+    sa.column('spots_left', sa.Integer),
+    sa.column('completed', sa.Boolean),
+)
+reservations = sa.table(
+    'reservations',
+    sa.column('id', sa.Integer),
+    sa.column('session_id', sa.Integer),
+    sa.column('member_id', sa.Integer),
+    sa.column('status', sa.String),
+    sa.column('cancel_reason', sa.Text),
+)
+
+
+def _merge_duplicate_slots(bind):
+    """Aynı stüdyo-gün-saatteki seansları en eskisinde birleştirir."""
+    groups = bind.execute(
+        sa.select(sessions.c.tenant_id, sessions.c.date, sessions.c.time)
+        .group_by(sessions.c.tenant_id, sessions.c.date, sessions.c.time)
+        .having(sa.func.count() > 1)
+    ).all()
+    for tenant_id, day, slot in groups:
+        rows = bind.execute(
+            sa.select(sessions.c.id, sessions.c.capacity, sessions.c.completed)
+            .where(sessions.c.tenant_id == tenant_id, sessions.c.date == day, sessions.c.time == slot)
+            .order_by(sessions.c.id)
+        ).all()
+        keep_id, extra = rows[0][0], [r[0] for r in rows[1:]]
+
+        # Hedefte zaten aktif kaydı olan üyelerin taşınan aktif kayıtları iptal edilir
+        booked = sa.select(reservations.c.member_id).where(
+            reservations.c.session_id == keep_id, reservations.c.status == 'active',
+            reservations.c.member_id.isnot(None),
+        )
+        bind.execute(
+            reservations.update()
+            .where(reservations.c.session_id.in_(extra), reservations.c.status == 'active',
+                   reservations.c.member_id.in_(booked))
+            .values(status='canceled', cancel_reason='Çift seans birleştirildi (göç)')
+        )
+        # Aynı üyenin birden fazla çift seanstaki aktif kaydından ilki taşınır
+        for ids in _active_by_member(bind, extra).values():
+            bind.execute(
+                reservations.update().where(reservations.c.id.in_(ids[1:]))
+                .values(status='canceled', cancel_reason='Çift seans birleştirildi (göç)')
+            )
+        moved = bind.execute(
+            reservations.update().where(reservations.c.session_id.in_(extra)).values(session_id=keep_id)
+        ).rowcount
+        bind.execute(sessions.delete().where(sessions.c.id.in_(extra)))
+
+        occupied = bind.execute(
+            sa.select(sa.func.count()).select_from(reservations)
+            .where(reservations.c.session_id == keep_id, reservations.c.status.notin_(RELEASED))
+        ).scalar()
+        capacity = max(r[1] for r in rows)
+        bind.execute(
+            sessions.update().where(sessions.c.id == keep_id).values(
+                capacity=capacity,
+                spots_left=max(capacity - occupied, 0),
+                completed=any(r[2] for r in rows),
+            )
+        )
+        logger.warning(
+            "çift seans: stüdyo=%s %s %s korunan=%s silinen=%s taşınan kayıt=%d",
+            tenant_id, day, slot, keep_id, ", ".join(map(str, extra)), moved,
+        )
+    return len(groups)
+
+
+def _active_by_member(bind, session_ids):
+    by_member = {}
+    for rid, member_id in bind.execute(
+        sa.select(reservations.c.id, reservations.c.member_id)
+        .where(reservations.c.session_id.in_(session_ids), reservations.c.status == 'active',
+               reservations.c.member_id.isnot(None))
+        .order_by(reservations.c.id)
+    ):
+        by_member.setdefault(member_id, []).append(rid)
+    return {m: ids for m, ids in by_member.items() if len(ids) > 1}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if 'recurrence_rules' not in tables:
+        op.create_table(
+            'recurrence_rules',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('tenant_id', sa.Integer(), nullable=False),
+            sa.Column('group_id', sa.String(length=36), nullable=False),
+            sa.Column('frequency', sa.Enum('weekly', 'biweekly', 'monthly', name='recurrence_frequency'),
+                      nullable=False),
+            sa.Column('start_date', sa.Date(), nullable=False),
+            sa.Column('time', sa.Time(), nullable=False),
+            sa.Column('until', sa.Date(), nullable=True),
+            sa.Column('capacity', sa.Integer(), nullable=False),
+            sa.Column('notes', sa.String(length=255), nullable=True),
+            sa.Column('materialized_until', sa.Date(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.CheckConstraint('capacity >= 1'),
+            sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('group_id'),
+        )
+        op.create_index(HORIZON_INDEX, 'recurrence_rules', ['tenant_id', 'is_active', 'materialized_until'])
+    if 'recurrence_members' not in tables:
+        op.create_table(
+            'recurrence_members',
+            sa.Column('rule_id', sa.Integer(), nullable=False),
+            sa.Column('member_id', sa.Integer(), nullable=False),
+            sa.Column('position', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['member_id'], ['members.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['rule_id'], ['recurrence_rules.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('rule_id', 'member_id'),
+        )
+    if 'recurrence_exceptions' not in tables:
+        op.create_table(
+            'recurrence_exceptions',
+            sa.Column('rule_id', sa.Integer(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.ForeignKeyConstraint(['rule_id'], ['recurrence_rules.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('rule_id', 'date'),
+        )
+    if 'recurrence_versions' not in tables:
+        op.create_table(
+            'recurrence_versions',
+            sa.Column('tenant_id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('tenant_id'),
+        )
+
+    indexes = {ix['name'] for ix in inspector.get_indexes('sessions')}
+    if SLOT_INDEX not in indexes:
+        merged = _merge_duplicate_slots(bind)
+        logger.info("sessions: %d çift seans grubu birleştirildi", merged)
+        if OLD_SLOT_INDEX in indexes:
+            op.drop_index(OLD_SLOT_INDEX, table_name='sessions')
+        op.create_index(SLOT_INDEX, 'sessions', ['tenant_id', 'date', 'time'], unique=True)
+
+
+def downgrade():
+    op.drop_index(SLOT_INDEX, table_name='sessions')
+    op.drop_table('recurrence_versions')
+    op.drop_table('recurrence_exceptions')
+    op.drop_table('recurrence_members')
+    op.drop_index(HORIZON_INDEX, table_name='recurrence_rules')
+    op.drop_table('recurrence_rules')
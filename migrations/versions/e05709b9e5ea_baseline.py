@@ -0,0 +1,142 @@
+"""başlangıç şeması (instance/pilates.db bu revizyonla damgalı)
+
+Mevcut veritabanları zaten bu şemayla kurulu ve e05709b9e5ea ile damgalı;
+onlar için bu adım hiçbir şey yapmaz. Boş bir veritabanında ise tabloları
+ilk sürümdeki haliyle kurar, sonraki göçler bunun üstüne eklenir.
+
+Revision ID: e05709b9e5ea
+Revises:
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e05709b9e5ea'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+RESERVATION_STATUSES = ('active', 'canceled', 'moved', 'attended', 'no_show')
+CANCEL_STATUSES = ('none', 'pending', 'approved', 'rejected')
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'tenants' not in existing:
+        op.create_table(
+            'tenants',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('domain_prefix', sa.String(length=50), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('domain_prefix'),
+            sa.UniqueConstraint('name'),
+        )
+
+    if 'members' not in existing:
+        op.create_table(
+            'members',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('tenant_id', sa.Integer(), nullable=False),
+            sa.Column('full_name', sa.String(length=120), nullable=False),
+            sa.Column('credits', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('tenant_id', 'full_name', name='uq_tenant_member_name'),
+        )
+        op.create_index('ix_members_full_name', 'members', ['full_name'])
+        op.create_index('ix_members_tenant_id', 'members', ['tenant_id'])
+
+    if 'sessions' not in existing:
+        op.create_table(
+            'sessions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('tenant_id', sa.Integer(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('time', sa.Time(), nullable=False),
+            sa.Column('capacity', sa.Integer(), nullable=False),
+            sa.Column('spots_left', sa.Integer(), nullable=False),
+            sa.Column('notes', sa.String(length=255), nullable=True),
+            sa.Column('is_recurring', sa.Boolean(), nullable=False),
+            sa.Column('recur_group_id', sa.String(length=36), nullable=True),
+            sa.Column('completed', sa.Boolean(), nullable=False),
+            sa.Column('is_reserved', sa.Boolean(), nullable=False),
+            sa.CheckConstraint('capacity >= 0'),
+            sa.CheckConstraint('spots_left <= capacity'),
+            sa.CheckConstraint('spots_left >= 0'),
+            sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_sessions_completed', 'sessions', ['completed'])
+        op.create_index('ix_sessions_date', 'sessions', ['date'])
+        op.create_index('ix_sessions_tenant_id', 'sessions', ['tenant_id'])
+
+    if 'attendance' not in existing:
+        op.create_table(
+            'attendance',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('tenant_id', sa.Integer(), nullable=False),
+            sa.Column('member_id', sa.Integer(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.ForeignKeyConstraint(['member_id'], ['members.id']),
+            sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_attendance_date', 'attendance', ['date'])
+        op.create_index('ix_attendance_member_id', 'attendance', ['member_id'])
+        op.create_index('ix_attendance_tenant_id', 'attendance', ['tenant_id'])
+
+    if 'measurements' not in existing:
+        op.create_table(
+            'measurements',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('tenant_id', sa.Integer(), nullable=False),
+            sa.Column('member_id', sa.Integer(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('weight', sa.Float(), nullable=False),
+            sa.Column('waist', sa.Float(), nullable=True),
+            sa.Column('hip', sa.Float(), nullable=True),
+            sa.Column('chest', sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(['member_id'], ['members.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_measurements_member_id', 'measurements', ['member_id'])
+        op.create_index('ix_measurements_tenant_id', 'measurements', ['tenant_id'])
+
+    if 'reservations' not in existing:
+        op.create_table(
+            'reservations',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('tenant_id', sa.Integer(), nullable=False),
+            sa.Column('user_name', sa.String(length=120), nullable=False),
+            sa.Column('session_id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.Enum(*RESERVATION_STATUSES, name='reservation_status'), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('cancel_reason', sa.Text(), nullable=True),
+            sa.Column('cancel_status', sa.Enum(*CANCEL_STATUSES, name='cancel_status'), nullable=False),
+            sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_reservations_session_id', 'reservations', ['session_id'])
+        op.create_index('ix_reservations_tenant_id', 'reservations', ['tenant_id'])
+        op.create_index('ix_reservations_user_name', 'reservations', ['user_name'])
+
+
+def downgrade():
+    op.drop_table('reservations')
+    op.drop_table('measurements')
+    op.drop_table('attendance')
+    op.drop_table('sessions')
+    op.drop_table('members')
+    op.drop_table('tenants')
@@ -0,0 +1,45 @@
+"""close_watermarks ve job_leases tabloları
+
+Kapatma sınırı olmayan stüdyolar ilk çalışmada baştan taranır ve sınırları
+o an oluşturulur; bu yüzden tablo boş kurulur.
+
+Revision ID: e6c3a9f2b5d7
+Revises: d9a2b6e4f1c8
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6c3a9f2b5d7'
+down_revision = 'd9a2b6e4f1c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'close_watermarks' not in tables:
+        op.create_table(
+            'close_watermarks',
+            sa.Column('tenant_id', sa.Integer(), nullable=False),
+            sa.Column('closed_until', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('tenant_id'),
+        )
+    if 'job_leases' not in tables:
+        op.create_table(
+            'job_leases',
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('holder', sa.String(length=100), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('name'),
+        )
+
+
+def downgrade():
+    op.drop_table('job_leases')
+    op.drop_table('close_watermarks')
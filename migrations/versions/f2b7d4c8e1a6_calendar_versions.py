@@ -0,0 +1,34 @@
+"""calendar_versions tablosu
+
+Satırı olmayan stüdyo-hafta 0 sürümünde sayılır; tablo boş kurulur.
+
+Revision ID: f2b7d4c8e1a6
+Revises: e6c3a9f2b5d7
+Create Date: 2026-10-18 12:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7d4c8e1a6'
+down_revision = 'e6c3a9f2b5d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'calendar_versions' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'calendar_versions',
+            sa.Column('tenant_id', sa.Integer(), nullable=False),
+            sa.Column('week_start', sa.Date(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('tenant_id', 'week_start'),
+        )
+
+
+def downgrade():
+    op.drop_table('calendar_versions')
@@ -1,131 +1,212 @@
+"""
+Demo / yük testi verisi üretir. Her stüdyoya üyeler, geçmiş ve gelecek
+seanslar, rezervasyonlar, katılım özetleri ve demo kullanıcı için ölçümler
+eklenir. Kayıtlar ORM yerine Core toplu INSERT'lerle (executemany) parça
+parça yazılır; aynı parametre ve --seed ile her seferinde aynı veri çıkar.
+
+    python seed_demo.py                                   # küçük demo (tek stüdyo: /nil)
+    python seed_demo.py --tenants 10 --members 500 --sessions-per-day 8 --days 730 --booking-rate 0.8
+"""
+import argparse
+import math
 import random
+import time
 from datetime import date, datetime, timedelta, time as dtime
+
+from sqlalchemy import func, insert, literal, select, text, update
+
 from app import create_app
-from app.models import db, Member, Session, Reservation, Measurement
+from app.bulk import bulk_insert, db_value, driver_insert
+from app.models import db, Tenant, Member, Session, Reservation, Measurement, Attendance, CloseWatermark
+
+NAMES = [
+    "Zeynep Kaya", "Ayşe Yılmaz", "Mehmet Demir", "Ali Çelik",
+    "Fatma Şahin", "Mustafa Öztürk", "Emine Arslan", "Burak Doğan",
+    "Selin Yıldız", "Canan Koç", "Derya Bulut", "Eren Kara",
+    "Gamze Tekin", "Hakan Yavuz", "İrem Polat", "Kemal Sönmez",
+    "Leyla Aksoy", "Mert Güler", "Nilüfer Çetin", "Ozan Baş",
+]
+DEMO_USER = NAMES[0]
+
+# Geçmiş seanslardaki rezervasyonların akıbeti (kalan oran 'attended')
+CANCEL_RATE = 0.08
+NO_SHOW_RATE = 0.04
+
+# Tablodaki sırayla (derlenen INSERT'le aynı sıra, yeniden sıralama gerekmez)
+SESSION_COLUMNS = ['tenant_id', 'date', 'time', 'capacity', 'spots_left', 'is_recurring', 'completed',
+                   'is_reserved']
+RESERVATION_COLUMNS = ['tenant_id', 'user_name', 'member_id', 'session_id', 'status', 'created_at',
+                       'updated_at', 'cancel_status']
+
+
+def member_names(count):
+    """İlk 20 isim gerçekçi, sonrası numaralı; hepsi stüdyo içinde tekil."""
+    names = NAMES[:count]
+    names += [f"{NAMES[i % len(NAMES)]} {i // len(NAMES)}" for i in range(len(names), count)]
+    return names
+
+
+def day_times(per_day):
+    """08:00-21:00 arasına eşit aralıklı seans saatleri."""
+    step = 13 * 60 // max(per_day - 1, 1)
+    return [dtime(8 + (i * step) // 60, (i * step) % 60) for i in range(per_day)]
+
+
+def seed_tenant(index, args, rng):
+    now = datetime.now()
+    today = date.today()
+    prefix = 'nil' if index == 0 else f'studio{index + 1}'
+    tenant = Tenant(name='Nil Pilates' if index == 0 else f'Stüdyo {index + 1}', domain_prefix=prefix)
+    db.session.add(tenant)
+    db.session.flush()
+    tid = tenant.id
+
+    # --- 1. Üyeler ---
+    names = member_names(args.members)
+    bulk_insert(Member.__table__, (
+        {'tenant_id': tid, 'full_name': n, 'name_key': Member.name_key_for(n),
+         'credits': rng.randint(0, 20), 'created_at': now}
+        for n in names
+    ), args.chunk_size)
+    member_ids = list(db.session.scalars(select(Member.id).where(Member.tenant_id == tid).order_by(Member.id)))
+
+    # --- 2. Seanslar (pazar tatil) ---
+    times = day_times(args.sessions_per_day)
+    first_day = today - timedelta(days=args.days)
+    last_day = today + timedelta(days=args.days_ahead)
 
-# Uygulamayı başlat
-app = create_app()
+    time_values = [db_value(Session.__table__.c.time, t) for t in times]
 
-def seed_data():
+    def sessions():
+        day = first_day
+        while day <= last_day:
+            if day.weekday() != 6:
+                day_value = db_value(Session.__table__.c.date, day)
+                for t, t_value in zip(times, time_values):
+                    yield (tid, day_value, t_value, args.capacity, args.capacity, False,
+                           datetime.combine(day, t) < now, False)
+            day += timedelta(days=1)
+    session_count = driver_insert(Session.__table__, SESSION_COLUMNS, sessions(), args.chunk_size)
+
+    # --- 3. Rezervasyonlar ---
+    slots = db.session.execute(
+        select(Session.id, Session.date, Session.time, Session.completed)
+        .where(Session.tenant_id == tid).order_by(Session.date, Session.time)
+    ).all()
+    demo_idx = 0  # Zeynep haftada 3 gün 18:00 civarı derse gelsin (grafikler dolu görünsün)
+    evening = min(times, key=lambda t: abs(t.hour - 18))
+    population = range(len(names))
+    # Koltuk başına booking_rate olasılıkla dolu: binom dağılımının normal yaklaşımı
+    mean = args.capacity * args.booking_rate
+    spread = math.sqrt(mean * (1 - args.booking_rate))
+    stamp = db_value(Reservation.__table__.c.created_at, now)
+
+    def reservations():
+        for sid, day, t, completed in slots:
+            booked = min(args.capacity, max(0, round(rng.gauss(mean, spread))))
+            chosen = rng.sample(population, min(booked, len(names)))
+            if day.weekday() in (0, 2, 4) and t == evening and demo_idx not in chosen:
+                if len(chosen) >= args.capacity:
+                    chosen[-1] = demo_idx
+                else:
+                    chosen.append(demo_idx)
+            for idx in chosen:
+                status = 'active'
+                if completed:
+                    roll = rng.random()
+                    status = 'canceled' if roll < CANCEL_RATE else 'no_show' if roll < CANCEL_RATE + NO_SHOW_RATE else 'attended'
+                yield (tid, names[idx], member_ids[idx], sid, status, stamp, stamp, 'none')
+    reservation_count = driver_insert(Reservation.__table__, RESERVATION_COLUMNS, reservations(), args.chunk_size)
+    db.session.add(CloseWatermark(tenant_id=tid, closed_until=now))
+
+    # --- 4. Ölçümler (demo kullanıcı, 2 haftada bir; zamanla zayıflasın) ---
+    weight, waist, hip = 65.0, 75.0, 100.0
+    measurements = []
+    day = first_day
+    while day <= today:
+        measurements.append({'tenant_id': tid, 'member_id': member_ids[demo_idx], 'date': day,
+                             'weight': round(weight, 1), 'waist': round(waist, 1), 'hip': round(hip, 1),
+                             'chest': 90.0})
+        weight -= rng.uniform(0.05, 0.15)
+        waist -= rng.uniform(0.03, 0.12)
+        hip -= rng.uniform(0.03, 0.1)
+        day += timedelta(days=14)
+    bulk_insert(Measurement.__table__, measurements, args.chunk_size)
+
+    db.session.commit()
+    return {'prefix': prefix, 'members': len(names), 'sessions': session_count, 'reservations': reservation_count}
+
+
+def finalize():
+    """Yükleme bittikten sonra türetilen alanlar, tüm stüdyolar için tek seferde."""
+    # Boş yerler tek UPDATE ... FROM (gruplanmış sayım) ile: iptal edilenler koltuk tutmaz
+    taken = (
+        select(Reservation.session_id, func.count().label('n'))
+        .where(Reservation.status.in_(('active', 'attended', 'no_show')))
+        .group_by(Reservation.session_id)
+        .subquery()
+    )
+    db.session.execute(
+        update(Session).where(Session.id == taken.c.session_id).values(spots_left=Session.capacity - taken.c.n)
+        .execution_options(synchronize_session=False)
+    )
+    # Üye-gün katılım özeti tek INSERT ... SELECT ile
+    db.session.execute(insert(Attendance).from_select(
+        ['tenant_id', 'member_id', 'date', 'status', 'count'],
+        select(Reservation.tenant_id, Reservation.member_id, Session.date, literal('attended'), func.count())
+        .join(Session, Session.id == Reservation.session_id)
+        .where(Reservation.status == 'attended')
+        .group_by(Reservation.tenant_id, Reservation.member_id, Session.date)
+    ))
+    db.session.commit()
+
+
+def seed_data(args):
+    app = create_app()
     with app.app_context():
         print("🌱 Veritabanı temizleniyor ve hazırlanıyor...")
-        
-        # Önce eski verileri temizleyelim (İstersen bu kısmı silebilirsin)
         db.drop_all()
         db.create_all()
 
-        # --- 1. ÜYELER (Members) ---
-        print("👤 Üyeler ekleniyor...")
-        names = [
-            "Zeynep Kaya", "Ayşe Yılmaz", "Mehmet Demir", "Ali Çelik", 
-            "Fatma Şahin", "Mustafa Öztürk", "Emine Arslan", "Burak Doğan",
-            "Selin Yıldız", "Canan Koç", "Derya Bulut", "Eren Kara",
-            "Gamze Tekin", "Hakan Yavuz", "İrem Polat", "Kemal Sönmez",
-            "Leyla Aksoy", "Mert Güler", "Nilüfer Çetin", "Ozan Baş"
-        ]
-        
-        members = []
-        for name in names:
-            m = Member(full_name=name, credits=random.randint(0, 20))
-            db.session.add(m)
-            members.append(m)
-        
-        db.session.commit() # ID'leri almak için kaydet
-
-        # --- 2. SEANSLAR (Sessions) - Son 3 ay ve Gelecek 1 ay ---
-        print("📅 Seanslar oluşturuluyor...")
-        sessions = []
-        start_date = date.today() - timedelta(days=90) # 3 ay önce
-        end_date = date.today() + timedelta(days=30)   # 1 ay sonra
-        
-        # Haftanın her günü, günde 3-4 seans
-        curr = start_date
-        while curr <= end_date:
-            # Pazar günleri tatil olsun (Opsiyonel)
-            if curr.weekday() != 6: 
-                # Günde rastgele saatlerde 3 seans
-                times = [dtime(9, 0), dtime(12, 0), dtime(18, 0), dtime(19, 30)]
-                for t in times:
-                    # Geçmiş seanslar tamamlandı, gelecekler açık
-                    is_past = (curr < date.today()) or (curr == date.today() and t < datetime.now().time())
-                    
-                    s = Session(
-                        date=curr,
-                        time=t,
-                        capacity=10,
-                        spots_left=10, # Birazdan rezervasyonlarla düşecek
-                        completed=is_past
-                    )
-                    db.session.add(s)
-                    sessions.append(s)
-            curr += timedelta(days=1)
-        
-        db.session.commit()
-
-        # --- 3. REZERVASYONLAR (Reservations) ---
-        print("🎟️ Rastgele rezervasyonlar yapılıyor...")
-        
-        # Zeynep Kaya (Bizim Demo Kullanıcımız olsun)
-        demo_user = members[0] 
-        
-        for s in sessions:
-            # Her seansa rastgele 0 ile 8 kişi kaydedelim
-            participant_count = random.randint(0, 8)
-            chosen_members = random.sample(members, participant_count)
-            
-            # Demo kullanıcımız (Zeynep) haftada 3-4 derse gelsin (Grafik güzel görünsün)
-            if s.date.weekday() in [0, 2, 4] and s.time.hour == 18: # Pzt, Çar, Cum 18:00
-                if demo_user not in chosen_members:
-                    chosen_members.append(demo_user)
-
-            for m in chosen_members:
-                status = 'attended' if s.completed else 'active'
-                
-                # Bazen gelmemiş olsun (no_show)
-                if s.completed and random.random() < 0.1:
-                    status = 'canceled'
-
-                r = Reservation(
-                    user_name=m.full_name,
-                    session_id=s.id,
-                    status=status
-                )
-                db.session.add(r)
-                s.spots_left -= 1
-        
-        db.session.commit()
-
-        # --- 4. ÖLÇÜMLER (Measurements) - Demo Kullanıcı İçin ---
-        print("📏 Vücut ölçümleri giriliyor...")
-        
-        # Zeynep için son 3 ayda 2 haftada bir ölçüm
-        m_curr = start_date
-        weight = 65.0
-        waist = 75.0
-        hip = 100.0
-        
-        while m_curr <= date.today():
-            measurement = Measurement(
-                member_id=demo_user.id,
-                date=m_curr,
-                weight=round(weight, 1),
-                waist=round(waist, 1),
-                hip=round(hip, 1),
-                chest=90.0
-            )
-            db.session.add(measurement)
-            
-            # Zamanla zayıflasın (Grafik aşağı doğru insin diye)
-            weight -= random.uniform(0.2, 0.5)
-            waist -= random.uniform(0.1, 0.4)
-            hip -= random.uniform(0.1, 0.3)
-            
-            m_curr += timedelta(days=14) # 2 haftada bir
-
-        db.session.commit()
-        
-        print(f"✅ İŞLEM TAMAM! Demo Kullanıcısı: {demo_user.full_name}")
-        print("🚀 Şimdi 'python run.py' diyip Zeynep Kaya ismiyle giriş yapabilirsin.")
+        if db.engine.dialect.name == 'sqlite':
+            # Tek seferlik toplu yükleme: dosyaya her commit'te fsync gerekmez
+            db.session.execute(text('PRAGMA synchronous=OFF'))
+
+        rng = random.Random(args.seed)
+        started = time.perf_counter()
+        total = 0
+        # Rezervasyon indeksleri yükleme boyunca kaldırılır, sonda bir kerede kurulur
+        indexes = list(Reservation.__table__.indexes)
+        for index in indexes:
+            index.drop(db.session.connection())
+        for i in range(args.tenants):
+            result = seed_tenant(i, args, rng)
+            total += result['reservations']
+            print(f"🏢 /{result['prefix']}: {result['members']} üye, {result['sessions']} seans, "
+                  f"{result['reservations']} rezervasyon")
+        print("🗂️ İndeksler ve özetler hazırlanıyor...")
+        for index in indexes:
+            index.create(db.session.connection())
+        finalize()
+
+        elapsed = time.perf_counter() - started
+        print(f"✅ İŞLEM TAMAM! {total} rezervasyon {elapsed:.1f} sn'de yazıldı.")
+        print(f"🚀 Şimdi 'python run.py' diyip /nil adresinde {DEMO_USER} ismiyle giriş yapabilirsin.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Demo / yük testi verisi üretir (mevcut veritabanı silinir).")
+    parser.add_argument('--tenants', type=int, default=1, help='stüdyo sayısı (ilki /nil)')
+    parser.add_argument('--members', type=int, default=20, help='stüdyo başına üye sayısı')
+    parser.add_argument('--sessions-per-day', type=int, default=4)
+    parser.add_argument('--capacity', type=int, default=10)
+    parser.add_argument('--days', type=int, default=90, help='kaç gün geriye seans açılır')
+    parser.add_argument('--days-ahead', type=int, default=30, help='kaç gün ileriye seans açılır')
+    parser.add_argument('--booking-rate', type=float, default=0.4, help='koltuk başına dolu olma olasılığı')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    seed_data(parser.parse_args())
+
 
 if __name__ == '__main__':
-    seed_data()
\ No newline at end of file
+    main()
@@ -1,3 +1,4 @@
 #!/bin/bash
-# Flask uygulamasını başlatır
+# Flask uygulamasını başlatır (önce bekleyen şema göçlerini uygular)
+./venv/bin/python -m flask --app app db upgrade
 ./venv/bin/python -m flask --app app run --debug --port 5002
@@ -0,0 +1,99 @@
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.models import db, Tenant, Member
+from app.tenant_cache import tenant_cache
+from app.stats import stats_cache
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """
+    Bellek içi SQLite üzerinde, arka plan işleri kapalı uygulama. Her istek
+    gerçekteki gibi kendi uygulama bağlamında çalışsın diye bağlam açık
+    bırakılmaz; testler veri hazırlarken `app.app_context()` kullanır.
+    """
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://')
+    monkeypatch.setenv('SESSION_CLOSER_ENABLED', '0')
+    monkeypatch.setenv('RECURRENCE_EXTENDER_ENABLED', '0')
+    monkeypatch.setenv('SQLITE_MAINTENANCE_ENABLED', '0')
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT_MS', '0')
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    # Modül düzeyindeki önbellekler önceki testin veritabanına ait kayıtları tutmasın
+    tenant_cache.invalidate()
+    stats_cache.invalidate()
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def member(app):
+    """'nil' stüdyosu ve bir üye; (tenant_id, member_id, full_name) döner."""
+    with app.app_context():
+        tenant = Tenant(name='Nil Pilates', domain_prefix='nil')
+        db.session.add(tenant)
+        db.session.flush()
+        member = Member(tenant_id=tenant.id, full_name='Zeynep Kaya', credits=10)
+        db.session.add(member)
+        db.session.commit()
+        return tenant.id, member.id, member.full_name
+
+
+@pytest.fixture
+def member_client(app, member):
+    """Üye olarak giriş yapmış test istemcisi."""
+    _, member_id, name = member
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['user_name'] = s['member_name'] = name
+        s['user_id'] = member_id
+    return client
+
+
+class SqlCounter:
+    """Bir blok içinde çalışan SQL ifadelerini ve ORM oturumunun okuduğu satırları sayar."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = 0
+        self.rows = 0
+
+    def _before_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+
+    def _count_rows(self, state):
+        if not state.is_select:
+            return None
+        # Sonuç dondurulup sayılır ve aynı satırlarla çağırana geri verilir
+        frozen = state.invoke_statement().freeze()
+        self.rows += len(frozen.data)
+        return frozen()
+
+    @contextmanager
+    def __call__(self):
+        self.statements = self.rows = 0
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor)
+        event.listen(OrmSession, 'do_orm_execute', self._count_rows)
+        try:
+            yield self
+        finally:
+            event.remove(OrmSession, 'do_orm_execute', self._count_rows)
+            event.remove(self.engine, 'before_cursor_execute', self._before_cursor)
+
+
+@pytest.fixture
+def count_sql(app):
+    with app.app_context():
+        return SqlCounter(db.engine)
@@ -0,0 +1,37 @@
+from datetime import date, time, timedelta
+
+from app.models import db, Session, Reservation, Attendance
+from app.routes.user_routes import build_attendance_weeks
+
+
+def seed_attendance(tenant_id, member_id, name, weeks):
+    """Dünden geriye `weeks` hafta için özet satırları ve bugüne iki aktif kayıt ekler."""
+    today = date.today()
+    for i in range(weeks * 7):
+        day = today - timedelta(days=i + 1)
+        if day.weekday() in (0, 2, 4):
+            db.session.add(Attendance(tenant_id=tenant_id, member_id=member_id, date=day,
+                                      status='attended', count=1))
+    for slot in (time(23, 0), time(23, 30)):
+        s = Session(tenant_id=tenant_id, date=today, time=slot, capacity=4, spots_left=3)
+        s.reservations.append(Reservation(tenant_id=tenant_id, member_id=member_id, user_name=name))
+        db.session.add(s)
+    db.session.commit()
+
+
+def test_attendance_weeks_query_count_is_constant(app, member, count_sql):
+    tenant_id, member_id, name = member
+    with app.app_context():
+        seed_attendance(tenant_id, member_id, name, weeks=60)
+
+        counts = {}
+        for num_weeks in (20, 52):
+            db.session.expire_all()
+            with count_sql() as counter:
+                weeks = build_attendance_weeks(tenant_id, member_id, num_weeks=num_weeks)
+            assert len(weeks) == num_weeks
+            counts[num_weeks] = counter.statements
+
+    assert counts[20] == counts[52]
+    # Henüz kapanmamış (aktif) kayıtlar da ızgaraya girer
+    assert next(d['count'] for d in weeks[0] if d['date'] == date.today()) == 2
@@ -0,0 +1,71 @@
+from datetime import date, time, timedelta
+
+import pytest
+
+from app.models import db, Session, Reservation, Attendance
+
+SLOTS = (time(9), time(18))
+
+
+def this_week():
+    today = date.today()
+    return today - timedelta(days=today.weekday())
+
+
+def add_week(tenant_id, member_id, name, week_start, completed):
+    """Haftanın Pzt-Cmt günlerine seans açar; üye her günün ilk seansına kayıtlı."""
+    for offset in range(6):
+        day = week_start + timedelta(days=offset)
+        for i, slot in enumerate(SLOTS):
+            s = Session(tenant_id=tenant_id, date=day, time=slot, capacity=4, spots_left=4, completed=completed)
+            db.session.add(s)
+            if i == 0:
+                s.reservations.append(Reservation(
+                    tenant_id=tenant_id, member_id=member_id, user_name=name,
+                    status='attended' if completed else 'active',
+                ))
+                s.spots_left -= 1
+                if completed:
+                    db.session.add(Attendance(tenant_id=tenant_id, member_id=member_id, date=day,
+                                              status='attended', count=1))
+
+
+@pytest.mark.parametrize('url', ['/nil/calendar?d={week}', '/nil/calendar/grid?week_start={week}'])
+def test_calendar_cost_does_not_grow_with_history(app, member, member_client, count_sql, url):
+    week = this_week()
+    url = url.format(week=week.isoformat())
+    with app.app_context():
+        add_week(*member, week, completed=False)
+        db.session.commit()
+    member_client.get(url)  # stüdyo önbelleği ısınsın
+
+    measured = []
+    for history_weeks in (0, 52):
+        with app.app_context():
+            for i in range(1, history_weeks + 1):
+                add_week(*member, week - timedelta(weeks=i), completed=True)
+            db.session.commit()
+
+        with count_sql() as counter:
+            resp = member_client.get(url)
+        assert resp.status_code == 200
+        measured.append((counter.statements, counter.rows))
+
+    with app.app_context():
+        assert Session.query.count() == 53 * 6 * len(SLOTS)
+    assert measured[0] == measured[1]
+
+
+@pytest.mark.parametrize('url', ['/nil/calendar/grid?week_start={week}', '/nil/calendar/week.json?week_start={week}'])
+def test_calendar_not_modified_reads_only_versions(app, member, member_client, count_sql, url):
+    url = url.format(week=this_week().isoformat())
+    with app.app_context():
+        add_week(*member, this_week(), completed=False)
+        db.session.commit()
+    etag = member_client.get(url).headers['ETag']
+
+    with count_sql() as counter:
+        resp = member_client.get(url, headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    # Hafta sürümü ve kural sürümü: iki birincil anahtar okuması
+    assert counter.statements == 2